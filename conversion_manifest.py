@@ -0,0 +1,213 @@
+import os
+import json
+import threading
+
+from pdf_cache import compute_document_hash
+
+# 旧格式转换记录文件，保存在转换的文件夹中
+CONVERSION_MANIFEST_FILE = ".convert_manifest.json"
+# 转换过程日志文件，保存在转换的文件夹中，转换和清理源文件全部完成后删除
+CONVERSION_JOURNAL_FILE = ".convert_journal.jsonl"
+
+
+def relative_path(folder_path, file_path):
+    """
+    获取文件相对于转换文件夹的路径，记录文件中统一使用/分隔
+    """
+    return os.path.relpath(os.path.abspath(file_path), os.path.abspath(folder_path)).replace("\\", "/")
+
+
+class ConversionManifest:
+    """
+    旧格式文件转换记录：源文件内容哈希 -> 转换生成的文件及其大小和修改时间
+    再次转换时，源文件内容未变化且生成的文件未被修改的文件直接跳过；
+    同时记录源文件的大小和修改时间，未变化的源文件不需要重新读取计算哈希
+    """
+
+    def __init__(self, folder_path):
+        """
+        :param folder_path: 转换的文件夹，记录中的路径均相对于该文件夹
+        """
+        self.folder_path = folder_path
+        self.path = os.path.join(folder_path, CONVERSION_MANIFEST_FILE)
+        self.outputs = {}  # 源文件哈希 -> {"output", "size", "mtime"}
+        self.sources = {}  # 源文件相对路径 -> {"size", "mtime", "hash"}
+
+    def load(self):
+        """
+        读取转换记录，文件不存在或格式错误时使用空记录
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.outputs = data.get("outputs", {})
+            self.sources = data.get("sources", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"读取转换记录时出错: {e}")
+        return self
+
+    def save(self):
+        """
+        保存转换记录（先写入临时文件再替换，避免中途退出时损坏记录）
+        """
+        data = {"outputs": self.outputs, "sources": self.sources}
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"保存转换记录时出错: {e}")
+
+    def _relpath(self, file_path):
+        return relative_path(self.folder_path, file_path)
+
+    def source_hash(self, source_path, source_stat=None):
+        """
+        获取源文件的内容哈希，大小和修改时间与记录相同时直接使用记录的哈希
+        :param source_path: 源文件路径
+        :param source_stat: 扫描文件夹时已获取的 (大小, 修改时间纳秒)，为空时读取文件信息
+        :return: 哈希字符串
+        """
+        if source_stat is None:
+            stat = os.stat(source_path)
+            source_stat = (stat.st_size, stat.st_mtime_ns)
+        size, mtime = source_stat
+        key = self._relpath(source_path)
+        entry = self.sources.get(key)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            return entry["hash"]
+        content_hash = compute_document_hash(source_path)
+        self.sources[key] = {"size": size, "mtime": mtime, "hash": content_hash}
+        return content_hash
+
+    def is_current(self, source_path, target_path, source_stat=None):
+        """
+        检查源文件是否已转换为目标文件且转换结果仍然有效
+        :param source_path: 源文件路径
+        :param target_path: 转换生成的文件路径
+        :param source_stat: 扫描文件夹时已获取的 (大小, 修改时间纳秒)
+        :return: 是否可以跳过转换
+        """
+        entry = self.outputs.get(self.source_hash(source_path, source_stat))
+        if not entry or entry["output"] != self._relpath(target_path):
+            return False
+        try:
+            stat = os.stat(target_path)
+        except OSError:
+            return False
+        # 生成的文件被修改或替换后重新转换
+        return entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns
+
+    def record(self, source_path, target_path, source_stat=None):
+        """
+        记录一次成功的转换
+        :param source_path: 源文件路径
+        :param target_path: 转换生成的文件路径
+        :param source_stat: 扫描文件夹时已获取的 (大小, 修改时间纳秒)
+        """
+        stat = os.stat(target_path)
+        output = self._relpath(target_path)
+        # 生成的文件已被新的转换结果覆盖，删除其他源文件内容的旧记录
+        for content_hash in [key for key, entry in self.outputs.items() if entry["output"] == output]:
+            del self.outputs[content_hash]
+        self.outputs[self.source_hash(source_path, source_stat)] = {
+            "output": output,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+        }
+
+
+class ConversionJournal:
+    """
+    转换过程日志：每个文件的转换状态变化时立即追加一行（pending、done、failed、cleaned），
+    程序中途关闭或转换程序崩溃后，再次转换时跳过已确认完成的文件，从未完成的文件继续；
+    删除或移动源文件时只处理确认转换成功的文件，全部处理完成后删除日志
+    """
+
+    def __init__(self, folder_path):
+        """
+        :param folder_path: 转换的文件夹，日志中的路径均相对于该文件夹
+        """
+        self.folder_path = folder_path
+        self.path = os.path.join(folder_path, CONVERSION_JOURNAL_FILE)
+        self.entries = {}  # 源文件相对路径 -> 最新状态 {"state", "target", "size", "mtime", "error"}
+        self._lock = threading.Lock()  # 各转换线程完成时同时写入
+
+    def load(self):
+        """
+        读取上次未完成的转换日志，没有日志时为空
+        """
+        try:
+            with open(self.path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return self
+        except Exception as e:
+            print(f"读取转换日志时出错: {e}")
+            return self
+
+        # 程序在写入时退出，最后一行可能不完整，只处理完整的行
+        for line in content[:content.rfind(b"\n") + 1].splitlines():
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line.decode("utf-8"))
+            except ValueError as e:
+                print(f"跳过损坏的转换日志: {e}")
+                continue
+            self.entries.setdefault(event.pop("source"), {}).update(event)
+        return self
+
+    def mark(self, source_path, state, **fields):
+        """
+        记录文件的新状态并立即写入日志
+        :param source_path: 源文件路径
+        :param state: 状态（pending、done、failed、cleaned）
+        :param fields: 其他需要记录的信息
+        """
+        source = relative_path(self.folder_path, source_path)
+        event = dict(fields, state=state)
+        with self._lock:
+            self.entries.setdefault(source, {}).update(event)
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(dict(event, source=source), ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"写入转换日志时出错: {e}")
+
+    def count(self, *states):
+        """
+        统计处于指定状态的文件数量
+        """
+        return sum(1 for entry in self.entries.values() if entry.get("state") in states)
+
+    def is_done(self, source_path, target_path, source_stat):
+        """
+        检查文件在上次转换中是否已确认完成：源文件未变化且生成的文件仍然存在
+        :param source_path: 源文件路径
+        :param target_path: 转换生成的文件路径
+        :param source_stat: 源文件的 (大小, 修改时间纳秒)
+        :return: 是否可以跳过转换
+        """
+        entry = self.entries.get(relative_path(self.folder_path, source_path))
+        if not entry or entry.get("state") != "done":
+            return False
+        return (entry.get("target") == relative_path(self.folder_path, target_path)
+                and (entry.get("size"), entry.get("mtime")) == tuple(source_stat)
+                and os.path.exists(target_path))
+
+    def remove(self):
+        """
+        转换和清理全部完成后删除日志
+        """
+        with self._lock:
+            self.entries.clear()
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"删除转换日志时出错: {e}")
@@ -0,0 +1,698 @@
+import os
+import re
+import sys
+import copy
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# 文件锁：Linux/macOS使用fcntl，Windows使用msvcrt
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# 数据文件所在目录：程序所在的目录（打包后为exe所在目录），与启动时的工作目录无关，
+# 从快捷方式或其他目录启动时仍使用同一份数据
+if getattr(sys, "frozen", False):
+    APP_DATA_DIR = os.path.dirname(os.path.abspath(sys.executable))
+else:
+    APP_DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+# 全局数据文件，只保存软件配置、占位符配置和方案定义
+APP_DATA_FILE = os.path.join(APP_DATA_DIR, "app_data.json")
+# 方案分片目录，每个方案的用户录入和历史记录单独保存为一个文件
+SCHEME_DATA_DIR = os.path.join(APP_DATA_DIR, "scheme_data")
+
+# 保存在全局数据文件中的数据段
+GLOBAL_SECTIONS = ("config", "placeholder_configs", "schemes")
+# 保存在方案分片文件中的数据段（旧版本保存在全局数据文件中，按方案名称索引）
+SCHEME_SECTIONS = ("user_inputs", "history")
+
+# 文件修订号字段，每次写入加1，用于判断文件是否被其他实例修改过
+REVISION_KEY = "_revision"
+
+# 各数据段当前的格式版本，文件中没有记录版本的数据段视为版本1
+SCHEMA_VERSIONS = {"history": 2}
+# 文件中记录各数据段格式版本的字段
+SCHEMA_VERSIONS_KEY = "schema_versions"
+# 数据段格式迁移函数：数据段 -> {目标版本: 迁移函数}
+_MIGRATIONS = {}
+
+# 版本1的历史记录中的元数据字段（时间戳、内容哈希、使用次数），和录入内容混在一起保存
+LEGACY_HISTORY_META_KEYS = ("__timestamp__", "__hash__", "__count__")
+# 每个方案最多保存的历史记录条数
+MAX_HISTORY_RECORDS = 20
+
+# 获取文件锁的最长等待时间（秒）
+LOCK_TIMEOUT = 10
+
+# 历史记录日志超过该大小（字节）时在后台压缩进分片文件
+HISTORY_JOURNAL_COMPACT_SIZE = 64 * 1024
+
+
+def compute_record_hash(fields):
+    """
+    计算历史记录的内容哈希
+    :param fields: 录入内容字典（不含自动生成的日期字段）
+    :return: 内容哈希字符串
+    """
+    content = json.dumps(fields, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def register_migration(section, version):
+    """
+    注册数据段的格式迁移函数（装饰器）
+    迁移函数接收旧版本的数据段内容，返回目标版本的内容；已是新格式的内容应原样返回
+    :param section: 数据段名称
+    :param version: 迁移后的版本号
+    """
+    def decorator(func):
+        _MIGRATIONS.setdefault(section, {})[version] = func
+        return func
+    return decorator
+
+
+def migrate_section(section, value, from_version):
+    """
+    将数据段内容从指定版本逐步迁移到当前版本
+    :param section: 数据段名称
+    :param value: 数据段内容
+    :param from_version: 数据段内容当前的版本
+    :return: 迁移后的内容
+    """
+    for version in range(from_version + 1, SCHEMA_VERSIONS.get(section, 1) + 1):
+        value = _MIGRATIONS[section][version](value)
+    return value
+
+
+@register_migration("history", 2)
+def _migrate_history_v2(records):
+    """
+    历史记录版本2：录入内容、日期和元数据分开保存
+    版本1: {"占位符": "值", ..., "日期": "...", "__timestamp__": "...", "__hash__": "...", "__count__": 1}
+    版本2: {"fields": {"占位符": "值", ...}, "date": "...", "timestamp": "...", "hash": "...", "count": 1}
+    """
+    migrated = []
+    for record in records:
+        if "fields" in record:
+            migrated.append(record)
+            continue
+        fields = {key: value for key, value in record.items()
+                  if key not in LEGACY_HISTORY_META_KEYS and key != "日期"}
+        migrated.append({
+            "fields": fields,
+            "date": record.get("日期", ""),
+            "timestamp": record.get("__timestamp__", ""),
+            "hash": compute_record_hash(fields),
+            "count": record.get("__count__", 1),
+        })
+    return migrated
+
+
+def apply_history_event(history, event):
+    """
+    将一条历史记录日志中的变更应用到历史记录列表上
+    :param history: 历史记录列表（最新的在前），原地修改
+    :param event: 变更事件，add为添加记录，delete为按内容哈希删除记录
+    """
+    if event.get("op") == "add":
+        record = dict(event["record"])
+        # 查找内容相同的旧记录，合并使用次数后移除
+        remaining_records = []
+        for old_record in history:
+            if old_record["hash"] == record["hash"]:
+                record["count"] = record.get("count", 1) + old_record.get("count", 1)
+            else:
+                remaining_records.append(old_record)
+
+        # 将新记录添加到开头，并限制最多保存的记录条数
+        remaining_records.insert(0, record)
+        history[:] = remaining_records[:MAX_HISTORY_RECORDS]
+    elif event.get("op") == "delete":
+        history[:] = [record for record in history if record["hash"] != event["hash"]]
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """
+    获取文件的独占锁（建议锁，锁文件为 path + ".lock"），用于多个程序实例共享同一份数据
+    :param path: 被保护的数据文件路径
+    :param timeout: 最长等待时间（秒）
+    """
+    lock_path = f"{path}.lock"
+    directory = os.path.dirname(lock_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    lock_file = open(lock_path, "a+")
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                elif msvcrt:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"等待数据文件锁超时: {lock_path}")
+                time.sleep(0.05)
+        yield
+    finally:
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        lock_file.close()
+
+
+class AppDataStore:
+    """
+    应用数据存储，全局配置和方案数据分开保存
+    全局数据在首次访问时读取，方案分片在首次访问该方案时才读取
+    多个程序实例可以共享同一份数据：写入时加文件锁，并在最新的文件内容上只修改本次涉及的数据，
+    其他实例对别的数据段（或别的记录）的修改会被保留
+    """
+
+    def __init__(self, data_file=APP_DATA_FILE, scheme_dir=SCHEME_DATA_DIR):
+        """
+        初始化数据存储
+        :param data_file: 全局数据文件路径
+        :param scheme_dir: 方案分片目录
+        """
+        self.data_file = data_file
+        self.scheme_dir = scheme_dir
+        self._cache = {}  # 文件路径 -> (文件状态, 数据)
+        self._journals = {}  # 历史记录日志路径 -> 日志读取状态
+        self._compacting = set()  # 正在后台压缩历史记录日志的方案
+        self._lock = threading.RLock()
+
+    def _file_state(self, path):
+        """
+        获取文件状态（修改时间和大小），用于判断缓存是否过期
+        :param path: 文件路径
+        :return: 状态元组，文件不存在时返回None
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_json(self, path):
+        """
+        读取JSON文件，文件不存在时返回空字典
+        :param path: 文件路径
+        :return: 数据字典
+        """
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, path, data):
+        """
+        写入JSON文件（先写临时文件再替换，避免写入中断导致文件损坏，读取方不需要加锁）
+        :param path: 文件路径
+        :param data: 数据字典
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Windows下其他实例正在读取时替换会失败，稍等后重试
+        for attempt in range(20):
+            try:
+                os.replace(temp_path, path)
+                return
+            except PermissionError:
+                if attempt == 19:
+                    raise
+                time.sleep(0.05)
+
+    def _read(self, path):
+        """
+        读取数据文件（文件未被修改时直接使用缓存，不重新解析整个文件）
+        :param path: 文件路径
+        :return: 数据字典（缓存对象，调用方不要修改）
+        """
+        with self._lock:
+            state = self._file_state(path)
+            cached = self._cache.get(path)
+            if cached and cached[0] == state:
+                return cached[1]
+            data = self._read_json(path) if state else {}
+            self._cache[path] = (state, data)
+            return data
+
+    def _update(self, path, mutator, sections=()):
+        """
+        加锁修改数据文件
+        在锁内重新读取文件，再把本次修改应用到最新的数据上；
+        共享文件夹中的修改时间精度较低且文件状态可能被缓存，不能用修改时间和大小判断文件是否被其他实例修改过
+        :param path: 文件路径
+        :param mutator: 修改函数，参数为数据字典，可以返回结果
+        :param sections: 修改函数读写的数据段，修改前先迁移到当前格式版本
+        :return: 修改函数的返回值
+        """
+        with self._lock, file_lock(path):
+            cached = self._cache.get(path)
+            data = self._read_json(path)
+            if cached and cached[1].get(REVISION_KEY) != data.get(REVISION_KEY):
+                print(f"数据文件已被其他实例修改，已重新读取: {path}")
+
+            for section in sections:
+                self._upgrade_section(data, section)
+            result = mutator(data)
+            data[REVISION_KEY] = data.get(REVISION_KEY, 0) + 1
+            self._write_json(path, data)
+            self._cache[path] = (self._file_state(path), data)
+            return result
+
+    def _section_version(self, data, section):
+        """
+        获取文件中数据段的格式版本
+        :param data: 文件数据字典
+        :param section: 数据段名称
+        :return: 版本号
+        """
+        return data.get(SCHEMA_VERSIONS_KEY, {}).get(section, 1)
+
+    def _upgrade_section(self, data, section):
+        """
+        将文件数据中的一个数据段迁移到当前格式版本（原地修改）
+        :param data: 文件数据字典
+        :param section: 数据段名称
+        """
+        version = self._section_version(data, section)
+        target = SCHEMA_VERSIONS.get(section, 1)
+        if version >= target:
+            return
+        if section in data:
+            data[section] = migrate_section(section, data[section], version)
+            print(f"已将数据段 '{section}' 从版本{version}迁移到版本{target}")
+        data.setdefault(SCHEMA_VERSIONS_KEY, {})[section] = target
+
+    def _get_section(self, path, section, default=None):
+        """
+        读取文件中的一个数据段，数据段是旧格式时先迁移并写回（只迁移该数据段，首次访问时进行）
+        :param path: 文件路径
+        :param section: 数据段名称
+        :param default: 数据段不存在时的默认值
+        :return: 数据段内容（缓存对象，调用方不要修改）
+        """
+        data = self._read(path)
+        if section in data and self._section_version(data, section) < SCHEMA_VERSIONS.get(section, 1):
+            self._update(path, lambda fresh: None, sections=(section,))
+            data = self._read(path)
+        return data.get(section, default)
+
+    def get_shard_path(self, scheme_name):
+        """
+        获取方案分片文件路径
+        文件名由方案名称（替换掉文件名中不允许的字符）和名称哈希组成，保证唯一
+        :param scheme_name: 方案名称
+        :return: 分片文件路径
+        """
+        safe_name = re.sub(r'[\\/:*?"<>|\s]', "_", scheme_name)[:40]
+        name_hash = hashlib.sha1(scheme_name.encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.scheme_dir, f"{safe_name}_{name_hash}.json")
+
+    def load_scheme_data(self, scheme_name):
+        """
+        加载方案分片（文件未被修改时直接返回缓存）
+        分片文件不存在时，从旧版全局数据文件中迁移该方案的用户录入和历史记录
+        :param scheme_name: 方案名称
+        :return: 方案数据字典（缓存对象，调用方不要修改）
+        """
+        with self._lock:
+            shard_path = self.get_shard_path(scheme_name)
+            if not os.path.exists(shard_path):
+                self._migrate_legacy_scheme_data(scheme_name)
+
+            shard = self._read(shard_path)
+            shard.setdefault("scheme", scheme_name)
+            shard.setdefault("user_inputs", {})
+            return shard
+
+    def _migrate_legacy_scheme_data(self, scheme_name):
+        """
+        将旧版全局数据文件中某个方案的数据迁移到分片文件
+        迁移完成后从全局数据中移除该方案的旧数据，其他方案的旧数据保持不变
+        :param scheme_name: 方案名称
+        """
+        global_data = self._read(self.data_file)
+        if not any(isinstance(global_data.get(section), dict) and scheme_name in global_data[section]
+                   for section in SCHEME_SECTIONS):
+            return
+
+        shard_path = self.get_shard_path(scheme_name)
+
+        def take_legacy_data(data):
+            legacy_data = {}
+            for section in SCHEME_SECTIONS:
+                legacy = data.get(section)
+                if isinstance(legacy, dict) and scheme_name in legacy:
+                    legacy_data[section] = legacy.pop(scheme_name)
+                # 所有方案都迁移完后删除旧数据段
+                if section in data and not data[section]:
+                    del data[section]
+
+            # 其他实例已经完成迁移
+            if not legacy_data:
+                return False
+
+            # 先写分片再改全局文件，中途出错时旧数据仍然保留
+            def fill_shard(shard):
+                shard.setdefault("scheme", scheme_name)
+                for section, value in legacy_data.items():
+                    shard.setdefault(section, value)
+
+            self._update(shard_path, fill_shard)
+            return True
+
+        if self._update(self.data_file, take_legacy_data):
+            print(f"已将方案 '{scheme_name}' 的数据迁移到分片文件")
+
+    def get_config(self, key, default=None):
+        """
+        获取软件配置项
+        :param key: 配置项名称
+        :param default: 默认值
+        :return: 配置值
+        """
+        return self._read(self.data_file).get("config", {}).get(key, default)
+
+    def set_config(self, key, value):
+        """
+        保存软件配置项
+        :param key: 配置项名称
+        :param value: 配置值
+        """
+        def apply(data):
+            data.setdefault("config", {})[key] = value
+
+        self._update(self.data_file, apply)
+
+    def get_placeholder_config(self, placeholder):
+        """
+        获取占位符配置
+        :param placeholder: 占位符名称
+        :return: 配置字典
+        """
+        return copy.deepcopy(self._read(self.data_file).get("placeholder_configs", {}).get(placeholder, {}))
+
+    def set_placeholder_config(self, placeholder, config):
+        """
+        保存占位符配置
+        :param placeholder: 占位符名称
+        :param config: 配置字典
+        """
+        def apply(data):
+            data.setdefault("placeholder_configs", {})[placeholder] = config
+
+        self._update(self.data_file, apply)
+
+    def get_schemes(self):
+        """
+        获取所有方案定义
+        :return: 方案名称到方案定义的字典（缓存对象，调用方不要修改）
+        """
+        return self._read(self.data_file).get("schemes", {})
+
+    def get_scheme(self, scheme_name):
+        """
+        获取方案定义（返回副本，界面上的修改不会影响已保存的数据）
+        :param scheme_name: 方案名称
+        :return: 方案定义字典，方案不存在时返回None
+        """
+        return copy.deepcopy(self.get_schemes().get(scheme_name))
+
+    def save_scheme(self, scheme_name, scheme_data):
+        """
+        保存方案定义
+        :param scheme_name: 方案名称
+        :param scheme_data: 方案定义字典
+        """
+        def apply(data):
+            data.setdefault("schemes", {})[scheme_name] = scheme_data
+
+        self._update(self.data_file, apply)
+
+    def delete_scheme(self, scheme_name):
+        """
+        删除方案定义及其分片文件
+        :param scheme_name: 方案名称
+        :return: 方案是否存在
+        """
+        def apply(data):
+            schemes = data.get("schemes", {})
+            if scheme_name not in schemes:
+                return False
+            del schemes[scheme_name]
+            for section in SCHEME_SECTIONS:
+                if isinstance(data.get(section), dict):
+                    data[section].pop(scheme_name, None)
+            return True
+
+        if not self._update(self.data_file, apply):
+            return False
+
+        shard_path = self.get_shard_path(scheme_name)
+        with self._lock, file_lock(shard_path):
+            self._cache.pop(shard_path, None)
+            if os.path.exists(shard_path):
+                os.remove(shard_path)
+
+        journal_path = self.get_journal_path(scheme_name)
+        with file_lock(journal_path), self._lock:
+            self._journals.pop(journal_path, None)
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+        return True
+
+    def get_user_inputs(self, scheme_name):
+        """
+        获取方案的用户录入
+        :param scheme_name: 方案名称
+        :return: 用户输入字典
+        """
+        return dict(self.load_scheme_data(scheme_name)["user_inputs"])
+
+    def save_user_inputs(self, scheme_name, user_inputs):
+        """
+        保存方案的用户录入（只写入该方案的分片文件）
+        :param scheme_name: 方案名称
+        :param user_inputs: 用户输入字典
+        """
+        self.load_scheme_data(scheme_name)
+
+        def apply(shard):
+            shard["user_inputs"] = user_inputs
+
+        self._update(self.get_shard_path(scheme_name), apply)
+
+    def get_journal_path(self, scheme_name):
+        """
+        获取方案历史记录日志文件路径（与分片文件同名，扩展名为.history.jsonl）
+        :param scheme_name: 方案名称
+        :return: 日志文件路径
+        """
+        return os.path.splitext(self.get_shard_path(scheme_name))[0] + ".history.jsonl"
+
+    def _replay_history(self, scheme_name):
+        """
+        获取方案的完整历史记录：分片文件中的快照加上日志中的变更
+        日志只追加时只读取新增的部分，日志被压缩（其他实例也可能压缩）后重新读取
+        :param scheme_name: 方案名称
+        :return: 历史记录列表（缓存对象，调用方不要修改）
+        """
+        with self._lock:
+            self.load_scheme_data(scheme_name)
+            shard_path = self.get_shard_path(scheme_name)
+            snapshot = self._get_section(shard_path, "history", [])
+            shard = self._read(shard_path)
+            journal_path = self.get_journal_path(scheme_name)
+            state = self._file_state(journal_path)
+            cached = self._journals.get(journal_path)
+            if cached and cached["snapshot_revision"] == shard.get(REVISION_KEY):
+                if cached["state"] == state:
+                    return cached["history"]
+                if state and state[1] >= cached["offset"]:
+                    # 日志只是追加了新的内容
+                    self._read_journal(journal_path, cached)
+                    cached["state"] = state
+                    return cached["history"]
+
+            journal = {
+                "snapshot_revision": shard.get(REVISION_KEY),
+                "snapshot_generation": shard.get("journal_generation", 0),
+                "history": copy.deepcopy(snapshot),
+                "generation": None,
+                "schema_version": 1,
+                "offset": 0,
+                "state": state,
+            }
+            if state:
+                self._read_journal(journal_path, journal)
+            self._journals[journal_path] = journal
+            return journal["history"]
+
+    def _read_journal(self, journal_path, journal):
+        """
+        从上次读取的位置继续读取日志，并把变更应用到历史记录上
+        :param journal_path: 日志文件路径
+        :param journal: 日志读取状态
+        """
+        with open(journal_path, "rb") as f:
+            f.seek(journal["offset"])
+            content = f.read()
+
+        # 最后一行可能正在被其他实例写入，只处理完整的行
+        complete_size = content.rfind(b"\n") + 1
+        for line in content[:complete_size].splitlines():
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line.decode("utf-8"))
+            except ValueError as e:
+                print(f"跳过损坏的历史记录日志: {e}")
+                continue
+
+            if event.get("op") == "header":
+                journal["generation"] = event.get("generation", 0)
+                journal["schema_version"] = event.get("schema_version", 1)
+            elif journal["generation"] is not None and journal["generation"] <= journal["snapshot_generation"]:
+                # 这一代日志已经压缩进快照（压缩在替换日志前中断），不再重复应用
+                continue
+            else:
+                if "record" in event:
+                    # 旧版本程序写入的日志，记录格式需要迁移
+                    event["record"] = migrate_section("history", [event["record"]], journal["schema_version"])[0]
+                apply_history_event(journal["history"], event)
+        journal["offset"] += complete_size
+
+    def _append_history_event(self, scheme_name, event):
+        """
+        向方案的历史记录日志追加一条变更，日志过大时在后台压缩
+        :param scheme_name: 方案名称
+        :param event: 变更事件字典
+        """
+        journal_path = self.get_journal_path(scheme_name)
+        with file_lock(journal_path):
+            lines = []
+            if not os.path.exists(journal_path):
+                # 新日志以文件头开始，记录日志的代数
+                generation = self.load_scheme_data(scheme_name).get("journal_generation", 0) + 1
+                lines.append({"op": "header", "generation": generation,
+                              "schema_version": SCHEMA_VERSIONS["history"]})
+            lines.append(event)
+            with open(journal_path, "a", encoding="utf-8") as f:
+                for line in lines:
+                    f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+        state = self._file_state(journal_path)
+        if state and state[1] >= HISTORY_JOURNAL_COMPACT_SIZE:
+            self.compact_history_in_background(scheme_name)
+
+    def compact_history(self, scheme_name):
+        """
+        压缩历史记录日志：把日志中的变更合并进分片文件的快照，然后开始新一代的空日志
+        :param scheme_name: 方案名称
+        """
+        journal_path = self.get_journal_path(scheme_name)
+        with file_lock(journal_path):
+            with self._lock:
+                self._journals.pop(journal_path, None)
+                history = copy.deepcopy(self._replay_history(scheme_name))
+                generation = self._journals[journal_path]["generation"]
+            if generation is None:
+                return
+
+            def apply(shard):
+                shard["history"] = history
+                shard["journal_generation"] = generation
+
+            # 先写快照再替换日志，中途中断时日志代数不大于快照代数，重新读取时会被跳过
+            self._update(self.get_shard_path(scheme_name), apply, sections=("history",))
+            temp_path = f"{journal_path}.{os.getpid()}.tmp"
+            header = {"op": "header", "generation": generation + 1, "schema_version": SCHEMA_VERSIONS["history"]}
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(header) + "\n")
+            os.replace(temp_path, journal_path)
+            print(f"已压缩方案 '{scheme_name}' 的历史记录日志")
+
+    def compact_history_in_background(self, scheme_name):
+        """
+        在后台线程中压缩历史记录日志（同一方案同时只运行一个压缩线程）
+        :param scheme_name: 方案名称
+        """
+        with self._lock:
+            if scheme_name in self._compacting:
+                return
+            self._compacting.add(scheme_name)
+
+        def compact_thread():
+            try:
+                self.compact_history(scheme_name)
+            except Exception as e:
+                print(f"压缩历史记录日志时出错: {e}")
+            finally:
+                with self._lock:
+                    self._compacting.discard(scheme_name)
+
+        threading.Thread(target=compact_thread, daemon=True).start()
+
+    def get_history(self, scheme_name):
+        """
+        获取方案的历史记录
+        :param scheme_name: 方案名称
+        :return: 历史记录列表（最新的在前），每条记录包含fields、date、timestamp、hash和count
+        """
+        return copy.deepcopy(self._replay_history(scheme_name))
+
+    def add_history_record(self, scheme_name, user_inputs):
+        """
+        添加一条历史记录（只向日志追加一行，不重写分片文件）
+        相同内容的记录只保留一条，重复保存时更新时间戳和使用次数并移到最前面
+        :param scheme_name: 方案名称
+        :param user_inputs: 用户输入字典（自动生成的日期字段单独保存，不参与内容比较）
+        """
+        fields = {key: value for key, value in user_inputs.items() if key != "日期"}
+        record = {
+            "fields": fields,
+            "date": user_inputs.get("日期", ""),
+            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "hash": compute_record_hash(fields),
+            "count": 1,
+        }
+        self._append_history_event(scheme_name, {"op": "add", "record": record})
+
+    def delete_history_record(self, scheme_name, record_hash):
+        """
+        删除一条历史记录（按内容哈希删除，不受其他实例插入记录导致的位置变化影响）
+        :param scheme_name: 方案名称
+        :param record_hash: 记录的内容哈希
+        :return: 是否找到并删除了记录
+        """
+        if not any(record["hash"] == record_hash for record in self._replay_history(scheme_name)):
+            return False
+        self._append_history_event(scheme_name, {"op": "delete", "hash": record_hash})
+        return True
@@ -1,10 +1,16 @@
 import os
 import re
 import json
+import queue
+import shutil
+import tempfile
 import threading
+import time
+import functools
 import os
 from PIL import Image, ImageTk
 from datetime import datetime
+from contextlib import contextmanager
 from docx import Document
 import tkinter as tk
 from tkinter import filedialog, ttk
@@ -12,14 +18,32 @@ from tkinter import filedialog, ttk
 # 直接导入所有需要的模块，确保PyInstaller能够正确打包
 import docx
 from openpyxl import Workbook, load_workbook
-from docx2pdf import convert
-from PyPDF2 import PdfMerger
+from concurrent.futures import Future
+
+from data_store import AppDataStore
+from virtual_form import FORM_ROW_HEIGHT, VirtualForm
+from office_converter import CONVERTER_BACKENDS, LEGACY_FORMATS, ConverterPool
+from pdf_cache import PdfCache
+from conversion_manifest import ConversionJournal, ConversionManifest, relative_path
+from folder_scanner import LEGACY_KINDS, scan_template_folder
+from docx_merge import merge_docx_files
+from pdf_merge import (JOB_MANIFEST_FILE, GroupedPdfWriter, MergeManifest, StreamingPdfWriter, format_peak_memory,
+                       peak_memory_usage)
+from pdf_form import set_text_field_value
+from PyPDF2 import PdfReader
 
 # 设置标志位为True，因为我们现在直接导入了这些模块
 EXCEL_PROCESSING_AVAILABLE = True
 PDF_CONVERSION_AVAILABLE = True
 PDF_MERGING_AVAILABLE = True
 
+# 转换得到的单个PDF优先放在内存文件系统中（Linux下的/dev/shm），可用空间不足时使用系统临时目录
+SHM_DIR = "/dev/shm"
+SHM_MIN_FREE_SPACE = 256 * 1024 * 1024
+
+# 扫描文件夹时更新文件信息显示的间隔（秒）
+FOLDER_SCAN_UPDATE_INTERVAL = 0.3
+
 class DocumentProcessor:
     def __init__(self):
         """
@@ -29,6 +53,11 @@ class DocumentProcessor:
         self.user_inputs = {}  # 存储用户输入
         self.template_files = []  # 存储选中的模板文件
         self.progress_callback = None  # 进度回调函数
+        self.converter_backend = "auto"  # PDF转换引擎，auto表示自动选择
+        self.converter_workers = 0  # 并行转换数，0表示根据转换引擎自动设置
+        self.converter_pool = None  # 常驻的PDF转换池，首次转换时创建
+        self.converter_pool_lock = threading.Lock()
+        self.pdf_cache = PdfCache()  # PDF转换缓存，内容相同的文档不重复转换
 
     def set_progress_callback(self, callback):
         """
@@ -37,6 +66,48 @@ class DocumentProcessor:
         """
         self.progress_callback = callback
 
+    def set_converter_backend(self, backend_name):
+        """
+        设置PDF转换引擎
+        :param backend_name: 引擎名称（office、libreoffice、docx2pdf），auto表示自动选择
+        """
+        backend_name = backend_name or "auto"
+        if backend_name == self.converter_backend:
+            return
+        self.converter_backend = backend_name
+        # 引擎变化后关闭旧的转换池，下次转换时按新引擎重新创建
+        self.reset_converter_pool()
+
+    def set_converter_workers(self, workers):
+        """
+        设置并行转换数
+        :param workers: 同时运行的转换进程数量，0表示根据转换引擎自动设置
+        """
+        workers = max(0, int(workers or 0))
+        if workers == self.converter_workers:
+            return
+        self.converter_workers = workers
+        self.reset_converter_pool()
+
+    def reset_converter_pool(self):
+        """
+        关闭当前的转换池，下次转换时按最新设置重新创建
+        """
+        with self.converter_pool_lock:
+            if self.converter_pool is not None:
+                self.converter_pool.shutdown(wait=False)
+                self.converter_pool = None
+
+    def get_converter_pool(self):
+        """
+        获取常驻的PDF转换池，转换程序在多个文件和多次任务之间保持运行
+        :return: 转换池对象
+        """
+        with self.converter_pool_lock:
+            if self.converter_pool is None:
+                self.converter_pool = ConverterPool(self.converter_backend, size=self.converter_workers)
+            return self.converter_pool
+
     def extract_placeholders_from_docx(self, file_path):
         """
         从Word文档中提取占位符
@@ -82,6 +153,49 @@ class DocumentProcessor:
         
         return placeholders
 
+    def extract_placeholders_from_pdf(self, file_path):
+        """
+        从PDF表单中提取占位符：文本框和下拉框的字段名即占位符（字段名可以带花括号，也可以不带）
+        :param file_path: PDF表单路径
+        :return: 占位符集合
+        """
+        placeholders = set()
+        for field in self.iter_pdf_form_fields(PdfReader(file_path)):
+            placeholders.add(self.get_pdf_field_placeholder(field["/T"]))
+        return placeholders
+
+    def iter_pdf_form_fields(self, reader):
+        """
+        遍历PDF表单中可填写文字的字段（文本框和下拉框）
+        :param reader: PdfReader对象
+        :return: 字段字典的生成器
+        """
+        acroform = reader.trailer["/Root"].get("/AcroForm")
+        if acroform is None:
+            return
+        stack = list(acroform.get_object().get("/Fields", []))
+        while stack:
+            field = stack.pop().get_object()
+            kids = field.get("/Kids", [])
+            if any("/T" in kid.get_object() for kid in kids):
+                stack.extend(kids)  # 非终端字段，继续查找子字段
+                continue
+            field_type = field.get("/FT")
+            if field_type is None and "/Parent" in field:
+                field_type = field["/Parent"].get_object().get("/FT")  # 字段类型可以从上级字段继承
+            if field_type in ("/Tx", "/Ch") and "/T" in field:
+                yield field
+
+    def get_pdf_field_placeholder(self, field_name):
+        """
+        获取PDF表单字段对应的占位符名称
+        :param field_name: 字段名
+        :return: 去掉花括号的占位符名称
+        """
+        name = str(field_name).strip()
+        match = re.fullmatch(r'\{([^}]+)\}', name)
+        return match.group(1) if match else name
+
     def find_placeholders_in_text(self, text):
         """
         在文本中查找占位符
@@ -106,6 +220,8 @@ class DocumentProcessor:
                 placeholders = self.extract_placeholders_from_docx(file_path)
             elif file_path.endswith('.xlsx'):
                 placeholders = self.extract_placeholders_from_xlsx(file_path)
+            elif file_path.lower().endswith('.pdf'):
+                placeholders = self.extract_placeholders_from_pdf(file_path)
             else:
                 continue
                 
@@ -188,6 +304,32 @@ class DocumentProcessor:
         # 保存新文件
         workbook.save(output_path)
 
+    def replace_placeholders_in_pdf(self, template_path, output_path, replacements):
+        """
+        填写PDF表单模板：把用户输入写入字段名为占位符的表单字段
+        生成的文件仍是可填写的PDF表单，合并时无需转换
+        :param template_path: PDF表单模板路径
+        :param output_path: 输出文件路径
+        :param replacements: 替换字典
+        """
+        reader = PdfReader(template_path)
+        acroform = reader.trailer["/Root"].get("/AcroForm")
+        acroform = acroform.get_object() if acroform is not None else None
+        for field in self.iter_pdf_form_fields(reader):
+            placeholder = self.get_pdf_field_placeholder(field["/T"])
+            if placeholder not in replacements:
+                continue
+            # 按新值生成控件外观，不依赖阅读器重新生成
+            set_text_field_value(field, replacements[placeholder], acroform)
+        
+        writer = StreamingPdfWriter(output_path)
+        try:
+            writer.append(reader)
+            writer.close()
+        except Exception:
+            writer.abort()
+            raise
+
     def replace_text_in_paragraph(self, paragraph, replacements):
         """
         在段落中替换文本（改进版，更好地保持格式）
@@ -205,12 +347,13 @@ class DocumentProcessor:
                     # 直接在run中替换文本，保持该run的所有格式属性
                     run.text = run.text.replace(full_placeholder, str(replacement))
 
-    def process_templates(self, template_files, user_inputs, output_dir="docs"):
+    def process_templates(self, template_files, user_inputs, output_dir="docs", file_callback=None):
         """
         处理模板文件
         :param template_files: 模板文件列表
         :param user_inputs: 用户输入字典
         :param output_dir: 输出目录
+        :param file_callback: 每个文件生成后立即调用的函数，参数为生成的文件路径
         :return: 生成的文件路径列表
         """
         # 添加日期字段（如果用户没有自定义日期，则使用当天日期）
@@ -238,372 +381,590 @@ class DocumentProcessor:
                 self.replace_placeholders_in_docx(template_file, output_path, user_inputs)
             elif template_file.endswith('.xlsx'):
                 self.replace_placeholders_in_xlsx(template_file, output_path, user_inputs)
+            elif template_file.lower().endswith('.pdf'):
+                self.replace_placeholders_in_pdf(template_file, output_path, user_inputs)
             
             generated_files.append(output_path)
             print(f"已生成文件: {output_path}")
+            
+            if file_callback:
+                file_callback(output_path)
         
+        self.save_job_manifest(output_dir, generated_files)
         return generated_files
 
-    def convert_docx_to_pdf(self, docx_paths, status_callback=None):
+    def save_job_manifest(self, output_dir, generated_files):
         """
-        将Word文档转换为PDF
-        :param docx_paths: Word文档路径列表
+        保存生成记录
+        :param output_dir: 输出目录
+        :param generated_files: 按模板顺序排列的生成文件路径列表
+        """
+        data = {
+            "created": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "files": [os.path.basename(path) for path in generated_files],
+        }
+        manifest_path = os.path.join(output_dir, JOB_MANIFEST_FILE)
+        try:
+            temp_path = manifest_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, manifest_path)
+        except Exception as e:
+            print(f"保存生成记录时出错: {e}")
+
+    def load_job_manifest(self, output_dir):
+        """
+        读取生成记录
+        :param output_dir: 输出目录
+        :return: 按模板顺序排列、仍然存在的生成文件路径列表，没有生成记录时返回None
+        """
+        manifest_path = os.path.join(output_dir, JOB_MANIFEST_FILE)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            file_paths = [os.path.join(output_dir, name) for name in data["files"]]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"读取生成记录时出错: {e}")
+            return None
+        return [path for path in file_paths if os.path.isfile(path)]
+
+    def get_temp_root(self):
+        """
+        获取存放转换中间文件的根目录，优先使用内存文件系统
+        :return: 目录路径，为None时使用系统临时目录
+        """
+        try:
+            if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK) \
+                    and shutil.disk_usage(SHM_DIR).free >= SHM_MIN_FREE_SPACE:
+                return SHM_DIR
+        except OSError:
+            pass
+        return None
+
+    def make_pdf_job_dir(self):
+        """
+        新建本次任务私有的PDF临时目录，多个任务同时运行时互不影响
+        :return: 目录路径
+        """
+        return tempfile.mkdtemp(prefix="tiandan_pdf_", dir=self.get_temp_root())
+
+    @contextmanager
+    def pdf_job_dir(self):
+        """
+        在with语句中使用的私有PDF临时目录，结束时连同其中的文件一起删除
+        """
+        pdf_dir = self.make_pdf_job_dir()
+        try:
+            yield pdf_dir
+        finally:
+            shutil.rmtree(pdf_dir, ignore_errors=True)
+
+    def _get_pdf_path(self, file_path, pdf_dir, used_names):
+        """
+        生成PDF文件路径，同一批次中的同名文件（如a.docx和a.xlsx）加序号区分
+        :param file_path: 源文件路径
+        :param pdf_dir: PDF输出目录
+        :param used_names: 本批次已使用的文件名集合
+        :return: PDF文件路径
+        """
+        name, _ = os.path.splitext(os.path.basename(file_path))
+        pdf_name = name
+        index = 1
+        while pdf_name.lower() in used_names:
+            pdf_name = f"{name}_{index}"
+            index += 1
+        used_names.add(pdf_name.lower())
+        return os.path.join(pdf_dir, f"{pdf_name}.pdf")
+
+    def _make_cache_key(self, pool, file_path):
+        """
+        计算文档的缓存键（文档内容哈希加转换引擎版本）
+        :param pool: 转换池
+        :param file_path: 源文件路径
+        :return: 缓存键，未启用缓存或计算出错时为None
+        """
+        if not self.pdf_cache:
+            return None
+        try:
+            return self.pdf_cache.make_key(file_path, pool.version_tag())
+        except Exception as e:
+            print(f"计算文档哈希时出错: {e}")
+            return None
+
+    def _submit_conversion(self, pool, file_path, pdf_file, cache_key=None, status_callback=None):
+        """
+        提交一个转换任务，已缓存的文档直接复制缓存的PDF
+        :param pool: 转换池
+        :param file_path: 源文件路径
+        :param pdf_file: 输出PDF文件路径
+        :param cache_key: 文档的缓存键
         :param status_callback: 状态更新回调函数
-        :return: 生成的PDF文件路径列表
+        :return: (Future对象, 转换完成后保存缓存使用的缓存键)
         """
-        if not PDF_CONVERSION_AVAILABLE:
-            raise Exception("PDF转换功能不可用，请安装docx2pdf库")
+        base_name = os.path.basename(file_path)
         
-        pdf_files = []
-        for docx_path in docx_paths:
-            # 生成PDF文件名
-            base_name = os.path.basename(docx_path)
-            name, _ = os.path.splitext(base_name)
-            pdf_file = os.path.join("docs", f"{name}.pdf")
-            
-            # 确保输出目录存在
-            pdf_dir = os.path.dirname(pdf_file)
-            if not os.path.exists(pdf_dir):
-                os.makedirs(pdf_dir)
-            
-            # 更新进度窗口状态
-            if self.progress_callback:
-                self.progress_callback(base_name, "converting")
-            
-            # 尝试多种方法转换为PDF
-            conversion_success = False
-            
-            # 方法1: 使用win32com.client方法（首选，支持WPS和Office）
-            try:
-                status_msg = f"正在转换: {base_name}"
-                if status_callback:
-                    status_callback(status_msg)
-                print(f"正在尝试使用win32com.client转换: {docx_path}")
-                
-                import win32com.client
-                import pythoncom
-                
-                # 初始化COM线程
-                pythoncom.CoInitialize()
-                
-                # 添加超时机制和更好的资源管理
-                word = None
-                doc = None
-                try:
-                    # 优先尝试WPS
-                    try:
-                        word = win32com.client.Dispatch("KWPS.Application")
-                        print("使用WPS进行转换")
-                    except:
-                        # 如果WPS不可用，尝试使用Microsoft Word
-                        try:
-                            word = win32com.client.Dispatch("Word.Application")
-                            print("使用Microsoft Word进行转换")
-                        except:
-                            raise Exception("未找到可用的Word处理程序（WPS或Microsoft Word）")
-                    
-                    word.Visible = False  # 正确的属性名（大写V）
-                    word.DisplayAlerts = False  # 禁用警告对话框
-                    
-                    # 打开文档（以只读模式）
-                    doc = word.Documents.Open(os.path.abspath(docx_path), ReadOnly=True)
-                    
-                    # 保存为PDF
-                    doc.SaveAs(os.path.abspath(pdf_file), FileFormat=17)  # 17表示PDF格式
-                    
-                    conversion_success = True
-                except Exception as com_error:
-                    error_msg = f"win32com.client转换过程中出错: {str(com_error)}"
-                    print(error_msg)
-                    raise com_error
-                finally:
-                    # 确保正确释放资源
-                    try:
-                        if doc:
-                            doc.Close(SaveChanges=0)  # 0表示不保存更改直接关闭
-                    except:
-                        pass
-                    try:
-                        if word:
-                            word.Quit()
-                    except:
-                        pass
-                    
-                    # 清理COM资源
-                    pythoncom.CoUninitialize()
-                
-                if conversion_success and os.path.exists(pdf_file):
-                    pdf_files.append(pdf_file)
-                    
-                    status_msg = f"已转换为PDF: {name}.pdf"
-                    if status_callback:
-                        status_callback(status_msg)
-                    print(f"已使用win32com.client转换为PDF: {pdf_file}")
-                    
-                    # 更新进度窗口状态
-                    if self.progress_callback:
-                        self.progress_callback(base_name, "completed")
-                else:
-                    raise Exception("win32com.client未能生成PDF文件")
-                
-                conversion_success = True
-            except Exception as e1:
-                error_msg = f"使用win32com.client转换PDF时出错: {str(e1)}"
-                print(error_msg)
-                
-                # 更新进度窗口状态
-                if self.progress_callback:
-                    self.progress_callback(base_name, "failed")
-            
-            # 方法2: 使用docx2pdf库作为备选方案
-            if not conversion_success:
-                try:
-                    status_msg = f"正在转换: {base_name} (docx2pdf)"
-                    if status_callback:
-                        status_callback(status_msg)
-                    print("正在尝试使用docx2pdf转换...")
-                    
-                    convert(docx_path, pdf_file)
-                    pdf_files.append(pdf_file)
-                    
-                    status_msg = f"已转换为PDF: {name}.pdf"
-                    if status_callback:
-                        status_callback(status_msg)
-                    print(f"已转换为PDF: {pdf_file}")
-                    
-                    # 更新进度窗口状态
-                    if self.progress_callback:
-                        self.progress_callback(base_name, "completed")
-                    
-                    conversion_success = True
-                except Exception as e2:
-                    error_msg = f"使用docx2pdf转换时出错: {str(e2)}"
-                    print(error_msg)
-                    
-                    # 更新进度窗口状态
-                    if self.progress_callback:
-                        self.progress_callback(base_name, "failed")
-            
-            # 如果所有方法都失败了，抛出异常
-            if not conversion_success:
-                raise Exception("所有PDF转换方法都失败了，请检查系统配置")
+        if cache_key and self.pdf_cache.fetch(cache_key, pdf_file):
+            self._on_conversion_started(base_name, status_callback)
+            future = Future()
+            future.set_result("PDF缓存")
+            cache_key = None  # 已在缓存中，无需再次保存
+        else:
+            future = pool.submit(file_path, pdf_file,
+                                 start_callback=lambda: self._on_conversion_started(base_name, status_callback))
+        future.add_done_callback(lambda f: self._on_conversion_finished(f, base_name, pdf_file, status_callback))
+        return future, cache_key
+
+    def _wait_conversion(self, future, pdf_file, cache_key=None):
+        """
+        等待转换任务完成，转换失败时抛出异常
+        :param future: 转换任务的Future对象
+        :param pdf_file: 输出PDF文件路径
+        :param cache_key: 缓存键，不为空时将新的转换结果保存到缓存
+        """
+        future.result()
+        if cache_key:
+            self.pdf_cache.store(cache_key, pdf_file)
+
+    def generate_and_merge_pdf(self, template_files, user_inputs, output_dir, merged_pdf_path, status_callback=None,
+                               merge_result=None):
+        """
+        以流水线方式生成文档并合并为PDF：每个文档生成后立即提交转换，
+        合并线程按模板顺序依次追加转换完成的PDF，生成、转换、合并三个阶段同时进行
+        :param template_files: 模板文件列表
+        :param user_inputs: 用户输入字典
+        :param output_dir: 输出目录
+        :param merged_pdf_path: 合并后的PDF文件路径
+        :param status_callback: 状态更新回调函数
+        :param merge_result: 保存合并统计信息的字典，见merge_documents_to_pdf
+        :return: 生成的文件路径列表
+        """
+        return self._run_merge_pipeline(
+            lambda add_file: self.process_templates(template_files, user_inputs, output_dir, file_callback=add_file),
+            merged_pdf_path, status_callback, merge_result)
+
+    def merge_documents_to_pdf(self, file_paths, merged_pdf_path, status_callback=None):
+        """
+        将Word/Excel文档按顺序转换并合并为PDF
+        与上次合并相比内容未变化的文档直接复用上次合并文档中的页面，只转换有变化的文档
+        :param file_paths: 文档路径列表（合并顺序）
+        :param merged_pdf_path: 合并后的PDF文件路径
+        :param status_callback: 状态更新回调函数
+        :return: 合并统计信息字典（pages: 总页数, reused: 复用的文档数, peak_memory: 进程内存峰值（字节））
+        """
+        def add_files(add_file):
+            for file_path in file_paths:
+                add_file(file_path)
         
-        return pdf_files
+        merge_result = {}
+        self._run_merge_pipeline(add_files, merged_pdf_path, status_callback, merge_result)
+        return merge_result
 
-    def convert_xlsx_to_pdf(self, xlsx_paths, status_callback=None):
+    def _run_merge_pipeline(self, produce, merged_pdf_path, status_callback=None, merge_result=None):
         """
-        将Excel文件转换为PDF
-        :param xlsx_paths: Excel文件路径列表
+        运行转换合并流水线：produce每得到一个文档就调用传入的add_file提交转换，
+        合并线程按提交顺序依次追加转换完成的PDF
+        :param produce: 按合并顺序产生文档的函数，参数为add_file(file_path)
+        :param merged_pdf_path: 合并后的PDF文件路径
         :param status_callback: 状态更新回调函数
-        :return: 生成的PDF文件路径列表
+        :param merge_result: 保存合并统计信息的字典
+        :return: produce的返回值
         """
-        if not PDF_CONVERSION_AVAILABLE:
-            raise Exception("PDF转换功能不可用，请安装docx2pdf库")
+        if not PDF_CONVERSION_AVAILABLE or not PDF_MERGING_AVAILABLE:
+            raise Exception("PDF转换或合并功能不可用，请安装相关依赖库")
         
-        pdf_files = []
-        for xlsx_path in xlsx_paths:
-            # 生成PDF文件名
-            base_name = os.path.basename(xlsx_path)
-            name, _ = os.path.splitext(base_name)
-            pdf_file = os.path.join("docs", f"{name}.pdf")
-            
-            # 确保输出目录存在
-            pdf_dir = os.path.dirname(pdf_file)
-            if not os.path.exists(pdf_dir):
-                os.makedirs(pdf_dir)
-            
-            # 更新进度窗口状态
-            if self.progress_callback:
-                self.progress_callback(base_name, "converting")
-            
-            # 尝试多种方法转换为PDF
-            conversion_success = False
-            
-            # 方法1: 使用win32com.client方法（首选，支持WPS和Office）
-            try:
-                status_msg = f"正在转换: {base_name}"
-                if status_callback:
-                    status_callback(status_msg)
-                print(f"正在尝试使用win32com.client转换Excel: {xlsx_path}")
-                
-                import win32com.client
-                import pythoncom
+        # 单个PDF保存在本次任务私有的临时目录中，合并结束后自动删除
+        with self.pdf_job_dir() as pdf_dir:
+            return self._merge_pipeline(produce, merged_pdf_path, pdf_dir, status_callback,
+                                        {} if merge_result is None else merge_result)
+
+    def _merge_pipeline(self, produce, merged_pdf_path, pdf_dir, status_callback, merge_result):
+        """
+        流水线的生成和转换阶段，见_run_merge_pipeline
+        """
+        pool = self.get_converter_pool()
+        
+        # 上次合并的记录：内容未变化的文档直接复用上次合并文档中的页面
+        manifest = MergeManifest(os.path.dirname(merged_pdf_path) or ".")
+        reusable = manifest.load()
+        
+        pending = queue.Queue()  # 按生成顺序排列的转换任务，None表示没有更多任务
+        aborted = threading.Event()  # 任一阶段出错时设置，其他阶段随之停止
+        merge_thread = threading.Thread(target=self._pipeline_merge_thread,
+                                        args=(pending, merged_pdf_path, merge_result, aborted,
+                                              status_callback, manifest))
+        merge_thread.daemon = True
+        merge_thread.start()
+        
+        used_names = set()
+        
+        def add_file(file_path):
+            # 合并阶段已出错时停止生成
+            if aborted.is_set():
+                raise merge_result.get("error") or Exception("PDF合并已中止")
+            ext = os.path.splitext(file_path)[1].lower()
+            if ext not in (".docx", ".xlsx", ".pdf"):
+                return
+            # 合并文档中以源文档文件名作为书签
+            title = os.path.splitext(os.path.basename(file_path))[0]
+            if ext == ".pdf":
+                # PDF表单模板生成的文件已是PDF，直接合并
+                future = Future()
+                future.set_result("PDF表单")
+                if self.progress_callback:
+                    self.progress_callback(os.path.basename(file_path), "completed")
+                pending.put({"future": future, "pdf_file": file_path, "store_key": None,
+                             "cache_key": None, "title": title})
+                return
+            cache_key = self._make_cache_key(pool, file_path)
+            if cache_key in reusable:
+                self._on_pages_reused(os.path.basename(file_path), status_callback)
+                pending.put({"future": None, "cache_key": cache_key, "reuse": reusable[cache_key], "title": title})
+                return
+            pdf_file = self._get_pdf_path(file_path, pdf_dir, used_names)
+            future, store_key = self._submit_conversion(pool, file_path, pdf_file, cache_key, status_callback)
+            pending.put({"future": future, "pdf_file": pdf_file, "store_key": store_key,
+                         "cache_key": cache_key, "title": title})
+        
+        try:
+            result = produce(add_file)
+        except Exception:
+            aborted.set()
+            raise
+        finally:
+            pending.put(None)
+            merge_thread.join()
+        
+        if "error" in merge_result:
+            raise merge_result["error"]
+        return result
+
+    def _pipeline_merge_thread(self, pending, merged_pdf_path, merge_result, aborted, status_callback=None,
+                               manifest=None):
+        """
+        流水线的合并阶段：按顺序等待各个转换任务，转换完成后立即追加到合并文档；
+        复用的文档从上次的合并文档中复制对应页面。合并成功后更新合并记录
+        :param pending: 转换任务队列，元素为任务字典（future, pdf_file, store_key: 保存缓存的键, cache_key, title: 书签标题），
+                        复用页面时future为None，reuse为(起始页序号, 页数)
+        :param merged_pdf_path: 合并后的PDF文件路径
+        :param merge_result: 保存合并结果（pages: 总页数, reused: 复用的文档数, peak_memory: 进程内存峰值（字节））
+                             或异常（error）的字典
+        :param aborted: 中止标志
+        :param status_callback: 状态更新回调函数
+        :param manifest: 合并记录
+        """
+        # 确保输出目录存在
+        output_dir = os.path.dirname(merged_pdf_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        
+        writer = None
+        previous_file = None  # 上次的合并文档，第一次复用页面时打开
+        previous_reader = None
+        entries = []  # 按顺序排列的(缓存键, 页数)
+        reused = 0
+        # 先写入临时文件，新文件名与上次的合并文档相同时也可以边读边写
+        temp_path = merged_pdf_path + ".tmp"
+        try:
+            # 流式写入合并文档，每个PDF追加后立即释放；文档很多时分组写入，关闭时逐级合并
+            writer = GroupedPdfWriter(temp_path, status_callback=status_callback)
+            while True:
+                job = pending.get()
+                if job is None:
+                    break
+                if aborted.is_set():
+                    if job["future"] is not None:
+                        job["future"].cancel()
+                    continue
                 
-                # 初始化COM线程
-                pythoncom.CoInitialize()
+                if job["future"] is None:
+                    start, count = job["reuse"]
+                    if previous_reader is None:
+                        previous_file = open(manifest.merged_pdf_path, "rb")
+                        previous_reader = PdfReader(previous_file)
+                    pages = writer.append(previous_reader, range(start, start + count), title=job["title"])
+                    entries.append((job["cache_key"], pages))
+                    reused += 1
+                    continue
                 
-                # 添加更好的资源管理
-                excel = None
-                workbook = None
+                pdf_file = job["pdf_file"]
                 try:
-                    # 优先尝试WPS
-                    try:
-                        excel = win32com.client.Dispatch("KET.Application")
-                        print("使用WPS表格进行转换")
-                    except:
-                        # 如果WPS不可用，尝试使用Microsoft Excel
-                        try:
-                            excel = win32com.client.Dispatch("Excel.Application")
-                            print("使用Microsoft Excel进行转换")
-                        except:
-                            raise Exception("未找到可用的Excel处理程序（WPS表格或Microsoft Excel）")
-                    
-                    excel.Visible = False  # 正确的属性名（大写V）
-                    excel.DisplayAlerts = False  # 禁用警告对话框
-                    
-                    # 打开工作簿（以只读模式）
-                    workbook = excel.Workbooks.Open(os.path.abspath(xlsx_path), ReadOnly=True)
-                    
-                    # 导出为PDF
-                    workbook.ExportAsFixedFormat(0, os.path.abspath(pdf_file))  # 0表示PDF格式
-                    
-                    conversion_success = True
-                except Exception as com_error:
-                    error_msg = f"win32com.client转换Excel过程中出错: {str(com_error)}"
-                    print(error_msg)
-                    raise com_error
-                finally:
-                    # 确保正确释放资源
-                    try:
-                        if workbook:
-                            workbook.Close(SaveChanges=0)  # 0表示不保存更改直接关闭
-                    except:
-                        pass
-                    try:
-                        if excel:
-                            excel.Quit()
-                    except:
-                        pass
-                    
-                    # 清理COM资源
-                    pythoncom.CoUninitialize()
-                
-                if conversion_success and os.path.exists(pdf_file):
-                    pdf_files.append(pdf_file)
-                    
-                    status_msg = f"已转换为PDF: {name}.pdf"
-                    if status_callback:
-                        status_callback(status_msg)
-                    print(f"已使用win32com.client转换Excel为PDF: {pdf_file}")
-                    
-                    # 更新进度窗口状态
-                    if self.progress_callback:
-                        self.progress_callback(base_name, "completed")
-                else:
-                    raise Exception("win32com.client未能生成PDF文件")
-                
-                conversion_success = True
-            except Exception as e1:
-                error_msg = f"使用win32com.client转换Excel为PDF时出错: {str(e1)}"
-                print(error_msg)
-                
-                # 更新进度窗口状态
-                if self.progress_callback:
-                    self.progress_callback(base_name, "failed")
+                    self._wait_conversion(job["future"], pdf_file, job["store_key"])
+                except Exception as e:
+                    raise Exception(f"转换 {job['title']} 失败: {e}") from e
+                pages = writer.append(pdf_file, title=job["title"])
+                entries.append((job["cache_key"], pages))
+                print(f"已追加到合并文档: {pdf_file}")
             
-            # 方法2: 使用docx2pdf库作为备选方案
-            if not conversion_success:
-                try:
-                    status_msg = f"正在转换: {base_name} (docx2pdf)"
-                    if status_callback:
-                        status_callback(status_msg)
-                    print("正在尝试使用docx2pdf转换Excel...")
-                    
-                    convert(xlsx_path, pdf_file)
-                    pdf_files.append(pdf_file)
-                    
-                    status_msg = f"已转换为PDF: {name}.pdf"
-                    if status_callback:
-                        status_callback(status_msg)
-                    print(f"已使用docx2pdf转换Excel为PDF: {pdf_file}")
-                    
-                    # 更新进度窗口状态
-                    if self.progress_callback:
-                        self.progress_callback(base_name, "completed")
-                    
-                    conversion_success = True
-                except Exception as e2:
-                    error_msg = f"使用docx2pdf转换Excel为PDF时出错: {str(e2)}"
-                    print(error_msg)
-                    
-                    # 更新进度窗口状态
-                    if self.progress_callback:
-                        self.progress_callback(base_name, "failed")
+            if aborted.is_set():
+                writer.abort()
+                return
             
-            # 如果所有方法都失败了，抛出异常
-            if not conversion_success:
-                raise Exception("所有PDF转换方法都失败了，请检查系统配置")
+            writer.close()
+            if previous_file is not None:
+                previous_file.close()
+            os.replace(temp_path, merged_pdf_path)
+            if manifest is not None:
+                manifest.save(merged_pdf_path, entries)
+            merge_result["pages"] = writer.page_count
+            merge_result["reused"] = reused
+            # 合并结束后读取进程的内存峰值（不使用tracemalloc，避免拖慢界面进程）
+            merge_result["peak_memory"] = peak_memory_usage()
+            memory_info = format_peak_memory(merge_result["peak_memory"])
+            
+            status_msg = f"已合并PDF: {os.path.basename(merged_pdf_path)}{memory_info}"
+            if status_callback:
+                status_callback(status_msg)
+            print(f"已合并PDF: {merged_pdf_path}（共{writer.page_count}页，复用{reused}个未变化的文档）{memory_info}")
+        except Exception as e:
+            print(f"合并PDF时出错: {str(e)}")
+            merge_result["error"] = e
+            aborted.set()
+            if writer is not None:
+                writer.abort()
+            # 取消剩余的转换任务，直到生成阶段结束
+            while True:
+                job = pending.get()
+                if job is None:
+                    break
+                if job["future"] is not None:
+                    job["future"].cancel()
+        finally:
+            if previous_file is not None:
+                previous_file.close()
+
+    def _on_pages_reused(self, base_name, status_callback=None):
+        """
+        文档内容未变化、直接复用上次合并文档中的页面时调用
+        """
+        # 更新进度窗口状态
+        if self.progress_callback:
+            self.progress_callback(base_name, "completed")
         
-        return pdf_files
+        status_msg = f"内容未变化，复用上次的PDF: {base_name}"
+        if status_callback:
+            status_callback(status_msg)
+        print(f"内容未变化，复用上次合并文档中的页面: {base_name}")
 
-    def cleanup_single_pdfs(self, pdf_paths, status_callback=None):
+    def _on_conversion_started(self, base_name, status_callback=None):
         """
-        清理单个PDF文件
-        :param pdf_paths: 要删除的PDF文件路径列表
-        :param status_callback: 状态更新回调函数
+        转换池开始转换某个文件时调用（在转换线程中执行）
         """
-        for pdf_path in pdf_paths:
-            try:
-                if os.path.exists(pdf_path):
-                    os.remove(pdf_path)
-                    status_msg = f"已删除临时文件: {os.path.basename(pdf_path)}"
-                    if status_callback:
-                        status_callback(status_msg)
-                    print(f"已删除临时文件: {pdf_path}")
-            except Exception as e:
-                error_msg = f"删除文件 {os.path.basename(pdf_path)} 时出错: {str(e)}"
-                if status_callback:
-                    status_callback(error_msg)
-                print(f"删除文件 {pdf_path} 时出错: {str(e)}")
+        # 更新进度窗口状态
+        if self.progress_callback:
+            self.progress_callback(base_name, "converting")
+        
+        status_msg = f"正在转换: {base_name}"
+        if status_callback:
+            status_callback(status_msg)
+
+    def _on_conversion_finished(self, future, base_name, pdf_file, status_callback=None):
+        """
+        某个文件转换结束时调用（在转换线程中执行）
+        """
+        if future.cancelled():
+            return
+        
+        if future.exception() is not None:
+            # 更新进度窗口状态
+            if self.progress_callback:
+                self.progress_callback(base_name, "failed")
+            return
+        
+        status_msg = f"已转换为PDF: {os.path.basename(pdf_file)}"
+        if status_callback:
+            status_callback(status_msg)
+        print(f"已使用{future.result()}转换为PDF: {pdf_file}")
+        
+        # 更新进度窗口状态
+        if self.progress_callback:
+            self.progress_callback(base_name, "completed")
 
-    def merge_pdfs(self, pdf_paths, output_path, status_callback=None):
+    def merge_docx(self, docx_paths, output_path, status_callback=None):
         """
-        合并多个PDF文件
-        :param pdf_paths: PDF文件路径列表
+        将多个Word文档直接拼接为一个Word文档，不需要转换为PDF
+        :param docx_paths: Word文档路径列表
         :param output_path: 输出文件路径
         :param status_callback: 状态更新回调函数
+        :return: 合并的文档数量
         """
-        if not PDF_MERGING_AVAILABLE:
-            raise Exception("PDF合并功能不可用，请安装PyPDF2库")
-        
         try:
-            merger = PdfMerger()
-            
-            for pdf_path in pdf_paths:
-                try:
-                    # 检查文件是否存在
-                    if not os.path.exists(pdf_path):
-                        raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
-                    
-                    merger.append(pdf_path)
-                except Exception as e:
-                    error_msg = f"添加PDF文件 {os.path.basename(pdf_path)} 时出错: {str(e)}"
-                    if status_callback:
-                        status_callback(error_msg)
-                    print(f"添加PDF文件 {pdf_path} 时出错: {str(e)}")
-                    raise e
-            
             # 确保输出目录存在
             output_dir = os.path.dirname(output_path)
-            if not os.path.exists(output_dir):
+            if output_dir and not os.path.exists(output_dir):
                 os.makedirs(output_dir)
             
-            # 合并PDF文件
-            merger.write(output_path)
-            merger.close()
+            count = merge_docx_files(docx_paths, output_path, status_callback=status_callback)
             
-            status_msg = f"已合并PDF: {os.path.basename(output_path)}"
+            status_msg = f"已合并Word文档: {os.path.basename(output_path)}"
             if status_callback:
                 status_callback(status_msg)
-            print(f"已合并PDF: {output_path}")
+            print(f"已合并Word文档: {output_path}（共{count}个文档）")
+            return count
             
         except Exception as e:
-            error_msg = f"合并PDF时出错: {str(e)}"
+            error_msg = f"合并Word文档时出错: {str(e)}"
             if status_callback:
                 status_callback(error_msg)
-            print(f"合并PDF时出错: {str(e)}")
+            print(f"合并Word文档时出错: {str(e)}")
             raise e
 
+    def get_legacy_target_path(self, file_path, reserved=()):
+        """
+        获取旧格式文件另存为新格式后的文件路径（与源文件同名，扩展名为.docx或.xlsx）
+        :param file_path: 旧格式文件路径
+        :param reserved: 已被其他文件使用的输出路径，重名时添加序号（如a.doc和a.wps）
+        :return: 输出文件路径
+        """
+        base_name, ext = os.path.splitext(file_path)
+        target_ext = LEGACY_FORMATS[ext.lower()]
+        target_path = base_name + target_ext
+        counter = 1
+        while os.path.normcase(target_path) in reserved:
+            target_path = f"{base_name}_{counter}{target_ext}"
+            counter += 1
+        return target_path
+
+    def convert_legacy_files(self, file_paths, folder_path, status_callback=None, force=False, file_stats=None):
+        """
+        将旧格式文件（.wps、.wpt、.doc、.et、.xls）另存为.docx或.xlsx：
+        所有文件一次提交到转换池，由各工作线程同时转换，每个文件完成时更新状态；
+        转换记录保存在文件夹中，源文件未变化且生成的文件未被修改时跳过该文件；
+        每个文件的转换状态立即写入转换日志，上次转换中途退出时从未完成的文件继续
+        :param file_paths: 旧格式文件路径列表
+        :param folder_path: 转换的文件夹，转换记录和转换日志保存在其中
+        :param status_callback: 状态更新回调函数
+        :param force: 是否忽略转换记录，重新转换所有文件
+        :param file_stats: 扫描文件夹时已获取的文件信息 {源文件路径: (大小, 修改时间纳秒)}，避免重复读取
+        :return: 源文件路径 -> {"target": 输出文件路径, "error": 错误信息, "skipped": 是否因已是最新而跳过}，
+                 转换成功的文件错误信息为None
+        """
+        manifest = ConversionManifest(folder_path).load()
+        journal = ConversionJournal(folder_path).load()
+        if journal.entries and not force and status_callback:
+            status_callback(f"继续上次未完成的转换（已完成{journal.count('done', 'cleaned')}个文件）")
+        file_stats = file_stats or {}
+        pool = None
+        
+        reserved = set()
+        outcomes = {}
+        futures = []
+        for file_path in file_paths:
+            target_path = self.get_legacy_target_path(file_path, reserved)
+            reserved.add(os.path.normcase(target_path))
+            base_name = os.path.basename(file_path)
+            try:
+                source_stat = file_stats.get(file_path)
+                if source_stat is None:
+                    stat = os.stat(file_path)
+                    source_stat = (stat.st_size, stat.st_mtime_ns)
+                if not force and journal.is_done(file_path, target_path, source_stat):
+                    # 上次转换中已完成，但未来得及保存转换记录
+                    manifest.record(file_path, target_path, source_stat)
+                    outcomes[file_path] = {"target": target_path, "error": None, "skipped": True}
+                    if status_callback:
+                        status_callback(f"上次已转换，跳过: {base_name}")
+                    continue
+                if not force and manifest.is_current(file_path, target_path, source_stat):
+                    outcomes[file_path] = {"target": target_path, "error": None, "skipped": True}
+                    if status_callback:
+                        status_callback(f"已是最新，跳过: {base_name}")
+                    continue
+            except Exception as e:
+                print(f"检查转换记录时出错: {e}")
+            
+            if pool is None:
+                pool = self.get_converter_pool()
+                if status_callback:
+                    status_callback(f"开始转换WPS/ET/XLS/DOC文件（{pool.size}个文件同时转换）...")
+            journal.mark(file_path, "pending", target=relative_path(folder_path, target_path))
+            future = pool.submit(file_path, target_path,
+                                 start_callback=lambda name=base_name: self._on_conversion_started(name, status_callback))
+            future.add_done_callback(
+                lambda f, path=file_path, target=target_path, stat=source_stat:
+                self._on_legacy_converted(f, path, target, journal, stat, status_callback))
+            futures.append((file_path, target_path, source_stat, future))
+        
+        for file_path, target_path, source_stat, future in futures:
+            try:
+                future.result()
+                outcomes[file_path] = {"target": target_path, "error": None, "skipped": False}
+                manifest.record(file_path, target_path, source_stat)
+            except Exception as e:
+                outcomes[file_path] = {"target": target_path, "error": str(e), "skipped": False}
+        manifest.save()
+        
+        # 没有需要清理的源文件时本次转换已全部完成
+        if not any(outcome["error"] is None for outcome in outcomes.values()):
+            journal.remove()
+        return outcomes
+
+    def _on_legacy_converted(self, future, file_path, target_path, journal, source_stat, status_callback=None):
+        """
+        某个旧格式文件转换结束时调用（在转换线程中执行），转换结果立即写入转换日志
+        """
+        if future.cancelled():
+            return
+        
+        base_name = os.path.basename(file_path)
+        if future.exception() is not None:
+            journal.mark(file_path, "failed", error=str(future.exception()))
+            status_msg = f"转换失败 {base_name}: {future.exception()}"
+        else:
+            size, mtime = source_stat or (None, None)
+            journal.mark(file_path, "done", size=size, mtime=mtime)
+            status_msg = f"已转换: {base_name} -> {os.path.basename(target_path)}"
+            print(f"已使用{future.result()}转换: {target_path}")
+        if status_callback:
+            status_callback(status_msg)
+
+    def cleanup_legacy_sources(self, folder_path, file_paths, delete=False, status_callback=None):
+        """
+        删除已确认转换成功的源文件，或移动到所在文件夹中的"源文件"文件夹；
+        每个文件处理后写入转换日志，全部处理完成后删除转换日志
+        :param folder_path: 转换的文件夹
+        :param file_paths: 转换成功的源文件路径列表
+        :param delete: 是否删除源文件，否则移动到"源文件"文件夹
+        :param status_callback: 状态更新回调函数
+        :return: 处理成功的文件数量
+        """
+        journal = ConversionJournal(folder_path).load()
+        cleaned_count = 0
+        for file_path in file_paths:
+            filename = os.path.basename(file_path)
+            try:
+                if delete:
+                    os.remove(file_path)
+                    status_msg = f"已删除源文件: {filename}"
+                else:
+                    source_folder = os.path.join(os.path.dirname(file_path), "源文件")
+                    if not os.path.exists(source_folder):
+                        os.makedirs(source_folder)
+                    
+                    destination = os.path.join(source_folder, filename)
+                    # 如果目标文件已存在，添加序号
+                    counter = 1
+                    base_name, ext = os.path.splitext(filename)
+                    while os.path.exists(destination):
+                        new_filename = f"{base_name}_{counter}{ext}"
+                        destination = os.path.join(source_folder, new_filename)
+                        counter += 1
+                    
+                    os.rename(file_path, destination)
+                    status_msg = f"已移动源文件到\"源文件\"文件夹: {filename}"
+                journal.mark(file_path, "cleaned")
+                cleaned_count += 1
+            except Exception as e:
+                status_msg = f"{'删除' if delete else '移动'}源文件 {filename} 失败: {str(e)}"
+                print(status_msg)
+            if status_callback:
+                status_callback(status_msg)
+        
+        # 处理失败的源文件再次转换时会因转换结果已是最新而直接跳过，不需要保留日志
+        journal.remove()
+        return cleaned_count
+
 
 class DocumentProcessorUI:
     def __init__(self, root):
@@ -624,11 +985,18 @@ class DocumentProcessorUI:
        
         self.processor = DocumentProcessor()
         self.template_files = []
+        self.generated_files = []  # 最近一次生成的文档（按模板顺序）
         self.placeholders = set()
         self.placeholder_files = {}  # 存储占位符和文件的映射关系
         self.ordered_placeholders = []  # 存储有序的占位符列表
         self.current_scheme = None  # 当前选择的方案
+        self.history_hashes = []  # 历史记录下拉框各项对应的记录哈希（与下拉框选项顺序一致）
+        self.config_input_rows = []  # 配置方案界面的占位符行（与ordered_placeholders顺序一致）
+        self.config_last_inputs = {}  # 配置方案界面中下拉框预览显示的上次输入
+        self.data_store = AppDataStore()  # 应用数据存储（全局配置和方案分片）
         self.output_dir = self.load_last_output_dir()  # 输出目录，默认从配置加载
+        self.processor.set_converter_backend(self.load_converter_backend())  # PDF转换引擎，从配置加载
+        self.processor.set_converter_workers(self.load_converter_workers())  # 并行转换数，从配置加载
         
         self.setup_ui()
 
@@ -714,12 +1082,7 @@ class DocumentProcessorUI:
         :return: 上次使用的输出目录路径
         """
         try:
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return data.get("config", {}).get("last_output_dir", "docs")
-            else:
-                return "docs"
+            return self.data_store.get_config("last_output_dir", "docs")
         except Exception as e:
             print(f"加载配置文件时出错: {e}")
             return "docs"
@@ -730,12 +1093,7 @@ class DocumentProcessorUI:
         :return: 上次使用的模板目录路径
         """
         try:
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return data.get("config", {}).get("last_template_dir", "docs")
-            else:
-                return "docs"
+            return self.data_store.get_config("last_template_dir", "docs")
         except Exception as e:
             print(f"加载配置文件时出错: {e}")
             return "docs"
@@ -746,22 +1104,7 @@ class DocumentProcessorUI:
         :param output_dir: 输出目录
         """
         try:
-            # 读取现有配置
-            config = {}
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    config = json.load(f)
-            
-            # 确保config键存在
-            if "config" not in config:
-                config["config"] = {}
-            
-            # 更新输出目录
-            config["config"]["last_output_dir"] = output_dir
-            
-            # 保存配置
-            with open("app_data.json", "w", encoding="utf-8") as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+            self.data_store.set_config("last_output_dir", output_dir)
         except Exception as e:
             print(f"保存配置文件时出错: {e}")
 
@@ -771,22 +1114,49 @@ class DocumentProcessorUI:
         :param template_dir: 模板目录路径
         """
         try:
-            # 读取现有配置
-            config = {}
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    config = json.load(f)
-            
-            # 确保config键存在
-            if "config" not in config:
-                config["config"] = {}
-            
-            # 更新模板目录
-            config["config"]["last_template_dir"] = template_dir
-            
-            # 保存配置
-            with open("app_data.json", "w", encoding="utf-8") as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+            self.data_store.set_config("last_template_dir", template_dir)
+        except Exception as e:
+            print(f"保存配置文件时出错: {e}")
+
+    def load_converter_backend(self):
+        """
+        加载配置的PDF转换引擎
+        :return: 引擎名称，auto表示自动选择
+        """
+        try:
+            return self.data_store.get_config("pdf_converter", "auto")
+        except Exception as e:
+            print(f"加载配置文件时出错: {e}")
+            return "auto"
+
+    def save_converter_backend(self, backend_name):
+        """
+        保存PDF转换引擎到配置文件
+        :param backend_name: 引擎名称
+        """
+        try:
+            self.data_store.set_config("pdf_converter", backend_name)
+        except Exception as e:
+            print(f"保存配置文件时出错: {e}")
+
+    def load_converter_workers(self):
+        """
+        加载配置的并行转换数
+        :return: 并行转换数，0表示自动设置
+        """
+        try:
+            return int(self.data_store.get_config("pdf_workers", 0) or 0)
+        except Exception as e:
+            print(f"加载配置文件时出错: {e}")
+            return 0
+
+    def save_converter_workers(self, workers):
+        """
+        保存并行转换数到配置文件
+        :param workers: 并行转换数，0表示自动设置
+        """
+        try:
+            self.data_store.set_config("pdf_workers", workers)
         except Exception as e:
             print(f"保存配置文件时出错: {e}")
 
@@ -797,12 +1167,7 @@ class DocumentProcessorUI:
         :return: 配置字典
         """
         try:
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return data.get("placeholder_configs", {}).get(placeholder, {})
-            else:
-                return {}
+            return self.data_store.get_placeholder_config(placeholder)
         except Exception as e:
             print(f"加载占位符配置时出错: {e}")
             return {}
@@ -814,22 +1179,7 @@ class DocumentProcessorUI:
         :param config: 配置字典
         """
         try:
-            # 读取现有配置
-            main_config = {}
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    main_config = json.load(f)
-            
-            # 确保placeholder_configs键存在
-            if "placeholder_configs" not in main_config:
-                main_config["placeholder_configs"] = {}
-            
-            # 保存当前占位符配置
-            main_config["placeholder_configs"][placeholder] = config
-            
-            # 保存配置
-            with open("app_data.json", "w", encoding="utf-8") as f:
-                json.dump(main_config, f, ensure_ascii=False, indent=2)
+            self.data_store.set_placeholder_config(placeholder, config)
         except Exception as e:
             print(f"保存占位符配置时出错: {e}")
 
@@ -840,40 +1190,19 @@ class DocumentProcessorUI:
         :return: 用户输入字典
         """
         try:
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    return data.get("user_inputs", {}).get(scheme_name, {})
-            else:
-                return {}
+            return self.data_store.get_user_inputs(scheme_name)
         except Exception as e:
             print(f"加载用户输入时出错: {e}")
             return {}
 
     def save_user_inputs_for_scheme(self, scheme_name, user_inputs):
         """
-        保存指定方案的用户输入
+        保存指定方案的用户输入（只写入该方案的分片文件）
         :param scheme_name: 方案名称
         :param user_inputs: 用户输入字典
         """
         try:
-            # 读取现有配置
-            config = {}
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    config = json.load(f)
-            
-            # 确保user_inputs键存在
-            if "user_inputs" not in config:
-                config["user_inputs"] = {}
-            
-            # 保存当前方案的用户输入（之前会排除日期字段，现在不再排除）
-            # 修复：删除无用的filtered_inputs变量，直接使用user_inputs
-            config["user_inputs"][scheme_name] = user_inputs
-            
-            # 保存配置
-            with open("app_data.json", "w", encoding="utf-8") as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+            self.data_store.save_user_inputs(scheme_name, user_inputs)
         except Exception as e:
             print(f"保存用户输入时出错: {e}")
 
@@ -1001,6 +1330,10 @@ class DocumentProcessorUI:
         # 转换格式为docx/xlsx
         self.convert_button = ttk.Button(doc_button_frame, text="转换为docx/xlsx", command=self.convert_wps_to_docx, state=tk.DISABLED)
         self.convert_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # 勾选时忽略转换记录，重新转换所有文件
+        self.force_convert_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(doc_button_frame, text="强制重新转换", variable=self.force_convert_var).pack(side=tk.LEFT, padx=(5, 0))
 
         # 打开模板文件夹
         self.open_folder_button = ttk.Button(doc_button_frame, text="打开文档目录", command=self.open_selected_folder, state=tk.DISABLED)
@@ -1036,6 +1369,38 @@ class DocumentProcessorUI:
         options_frame.columnconfigure(0, weight=1)
         options_frame.rowconfigure(0, weight=1)
         
+        # PDF转换区域
+        converter_frame = ttk.LabelFrame(options_frame, text="PDF转换", padding="10")
+        converter_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 20))
+        
+        ttk.Label(converter_frame, text="转换引擎:").grid(row=0, column=0, padx=(0, 10), pady=5, sticky=tk.W)
+        
+        # 引擎名称和显示名称的对应关系
+        self.converter_display_names = {"auto": "自动选择"}
+        self.converter_display_names.update({name: backend.display_name for name, backend in CONVERTER_BACKENDS.items()})
+        
+        self.converter_combobox = ttk.Combobox(converter_frame, state="readonly", width=20,
+                                               values=list(self.converter_display_names.values()))
+        self.converter_combobox.grid(row=0, column=1, pady=5, sticky=tk.W)
+        self.converter_combobox.set(self.converter_display_names.get(self.processor.converter_backend, "自动选择"))
+        self.converter_combobox.bind("<<ComboboxSelected>>", self.on_converter_selected)
+        
+        ttk.Label(converter_frame, text="Linux下请选择LibreOffice").grid(row=0, column=2, padx=(10, 0), pady=5, sticky=tk.W)
+        
+        ttk.Label(converter_frame, text="并行转换数:").grid(row=1, column=0, padx=(0, 10), pady=5, sticky=tk.W)
+        
+        worker_values = ["自动"] + [str(i) for i in range(1, (os.cpu_count() or 1) + 1)]
+        self.converter_workers_combobox = ttk.Combobox(converter_frame, state="readonly", width=20, values=worker_values)
+        self.converter_workers_combobox.grid(row=1, column=1, pady=5, sticky=tk.W)
+        self.converter_workers_combobox.set(str(self.processor.converter_workers) if self.processor.converter_workers else "自动")
+        self.converter_workers_combobox.bind("<<ComboboxSelected>>", self.on_converter_workers_selected)
+        
+        ttk.Label(converter_frame, text="WPS/Office建议使用1").grid(row=1, column=2, padx=(10, 0), pady=5, sticky=tk.W)
+        
+        # 清空PDF转换缓存按钮
+        ttk.Button(converter_frame, text="清空转换缓存", command=self.clear_pdf_cache).grid(row=2, column=0, pady=5, sticky=tk.W)
+        ttk.Label(converter_frame, text="内容未变化的文档直接使用上次的转换结果").grid(row=2, column=1, columnspan=2, pady=5, sticky=tk.W)
+        
         # 检查更新区域
         update_frame = ttk.LabelFrame(options_frame, text="软件更新", padding="10")
         update_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 20))
@@ -1154,6 +1519,38 @@ class DocumentProcessorUI:
         spacer_frame = ttk.Frame(options_frame)
         spacer_frame.grid(row=5, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
 
+    def on_converter_selected(self, event=None):
+        """
+        选择PDF转换引擎时保存配置
+        """
+        selected = self.converter_combobox.get()
+        for name, display_name in self.converter_display_names.items():
+            if display_name == selected:
+                self.processor.set_converter_backend(name)
+                self.save_converter_backend(name)
+                self.log_and_status(f"PDF转换引擎已设置为: {display_name}")
+                break
+
+    def on_converter_workers_selected(self, event=None):
+        """
+        并行转换数选择事件处理
+        """
+        selected = self.converter_workers_combobox.get()
+        workers = 0 if selected == "自动" else int(selected)
+        self.processor.set_converter_workers(workers)
+        self.save_converter_workers(workers)
+        self.log_and_status(f"并行转换数已设置为: {selected}")
+
+    def clear_pdf_cache(self):
+        """
+        清空PDF转换缓存
+        """
+        try:
+            self.processor.pdf_cache.clear()
+            self.log_and_status("已清空PDF转换缓存")
+        except Exception as e:
+            self.log_and_status(f"清空PDF转换缓存时出错: {e}")
+
     def open_forum_link(self):
         """
         打开吾爱破解论坛链接
@@ -1293,84 +1690,76 @@ class DocumentProcessorUI:
 
     def display_folder_info(self, folder_path):
         """
-        显示文件夹中的文件信息
+        显示文件夹（含子文件夹）中的文件信息，在新线程中扫描，扫描过程中逐步更新显示
+        :param folder_path: 文件夹路径
+        """
+        # 重新扫描时，之前未完成的扫描不再更新显示
+        self.folder_scan_id = getattr(self, 'folder_scan_id', 0) + 1
+        thread = threading.Thread(target=self._display_folder_info_thread, args=(folder_path, self.folder_scan_id))
+        thread.daemon = True
+        thread.start()
+    
+    def _display_folder_info_thread(self, folder_path, scan_id):
+        """
+        在线程中扫描文件夹并更新文件信息显示
         :param folder_path: 文件夹路径
+        :param scan_id: 扫描编号，与当前编号不同时表示已有新的扫描
         """
+        def show(text):
+            def update_ui():
+                if scan_id != self.folder_scan_id:
+                    return
+                self.doc_info_text.config(state=tk.NORMAL)
+                self.doc_info_text.delete(1.0, tk.END)
+                self.doc_info_text.insert(1.0, text)
+                self.doc_info_text.config(state=tk.DISABLED)
+            self.root.after(0, update_ui)
+        
         try:
-            # 获取文件夹中的所有文件
-            all_files = []
-            for file in os.listdir(folder_path):
-                file_path = os.path.join(folder_path, file)
-                if os.path.isfile(file_path):
-                    all_files.append(file_path)
-            
             # 统计各类文件数量
-            doc_files = []  # .doc, .wps, .wpt
-            xls_files = []  # .xls, .et
-            docx_files = []  # .docx
-            xlsx_files = []  # .xlsx
-            other_files = []  # 其他文件
-            
-            for file_path in all_files:
-                ext = os.path.splitext(file_path)[1].lower()
-                if ext in ['.doc', '.wps', '.wpt']:
-                    doc_files.append(file_path)
-                elif ext in ['.xls', '.et']:
-                    xls_files.append(file_path)
-                elif ext == '.docx':
-                    docx_files.append(file_path)
-                elif ext == '.xlsx':
-                    xlsx_files.append(file_path)
-                else:
-                    other_files.append(file_path)
-            
-            # 需要转换的文件数
-            files_to_convert = len(doc_files) + len(xls_files)
-            
-            # 无法转换的文件数
-            files_cannot_convert = len(other_files)
-            
-            # 构建显示信息
-            info_lines = []
-            info_lines.append(f"文件夹路径: {folder_path}")
-            info_lines.append(f"文件总个数: {len(all_files)}")
-            info_lines.append(f"DOC/WPS文件个数: {len(doc_files)}")
-            info_lines.append(f"XLS/ET文件个数: {len(xls_files)}")
-            info_lines.append(f"DOCX文件个数: {len(docx_files)}")
-            info_lines.append(f"XLSX文件个数: {len(xlsx_files)}")
-            info_lines.append(f"需转换文件个数: {files_to_convert}")
-            info_lines.append(f"无法转换文件个数: {files_cannot_convert}")
-            info_lines.append("")
-            info_lines.append("文件列表:")
+            counts = {"doc": 0, "xls": 0, "docx": 0, "xlsx": 0, "pdf": 0, "other": 0}
+            file_lines = []
+            type_labels = {
+                "doc": "需转换(DOC/WPS)",
+                "xls": "需转换(XLS/ET)",
+                "docx": "已转换格式",
+                "xlsx": "已转换格式",
+                "pdf": "PDF表单",
+                "other": "无法转换",
+            }
             
-            # 添加文件列表
-            for file_path in all_files:
-                filename = os.path.basename(file_path)
-                ext = os.path.splitext(file_path)[1].lower()
-                file_type = "未知"
-                if ext in ['.doc', '.wps', '.wpt']:
-                    file_type = "需转换(DOC/WPS)"
-                elif ext in ['.xls', '.et']:
-                    file_type = "需转换(XLS/ET)"
-                elif ext in ['.docx', '.xlsx']:
-                    file_type = "已转换格式"
-                else:
-                    file_type = "无法转换"
-                
-                info_lines.append(f"  {filename} [{file_type}]")
+            def build_info(scanning):
+                # 构建显示信息
+                info_lines = []
+                info_lines.append(f"文件夹路径: {folder_path}" + ("（正在扫描...）" if scanning else ""))
+                info_lines.append(f"文件总个数: {len(file_lines)}")
+                info_lines.append(f"DOC/WPS文件个数: {counts['doc']}")
+                info_lines.append(f"XLS/ET文件个数: {counts['xls']}")
+                info_lines.append(f"DOCX文件个数: {counts['docx']}")
+                info_lines.append(f"XLSX文件个数: {counts['xlsx']}")
+                info_lines.append(f"PDF文件个数: {counts['pdf']}")
+                info_lines.append(f"需转换文件个数: {counts['doc'] + counts['xls']}")
+                info_lines.append(f"无法转换文件个数: {counts['other']}")
+                info_lines.append("")
+                info_lines.append("文件列表:")
+                info_lines.extend(file_lines)
+                return '\n'.join(info_lines)
+            
+            last_update = time.time()
+            for file_info in scan_template_folder(folder_path):
+                if scan_id != self.folder_scan_id:
+                    return
+                counts[file_info["kind"]] += 1
+                file_lines.append(f"  {file_info['relpath']} [{type_labels[file_info['kind']]}]")
+                # 共享文件夹扫描较慢，定时显示已扫描到的文件
+                if time.time() - last_update >= FOLDER_SCAN_UPDATE_INTERVAL:
+                    show(build_info(scanning=True))
+                    last_update = time.time()
             
-            # 更新文档信息显示
-            self.doc_info_text.config(state=tk.NORMAL)
-            self.doc_info_text.delete(1.0, tk.END)
-            self.doc_info_text.insert(1.0, '\n'.join(info_lines))
-            self.doc_info_text.config(state=tk.DISABLED)
+            show(build_info(scanning=False))
             
         except Exception as e:
-            error_info = f"无法读取文件夹信息: {str(e)}"
-            self.doc_info_text.config(state=tk.NORMAL)
-            self.doc_info_text.delete(1.0, tk.END)
-            self.doc_info_text.insert(1.0, error_info)
-            self.doc_info_text.config(state=tk.DISABLED)
+            show(f"无法读取文件夹信息: {str(e)}")
 
     def convert_wps_to_docx(self):
         """
@@ -1398,237 +1787,76 @@ class DocumentProcessorUI:
         # 保存所选文件夹的目录
         self.save_last_template_dir(folder_path)
         
-        # 查找文件夹中的所有文件
-        all_files = []
-        for file in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, file)
-            if os.path.isfile(file_path):
-                all_files.append(file_path)
-        
-        # 筛选支持转换的文件
-        supported_extensions = ('.wps', '.wpt', '.doc', '.et', '.xls')
+        # 扫描文件夹及子文件夹，筛选支持转换的文件；
+        # 所选文件夹中（不包括子文件夹）不是模板的文件移动到"[未转换]"文件夹
         files_to_convert = []
         files_to_move = []
-        
-        # 只有后缀不为docx、doc、wps、xlsx、xls、et才移动到"[未转换]"文件夹
-        unconvertible_extensions = ('.docx', '.doc', '.wps', '.wpt', '.xlsx', '.xls', '.et')
-        
-        for file_path in all_files:
-            if os.path.splitext(file_path)[1].lower() in supported_extensions:
-                files_to_convert.append(file_path)
-            elif os.path.splitext(file_path)[1].lower() not in unconvertible_extensions:
-                files_to_move.append(file_path)
-        
-        # 创建"未转换"文件夹并移动不支持的文件
-        if files_to_move:
-            unconverted_folder = os.path.join(folder_path, "[未转换]")
-            if not os.path.exists(unconverted_folder):
-                os.makedirs(unconverted_folder)
-            
-            for file_path in files_to_move:
-                try:
-                    filename = os.path.basename(file_path)
-                    destination = os.path.join(unconverted_folder, filename)
-                    # 如果目标文件已存在，添加序号
-                    counter = 1
-                    base_name, ext = os.path.splitext(filename)
-                    while os.path.exists(destination):
-                        new_filename = f"{base_name}_{counter}{ext}"
-                        destination = os.path.join(unconverted_folder, new_filename)
-                        counter += 1
-                    
-                    os.rename(file_path, destination)
-                    self.update_status(f"已移动不支持的文件: {filename}")
-                except Exception as e:
-                    self.log_and_status(f"移动文件 {os.path.basename(file_path)} 失败: {str(e)}")
+        file_stats = {}
+        for file_info in scan_template_folder(folder_path):
+            if file_info["kind"] in LEGACY_KINDS:
+                files_to_convert.append(file_info["path"])
+                file_stats[file_info["path"]] = (file_info["size"], file_info["mtime"])
+            elif file_info["kind"] == "other" and file_info["relpath"] == file_info["name"]:
+                files_to_move.append(file_info["path"])
+        
+        # 创建"[未转换]"文件夹并移动不支持的文件
+        unconverted_folder = os.path.join(folder_path, "[未转换]")
+        for file_path in files_to_move:
+            try:
+                if not os.path.exists(unconverted_folder):
+                    os.makedirs(unconverted_folder)
+                
+                filename = os.path.basename(file_path)
+                destination = os.path.join(unconverted_folder, filename)
+                # 如果目标文件已存在，添加序号
+                counter = 1
+                base_name, ext = os.path.splitext(filename)
+                while os.path.exists(destination):
+                    new_filename = f"{base_name}_{counter}{ext}"
+                    destination = os.path.join(unconverted_folder, new_filename)
+                    counter += 1
+                
+                os.rename(file_path, destination)
+                self.update_status(f"已移动不支持的文件: {filename}")
+            except Exception as e:
+                self.log_and_status(f"移动文件 {os.path.basename(file_path)} 失败: {str(e)}")
         
         if not files_to_convert:
             self.log_and_status("在选定的文件夹中未找到支持转换的文件")
             return
         
-        self.update_status("开始转换WPS/ET/XLS/DOC文件...")
-        
-        # 尝试使用win32com.client进行转换
-        wps_app = None
         try:
-            import win32com.client
-            import pythoncom
-            import threading
-            import time
-            
-            # 初始化COM线程
-            pythoncom.CoInitialize()
-            
-            success_count = 0
-            # 分别处理文档文件和表格文件
-            doc_files = [f for f in files_to_convert if os.path.splitext(f)[1].lower() in ['.wps', '.wpt', '.doc']]
-            et_xls_files = [f for f in files_to_convert if os.path.splitext(f)[1].lower() in ['.et', '.xls']]
-            
-            # 处理文档文件 (WPS/DOC -> DOCX)
-            if doc_files:
-                # 创建WPS文字应用程序对象
-                try:
-                    wps_app = win32com.client.Dispatch("KWPS.Application")
-                except:
-                    # 如果KWPS不可用，尝试使用WPS
-                    try:
-                        wps_app = win32com.client.Dispatch("Ket.Application")
-                    except:
-                        # 如果WPS也不可用，尝试使用Microsoft Word
-                        try:
-                            wps_app = win32com.client.Dispatch("Word.Application")
-                        except:
-                            self.log_and_status("未找到可用的WPS或Word应用程序来处理文档文件")
-                            wps_app = None
-                
-                if wps_app:
-                    wps_app.Visible = False
-                    wps_app.DisplayAlerts = False
-                    
-                    for file_path in doc_files:
-                        try:
-                            # 获取文件扩展名
-                            file_ext = os.path.splitext(file_path)[1].lower()
-                            
-                            # 打开文件
-                            doc = wps_app.Documents.Open(file_path)
-                            
-                            # 生成DOCX文件名
-                            docx_file = os.path.splitext(file_path)[0] + ".docx"
-                            
-                            # 另存为DOCX格式 (12是DOCX格式的代码)
-                            doc.SaveAs(docx_file, 12)
-                            
-                            # 关闭文档
-                            doc.Close()
-                            
-                            success_count += 1
-                            file_type = "WPS" if file_ext in ['.wps', '.wpt'] else "DOC"
-                            self.update_status(f"已转换 {file_type} 文件: {os.path.basename(file_path)} -> {os.path.basename(docx_file)}")
-                        except Exception as e:
-                            file_type = "WPS" if os.path.splitext(file_path)[1].lower() in ['.wps', '.wpt'] else "DOC"
-                            self.log_and_status(f"转换失败 {file_type} 文件 {os.path.basename(file_path)}: {str(e)}")
-                    
-                    # 关闭WPS应用程序
-                    try:
-                        wps_app.Quit()
-                    except:
-                        pass
-                    wps_app = None
-            
-            # 处理电子表格文件 (ET/XLS -> XLSX)
-            if et_xls_files:
-                # 创建WPS表格应用程序对象
-                try:
-                    et_app = win32com.client.Dispatch("KET.Application")
-                except:
-                    # 如果KET不可用，尝试使用Microsoft Excel
-                    try:
-                        et_app = win32com.client.Dispatch("Excel.Application")
-                    except:
-                        self.log_and_status("未找到可用的WPS表格或Excel应用程序来处理电子表格文件")
-                        et_app = None
-                
-                if et_app:
-                    et_app.Visible = False
-                    et_app.DisplayAlerts = False
-                    
-                    for file_path in et_xls_files:
-                        try:
-                            # 获取文件扩展名
-                            file_ext = os.path.splitext(file_path)[1].lower()
-                            
-                            # 打开文件（添加超时和错误处理）
-                            try:
-                                workbook = et_app.Workbooks.Open(file_path)
-                                
-                                # 生成XLSX文件名
-                                xlsx_file = os.path.splitext(file_path)[0] + ".xlsx"
-                                
-                                # 另存为XLSX格式 (51是XLSX格式的代码)
-                                workbook.SaveAs(xlsx_file, 51)
-                                
-                                # 关闭工作簿
-                                workbook.Close()
-                                
-                                success_count += 1
-                                file_type = "ET" if file_ext == '.et' else "XLS"
-                                self.update_status(f"已转换 {file_type} 文件: {os.path.basename(file_path)} -> {os.path.basename(xlsx_file)}")
-                            except Exception as open_error:
-                                file_type = "ET" if os.path.splitext(file_path)[1].lower() == '.et' else "XLS"
-                                self.log_and_status(f"打开或转换失败 {file_type} 文件 {os.path.basename(file_path)}: {str(open_error)}")
-                        except Exception as e:
-                            file_type = "ET" if os.path.splitext(file_path)[1].lower() == '.et' else "XLS"
-                            self.log_and_status(f"转换失败 {file_type} 文件 {os.path.basename(file_path)}: {str(e)}")
-                    
-                    # 关闭ET应用程序
-                    try:
-                        et_app.Quit()
-                    except:
-                        pass
-            
-            self.log_and_status(f"转换完成: 成功 {success_count}/{len(files_to_convert)} 个文件")
-            
-            # 询问用户是否删除源文件
-            if success_count > 0:
-                try:
-                    from tkinter import messagebox
-                    result = messagebox.askyesno("转换完成", "是否删除已成功转换的源文件？\n(选择\"否\"将把源文件移动到\"源文件\"文件夹中)")
-                    if result:
-                        deleted_count = 0
-                        for file_path in files_to_convert:
-                            try:
-                                os.remove(file_path)
-                                deleted_count += 1
-                                self.update_status(f"已删除源文件: {os.path.basename(file_path)}")
-                            except Exception as e:
-                                self.log_and_status(f"删除源文件 {os.path.basename(file_path)} 失败: {str(e)}")
-                        self.log_and_status(f"已删除 {deleted_count}/{len(files_to_convert)} 个源文件")
-                    else:
-                        # 用户选择"否"，将源文件移动到"源文件"文件夹
-                        source_folder = os.path.join(os.path.dirname(files_to_convert[0]), "源文件")
-                        if not os.path.exists(source_folder):
-                            os.makedirs(source_folder)
-                        
-                        moved_count = 0
-                        for file_path in files_to_convert:
-                            try:
-                                filename = os.path.basename(file_path)
-                                destination = os.path.join(source_folder, filename)
-                                # 如果目标文件已存在，添加序号
-                                counter = 1
-                                base_name, ext = os.path.splitext(filename)
-                                while os.path.exists(destination):
-                                    new_filename = f"{base_name}_{counter}{ext}"
-                                    destination = os.path.join(source_folder, new_filename)
-                                    counter += 1
-                                
-                                os.rename(file_path, destination)
-                                moved_count += 1
-                                self.update_status(f"已移动源文件到\"源文件\"文件夹: {filename}")
-                            except Exception as e:
-                                self.log_and_status(f"移动源文件 {os.path.basename(file_path)} 失败: {str(e)}")
-                        self.log_and_status(f"已移动 {moved_count}/{len(files_to_convert)} 个源文件到\"源文件\"文件夹")
-                except Exception as e:
-                    self.log_and_status(f"处理删除/移动操作时出错: {str(e)}")
-            
-        except ImportError:
-            self.log_and_status("缺少必要的库: 请安装pywin32库")
+            outcomes = self.processor.convert_legacy_files(files_to_convert, folder_path,
+                                                           status_callback=self.update_status,
+                                                           force=self.force_convert_var.get(),
+                                                           file_stats=file_stats)
         except Exception as e:
             self.log_and_status(f"转换过程中出错: {str(e)}")
-        finally:
-            # 确保WPS应用程序被正确关闭
-            if wps_app:
-                try:
-                    wps_app.Quit()
-                except:
-                    pass
-            
-            # 清理COM资源
+            return
+        
+        # 已是最新而跳过的文件同样视为转换成功
+        converted_files = [file_path for file_path in files_to_convert if outcomes[file_path]["error"] is None]
+        skipped_count = sum(1 for outcome in outcomes.values() if outcome["skipped"])
+        for file_path in files_to_convert:
+            error = outcomes[file_path]["error"]
+            if error is not None:
+                self.log_and_status(f"转换失败 {os.path.basename(file_path)}: {error}")
+        self.log_and_status(f"转换完成: 成功 {len(converted_files)}/{len(files_to_convert)} 个文件"
+                            f"（其中{skipped_count}个已是最新，未重新转换）")
+        
+        # 询问用户是否删除源文件，只处理确认转换成功的文件
+        if converted_files:
             try:
-                pythoncom.CoUninitialize()
-            except:
-                pass
+                from tkinter import messagebox
+                result = messagebox.askyesno("转换完成", "是否删除已成功转换的源文件？\n(选择\"否\"将把源文件移动到\"源文件\"文件夹中)")
+                cleaned_count = self.processor.cleanup_legacy_sources(folder_path, converted_files, delete=result,
+                                                                      status_callback=self.update_status)
+                if result:
+                    self.log_and_status(f"已删除 {cleaned_count}/{len(converted_files)} 个源文件")
+                else:
+                    self.log_and_status(f"已移动 {cleaned_count}/{len(converted_files)} 个源文件到\"源文件\"文件夹")
+            except Exception as e:
+                self.log_and_status(f"处理删除/移动操作时出错: {str(e)}")
 
     def select_template_file(self):
         """
@@ -1835,59 +2063,67 @@ class DocumentProcessorUI:
         # 从用户选择的模板目录中收集所有占位符
         all_placeholders = set()
         placeholder_files = {}  # 记录每个占位符出现在哪些文件中
+        
+        # 在主线程中更新UI
+        def update_ui(placeholders, scanning=False):
+            # 清空占位符列表
+            self.placeholder_listbox.delete(0, tk.END)
+            
+            # 添加占位符到列表
+            if not placeholders:
+                if scanning:
+                    return  # 扫描未结束时暂不显示"未找到占位符"
+                self.placeholder_listbox.insert(tk.END, "日期")
+                self.placeholder_listbox.insert(tk.END, "在选定的文件夹中未找到占位符")
+                self.placeholder_listbox.itemconfig(0, {'fg': 'black'})  # 用户已选择目录，日期占位符变为可用
+                self.placeholder_listbox.itemconfig(1, {'fg': 'gray'})
+                # 禁用删除按钮
+                self.delete_placeholder_button.config(state=tk.DISABLED)
+                # self.update_status("在选定的文件夹中未找到占位符")
+            else:
+                # 添加日期占位符（始终在列表顶部，但避免重复）
+                self.placeholder_listbox.insert(tk.END, "日期")
+                self.placeholder_listbox.itemconfig(0, {'fg': 'black'})  # 用户已选择目录，日期占位符变为可用
+                
+                # 添加其他占位符到列表（排除已存在的日期占位符）
+                for placeholder in placeholders:
+                    if placeholder != "日期":  # 避免重复添加日期占位符
+                        self.placeholder_listbox.insert(tk.END, placeholder)
+                
+                # 启用删除按钮
+                self.delete_placeholder_button.config(state=tk.NORMAL)
+                # self.update_status(f"刷新完成，找到 {len(all_placeholders)} 个占位符")
+        
         try:
-            # 遍历文件夹中的所有文件
-            for file in os.listdir(self.selected_template_folder):
-                file_path = os.path.join(self.selected_template_folder, file)
-                if os.path.isfile(file_path):
-                    # 根据文件扩展名处理不同类型的文件
-                    if file.endswith('.docx'):
-                        placeholders = self.processor.extract_placeholders_from_docx(file_path)
-                        all_placeholders.update(placeholders)
-                    elif file.endswith('.xlsx'):
-                        placeholders = self.processor.extract_placeholders_from_xlsx(file_path)
-                        all_placeholders.update(placeholders)
-                    else:
-                        continue
-                    
-                    # 记录每个占位符出现的文件
-                    for placeholder in placeholders:
-                        if placeholder not in placeholder_files:
-                            placeholder_files[placeholder] = []
-                        placeholder_files[placeholder].append(file_path)
+            # 遍历文件夹及子文件夹中的所有模板文件
+            for file_info in scan_template_folder(self.selected_template_folder):
+                file_path = file_info["path"]
+                # 根据文件类型处理不同类型的文件
+                if file_info["kind"] == "docx":
+                    placeholders = self.processor.extract_placeholders_from_docx(file_path)
+                elif file_info["kind"] == "xlsx":
+                    placeholders = self.processor.extract_placeholders_from_xlsx(file_path)
+                elif file_info["kind"] == "pdf":
+                    placeholders = self.processor.extract_placeholders_from_pdf(file_path)
+                else:
+                    continue
+                
+                # 记录每个占位符出现的文件
+                for placeholder in placeholders:
+                    if placeholder not in placeholder_files:
+                        placeholder_files[placeholder] = []
+                    placeholder_files[placeholder].append(file_path)
+                
+                # 找到新的占位符时立即显示，不必等待整个文件夹扫描完成
+                if not placeholders <= all_placeholders:
+                    all_placeholders.update(placeholders)
+                    snapshot = sorted(all_placeholders)
+                    self.root.after(0, lambda items=snapshot: update_ui(items, scanning=True))
             
             # 保存占位符和文件的映射关系
             self.placeholder_files = placeholder_files
             
-            # 在主线程中更新UI
-            def update_ui():
-                # 清空占位符列表
-                self.placeholder_listbox.delete(0, tk.END)
-                
-                # 添加占位符到列表
-                if not all_placeholders:
-                    self.placeholder_listbox.insert(tk.END, "日期")
-                    self.placeholder_listbox.insert(tk.END, "在选定的文件夹中未找到占位符")
-                    self.placeholder_listbox.itemconfig(0, {'fg': 'black'})  # 用户已选择目录，日期占位符变为可用
-                    self.placeholder_listbox.itemconfig(1, {'fg': 'gray'})
-                    # 禁用删除按钮
-                    self.delete_placeholder_button.config(state=tk.DISABLED)
-                    # self.update_status("在选定的文件夹中未找到占位符")
-                else:
-                    # 添加日期占位符（始终在列表顶部，但避免重复）
-                    self.placeholder_listbox.insert(tk.END, "日期")
-                    self.placeholder_listbox.itemconfig(0, {'fg': 'black'})  # 用户已选择目录，日期占位符变为可用
-                    
-                    # 添加其他占位符到列表（排除已存在的日期占位符）
-                    for placeholder in sorted(all_placeholders):
-                        if placeholder != "日期":  # 避免重复添加日期占位符
-                            self.placeholder_listbox.insert(tk.END, placeholder)
-                    
-                    # 启用删除按钮
-                    self.delete_placeholder_button.config(state=tk.NORMAL)
-                    # self.update_status(f"刷新完成，找到 {len(all_placeholders)} 个占位符")
-            
-            self.root.after(0, update_ui)
+            self.root.after(0, lambda: update_ui(sorted(all_placeholders)))
             
         except Exception as e:
             # 在主线程中更新UI
@@ -2616,27 +2852,11 @@ class DocumentProcessorUI:
         
         ttk.Button(left_frame, text="刷新方案列表", command=self.load_saved_schemes).grid(row=1, column=0, columnspan=2)
         
-        # 右侧：用户录入区域
-        self.input_canvas = tk.Canvas(right_frame, height=200, relief=tk.SUNKEN, borderwidth=1)
-        self.input_scrollbar = ttk.Scrollbar(right_frame, orient="vertical", command=self.input_canvas.yview)
-        self.input_scrollable_frame = ttk.Frame(self.input_canvas)
-        
-        # 添加鼠标滚轮支持
-        def _on_mousewheel(event):
-            self.input_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        
-        self.input_canvas.bind("<MouseWheel>", _on_mousewheel)
-        self.input_scrollable_frame.bind("<MouseWheel>", _on_mousewheel)
-        
-        self.input_scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.input_canvas.configure(
-                scrollregion=self.input_canvas.bbox("all")
-            )
-        )
-        
-        self.input_canvas.create_window((0, 0), window=self.input_scrollable_frame, anchor="nw")
-        self.input_canvas.configure(yscrollcommand=self.input_scrollbar.set)
+        # 右侧：用户录入区域（只为可见的行创建控件，录入的内容保存在表单的数据模型中）
+        self.input_canvas = tk.Canvas(right_frame, height=200, relief=tk.SUNKEN, borderwidth=1,
+                                      yscrollincrement=FORM_ROW_HEIGHT)
+        self.input_scrollbar = ttk.Scrollbar(right_frame, orient="vertical")
+        self.input_form = VirtualForm(self.input_canvas, self.input_scrollbar, date_command=self.on_input_date_button)
         
         self.input_canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         self.input_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
@@ -2685,11 +2905,18 @@ class DocumentProcessorUI:
         self.generate_docs_button = ttk.Button(button_frame, text="生成文档", command=self.generate_documents, state="disabled")
         self.generate_docs_button.grid(row=0, column=2, padx=(10, 10))
         
+        # 直接拼接为一个Word文档，不需要转换
+        self.merge_docx_button = ttk.Button(button_frame, text="合并为Word", command=self.merge_to_docx, state="disabled")
+        self.merge_docx_button.grid(row=1, column=3, padx=(10, 10), pady=(5, 0))
+        
         # 如果PDF功能可用，添加合并为PDF按钮（在打开输出文件夹按钮之前）
         if PDF_CONVERSION_AVAILABLE and PDF_MERGING_AVAILABLE:
             self.merge_pdf_button = ttk.Button(button_frame, text="合并为PDF", command=self.merge_to_pdf, state="disabled")
             self.merge_pdf_button.grid(row=0, column=3, padx=(10, 10))
-            ttk.Button(button_frame, text="打开输出文件夹", command=self.open_output_dir).grid(row=0, column=4, padx=(10, 10))
+            # 生成文档的同时转换并合并为PDF
+            self.generate_merge_button = ttk.Button(button_frame, text="生成并合并PDF", command=self.generate_and_merge_pdf, state="disabled")
+            self.generate_merge_button.grid(row=0, column=4, padx=(10, 10))
+            ttk.Button(button_frame, text="打开输出文件夹", command=self.open_output_dir).grid(row=0, column=5, padx=(10, 10))
         elif not PDF_CONVERSION_AVAILABLE or not PDF_MERGING_AVAILABLE:
             ttk.Button(button_frame, text="合并为PDF(需要安装依赖)", state=tk.DISABLED).grid(row=0, column=3, padx=(10, 10))
             ttk.Button(button_frame, text="打开输出文件夹", command=self.open_output_dir).grid(row=0, column=4, padx=(10, 10))
@@ -2710,37 +2937,18 @@ class DocumentProcessorUI:
             # 获取选中项的索引
             selected_index = self.history_combobox.current()
             if selected_index < 0:
-                self.log_and_status("请先选择一条历史记录")
-                return
-            
-            # 确认删除操作
-            from tkinter import messagebox
-            result = messagebox.askyesno("确认删除", "确定要删除选中的历史记录吗？此操作不可恢复。")
-            if not result:
-                return
-            
-            # 读取历史记录
-            if not os.path.exists("app_data.json"):
-                return
-            
-            with open("app_data.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            history_data = data.get("history", {})
+                self.log_and_status("请先选择一条历史记录")
+                return
             
-            # 获取当前方案的历史记录
-            if self.current_scheme not in history_data:
+            # 确认删除操作
+            from tkinter import messagebox
+            result = messagebox.askyesno("确认删除", "确定要删除选中的历史记录吗？此操作不可恢复。")
+            if not result:
                 return
             
-            # 删除选中的记录
-            if selected_index < len(history_data[self.current_scheme]):
-                del history_data[self.current_scheme][selected_index]
-                
-                # 保存更新后的历史记录
-                data["history"] = history_data
-                with open("app_data.json", "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                
+            # 按下拉框生成时记录的内容哈希删除选中的记录（其他实例可能同时插入了记录，不能按位置删除）
+            if selected_index < len(self.history_hashes) and self.data_store.delete_history_record(
+                    self.current_scheme, self.history_hashes[selected_index]):
                 # 更新下拉框内容
                 self.update_history_combobox()
                 
@@ -2786,15 +2994,13 @@ class DocumentProcessorUI:
 
         try:
             # 读取方案数据
-            with open("app_data.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            schemes = data.get("schemes", {})
-            if selected_scheme not in schemes:
+            scheme_data = self.data_store.get_scheme(selected_scheme)
+            if scheme_data is None:
                 self.log_and_status(f"错误: 方案 '{selected_scheme}' 不存在")
                 return
 
-            scheme_data = schemes[selected_scheme]
+            # 加载该方案的分片数据（用户录入和历史记录），其他方案的数据不读取
+            self.data_store.load_scheme_data(selected_scheme)
 
             # 更新模板文件列表
             self.template_files = scheme_data.get("template_files", [])
@@ -2802,12 +3008,6 @@ class DocumentProcessorUI:
             # 更新占位符列表
             self.ordered_placeholders = scheme_data.get("placeholder_order", [])
             
-            # 清除现有的输入字段
-            for widget in self.input_scrollable_frame.winfo_children():
-                widget.destroy()
-            
-            self.input_fields = {}  # 重置输入字段字典
-            
             # 创建新的输入字段
             self.create_input_fields()
             
@@ -2838,8 +3038,13 @@ class DocumentProcessorUI:
         # 启用生成文档和合并为PDF按钮
         self.generate_docs_button.config(state="normal")
         
+        self.merge_docx_button.config(state="normal")
+        
         if hasattr(self, 'merge_pdf_button'):
             self.merge_pdf_button.config(state="normal")
+        
+        if hasattr(self, 'generate_merge_button'):
+            self.generate_merge_button.config(state="normal")
     
     def disable_scheme_related_controls(self):
         """
@@ -2866,7 +3071,7 @@ class DocumentProcessorUI:
                 for child in widget.winfo_children():
                     if isinstance(child, tk.Button) and child.cget("text") == "生成文档":
                         child.config(state="disabled")
-                    elif isinstance(child, tk.Button) and child.cget("text") == "合并为PDF":
+                    elif isinstance(child, tk.Button) and child.cget("text") in ("合并为PDF", "生成并合并PDF", "合并为Word"):
                         child.config(state="disabled")
                 break
     
@@ -2876,16 +3081,11 @@ class DocumentProcessorUI:
         """
         # 读取方案数据
         try:
-            with open("app_data.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            schemes = data.get("schemes", {})
-            if scheme_name not in schemes:
+            scheme_data = self.data_store.get_scheme(scheme_name)
+            if scheme_data is None:
                 print(f"错误: 方案 '{scheme_name}' 不存在")
                 return
             
-            scheme_data = schemes[scheme_name]
-            
             # 应用方案数据
             self.template_files = scheme_data.get("template_files", [])
             self.ordered_placeholders = scheme_data.get("placeholder_order", [])
@@ -2898,11 +3098,11 @@ class DocumentProcessorUI:
             if self.current_scheme:
                 last_inputs = self.load_user_inputs_for_scheme(self.current_scheme)
                 if last_inputs:
-                    # 填充上次的用户输入
+                    # 填充上次的用户输入（日期字段始终使用当天日期）
                     for placeholder, value in last_inputs.items():
-                        if placeholder in self.input_fields:
-                            self.input_fields[placeholder].delete(0, tk.END)
-                            self.input_fields[placeholder].insert(0, value)
+                        if placeholder != '日期':
+                            self.input_form.set_value(placeholder, value, refresh=False)
+                    self.input_form.refresh()
             
         except Exception as e:
             print(f"错误: 加载方案时出错: {e}")
@@ -2912,29 +3112,21 @@ class DocumentProcessorUI:
         加载已保存的方案到列表框（保留此方法以保持向后兼容）
         """
         self.scheme_listbox_main.delete(0, tk.END)
-        if os.path.exists("app_data.json"):
-            try:
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                schemes = data.get("schemes", {})
-                for scheme_name in schemes:
-                    self.scheme_listbox_main.insert(tk.END, scheme_name)
-            except Exception as e:
-                print(f"加载方案时出错: {e}")
+        try:
+            for scheme_name in self.data_store.get_schemes():
+                self.scheme_listbox_main.insert(tk.END, scheme_name)
+        except Exception as e:
+            print(f"加载方案时出错: {e}")
     
     def load_saved_schemes_combobox(self):
         """
         加载已保存方案下拉菜单
         """
-        if os.path.exists("app_data.json"):
-            try:
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                schemes = data.get("schemes", {})
-                scheme_names = list(schemes.keys())
-                self.saved_schemes_combobox['values'] = scheme_names
-            except Exception as e:
-                print(f"加载方案下拉菜单时出错: {e}")
+        try:
+            scheme_names = list(self.data_store.get_schemes().keys())
+            self.saved_schemes_combobox['values'] = scheme_names
+        except Exception as e:
+            print(f"加载方案下拉菜单时出错: {e}")
     
     def setup_config_tab(self):
         """
@@ -3073,25 +3265,11 @@ class DocumentProcessorUI:
             return
         
         try:
-            # 读取现有数据
-            data = {}
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            
-            # 确保schemes键存在
-            if "schemes" not in data:
-                data["schemes"] = {}
-            
             # 保存方案
-            data["schemes"][scheme_name] = {
+            self.data_store.save_scheme(scheme_name, {
                 "template_files": self.template_files.copy(),
                 "placeholder_order": self.ordered_placeholders.copy()
-            }
-            
-            # 写入文件
-            with open("app_data.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            })
             
             # 更新下拉菜单
             self.load_saved_schemes_combobox()
@@ -3123,27 +3301,11 @@ class DocumentProcessorUI:
             return
         
         try:
-            # 读取现有数据
-            if not os.path.exists("app_data.json"):
-                self.log_and_status("错误: 配置文件不存在")
-                return
-                
-            with open("app_data.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            schemes = data.get("schemes", {})
-            if scheme_name not in schemes:
+            # 删除方案（同时删除该方案的分片文件）
+            if not self.data_store.delete_scheme(scheme_name):
                 self.log_and_status(f"错误: 方案 '{scheme_name}' 不存在")
                 return
             
-            # 删除方案
-            del schemes[scheme_name]
-            data["schemes"] = schemes
-            
-            # 保存更改
-            with open("app_data.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
             # 更新列表框
             self.load_saved_schemes()
             self.load_saved_schemes_combobox()
@@ -3154,8 +3316,7 @@ class DocumentProcessorUI:
             self.template_files.clear()
             
             # 清空用户录入区域
-            for widget in self.config_input_scrollable_frame.winfo_children():
-                widget.destroy()
+            self.config_clear_input_fields()
                 
             # 清空下拉菜单的选择
             self.saved_schemes_combobox.set('')
@@ -3176,16 +3337,11 @@ class DocumentProcessorUI:
         selected_scheme = self.scheme_listbox.get(selection[0])
         try:
             # 读取方案数据
-            with open("app_data.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            schemes = data.get("schemes", {})
-            if selected_scheme not in schemes:
+            scheme_data = self.data_store.get_scheme(selected_scheme)
+            if scheme_data is None:
                 print(f"错误: 方案 '{selected_scheme}' 不存在")
                 return
             
-            scheme_data = schemes[selected_scheme]
-            
             # 应用方案数据到配置界面
             self.template_files = scheme_data.get("template_files", [])
             self.ordered_placeholders = scheme_data.get("placeholder_order", [])
@@ -3238,42 +3394,33 @@ class DocumentProcessorUI:
         :param scheme_name: 方案名称
         """
         try:
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
+            scheme_data = self.data_store.get_scheme(scheme_name)
+            if scheme_data is not None:
+                # 清空当前内容
+                self.config_template_listbox.delete(0, tk.END)
+                self.template_files.clear()
                 
-                schemes = data.get("schemes", {})
-                if scheme_name in schemes:
-                    scheme_data = schemes[scheme_name]
-                    
-                    # 清空当前内容
-                    self.config_template_listbox.delete(0, tk.END)
-                    self.template_files.clear()
-                    
-                    # 清空用户录入区域
-                    for widget in self.config_input_scrollable_frame.winfo_children():
-                        widget.destroy()
-                    
-                    # 加载模板文件
-                    self.template_files.extend(scheme_data.get("template_files", []))
-                    for file_path in self.template_files:
-                        self.config_template_listbox.insert(tk.END, os.path.basename(file_path))
-                    
-                    # 加载占位符顺序
-                    self.ordered_placeholders = scheme_data.get("placeholder_order", [])
-                    
-                    # 创建用户输入控件
-                    self.config_create_input_fields()
-                    
-                    # 在方案名称输入框中显示当前方案名称
-                    self.scheme_name_entry.delete(0, tk.END)
-                    self.scheme_name_entry.insert(0, scheme_name)
-                    
-                    self.log_and_status(f"成功: 方案 '{scheme_name}' 已加载到配置界面")
-                else:
-                    self.log_and_status(f"错误: 方案 '{scheme_name}' 不存在")
+                # 清空用户录入区域
+                self.config_clear_input_fields()
+                
+                # 加载模板文件
+                self.template_files.extend(scheme_data.get("template_files", []))
+                for file_path in self.template_files:
+                    self.config_template_listbox.insert(tk.END, os.path.basename(file_path))
+                
+                # 加载占位符顺序
+                self.ordered_placeholders = scheme_data.get("placeholder_order", [])
+                
+                # 创建用户输入控件
+                self.config_create_input_fields()
+                
+                # 在方案名称输入框中显示当前方案名称
+                self.scheme_name_entry.delete(0, tk.END)
+                self.scheme_name_entry.insert(0, scheme_name)
+                
+                self.log_and_status(f"成功: 方案 '{scheme_name}' 已加载到配置界面")
             else:
-                self.log_and_status("错误: 方案文件不存在")
+                self.log_and_status(f"错误: 方案 '{scheme_name}' 不存在")
         except Exception as e:
             self.log_and_status(f"错误: 加载方案时出错: {e}")
     
@@ -3289,7 +3436,8 @@ class DocumentProcessorUI:
             filetypes=[
                 ("所有文件", "*.*"),
                 ("Word文档", "*.docx"),
-                ("Excel表格", "*.xlsx")
+                ("Excel表格", "*.xlsx"),
+                ("PDF表单", "*.pdf")
             ],
             initialdir=last_template_dir
         )
@@ -3364,7 +3512,7 @@ class DocumentProcessorUI:
     
     def move_up(self, index):
         """
-        将指定索引的占位符向上移动
+        将指定索引的占位符向上移动，只交换两行控件的位置，不重新创建输入界面
         :param index: 要移动的占位符索引
         """
         if index <= 0 or index >= len(self.ordered_placeholders):
@@ -3374,63 +3522,45 @@ class DocumentProcessorUI:
         self.ordered_placeholders[index], self.ordered_placeholders[index-1] = \
             self.ordered_placeholders[index-1], self.ordered_placeholders[index]
         
-        # 重新创建输入界面
-        self.config_create_input_fields()
+        # 界面中的行与占位符顺序不一致时（如尚未创建）重新创建输入界面
+        rows = self.config_input_rows
+        if len(rows) != len(self.ordered_placeholders) or \
+                rows[index]["placeholder"] != self.ordered_placeholders[index-1] or \
+                rows[index-1]["placeholder"] != self.ordered_placeholders[index]:
+            self.config_create_input_fields()
+            return
+        
+        rows[index], rows[index-1] = rows[index-1], rows[index]
+        self._config_grid_row(rows[index-1], index-1)
+        self._config_grid_row(rows[index], index)
+    
+    def config_clear_input_fields(self):
+        """
+        清空用户录入区域（配置方案界面）
+        """
+        for widget in self.config_input_scrollable_frame.winfo_children():
+            widget.destroy()
+        self.config_input_rows = []
     
     def config_create_input_fields(self):
         """
         创建输入字段（配置方案界面）
+        每个占位符一行，行控件和占位符配置保存在self.config_input_rows中，
+        调整顺序时只交换相邻两行，修改类型时只重新创建该行的输入控件
         """
         # 清除现有控件
-        for widget in self.config_input_scrollable_frame.winfo_children():
-            widget.destroy()
+        self.config_clear_input_fields()
+        
+        # 加载该方案的上次用户输入以正确显示下拉框选项
+        self.config_last_inputs = {}
+        if self.current_scheme:
+            self.config_last_inputs = self.load_user_inputs_for_scheme(self.current_scheme) or {}
         
         # 创建输入字段和上移按钮
-        self.input_fields = {}  # 用于存储输入框引用
         for i, placeholder in enumerate(self.ordered_placeholders):
-            # 标签
-            ttk.Label(self.config_input_scrollable_frame, text=f"{placeholder}:").grid(row=i, column=0, sticky=tk.W, pady=2)
-            
-            # 获取占位符配置
-            config = self.get_placeholder_config(placeholder)
-            
-            # 根据配置创建不同类型的输入控件预览
-            if config.get("type") == "combobox":
-                # 创建下拉框预览
-                options = config.get("options", [f"<{placeholder}>"])
-                combobox = ttk.Combobox(self.config_input_scrollable_frame, values=options, width=25, state="readonly")
-                combobox.grid(row=i, column=1, sticky=(tk.W, tk.E), pady=2, padx=(5, 0))
-                combobox.set(options[0] if options else f"<{placeholder}>")
-                self.input_fields[placeholder] = combobox
-            else:
-                # 创建普通文本框预览
-                entry = ttk.Entry(self.config_input_scrollable_frame, width=25)
-                entry.grid(row=i, column=1, sticky=(tk.W, tk.E), pady=2, padx=(5, 0))
-                entry.insert(0, f"<{placeholder}>")
-                entry.configure(state='readonly')  # 只读状态
-                self.input_fields[placeholder] = entry
-            
-            # 设置按钮（在↑箭头左边）
-            # 使用functools.partial来正确传递参数
-            import functools
-            setting_button = ttk.Button(
-                self.config_input_scrollable_frame,
-                text="⚙",
-                width=3,
-                command=functools.partial(self.configure_placeholder_type, placeholder)
-            )
-            setting_button.grid(row=i, column=2, pady=2, padx=(5, 0))
-            
-            # 上移按钮（第一个元素不显示）
-            if i > 0:
-                # 同样使用functools.partial来正确传递索引参数
-                up_button = ttk.Button(
-                    self.config_input_scrollable_frame, 
-                    text="↑", 
-                    width=3,
-                    command=functools.partial(self.move_up, i)
-                )
-                up_button.grid(row=i, column=3, pady=2, padx=(5, 0))
+            row = self._config_create_row(placeholder)
+            self.config_input_rows.append(row)
+            self._config_grid_row(row, i)
         
         # 添加日期字段（自动生成，仅显示不提供输入）
         date_row = len(self.ordered_placeholders)
@@ -3440,24 +3570,90 @@ class DocumentProcessorUI:
         
         # 配置输入区域的列权重
         self.config_input_scrollable_frame.columnconfigure(1, weight=1)
+    
+    def _config_create_row(self, placeholder):
+        """
+        创建一个占位符的行控件（配置方案界面）
+        :param placeholder: 占位符名称
+        :return: 行字典 {"placeholder", "config", "label", "input", "setting_button", "up_button"}
+        """
+        row = {"placeholder": placeholder, "config": self.get_placeholder_config(placeholder)}
         
-        # 加载该方案的上次用户输入以正确显示下拉框选项
-        if self.current_scheme:
-            last_inputs = self.load_user_inputs_for_scheme(self.current_scheme)
-            if last_inputs:
-                # 更新下拉框预览中的选项和选中值
-                for placeholder, value in last_inputs.items():
-                    if placeholder in self.input_fields:
-                        widget = self.input_fields[placeholder]
-                        if isinstance(widget, ttk.Combobox):
-                            # 对于下拉框，检查值是否在选项中，如果不在则添加
-                            current_values = list(widget['values'])
-                            if value not in current_values and value:
-                                # 添加新值到选项中
-                                current_values.append(value)
-                                widget['values'] = current_values
-                            # 设置当前值
-                            widget.set(value)
+        # 标签
+        row["label"] = ttk.Label(self.config_input_scrollable_frame, text=f"{placeholder}:")
+        
+        # 根据配置创建不同类型的输入控件预览
+        row["input"] = self._config_create_row_input(row)
+        
+        # 设置按钮（在↑箭头左边）
+        row["setting_button"] = ttk.Button(
+            self.config_input_scrollable_frame,
+            text="⚙",
+            width=3,
+            command=functools.partial(self.configure_placeholder_type, placeholder)
+        )
+        
+        # 上移按钮，按钮的索引在放置到对应行时设置
+        row["up_button"] = ttk.Button(self.config_input_scrollable_frame, text="↑", width=3)
+        return row
+    
+    def _config_create_row_input(self, row):
+        """
+        根据占位符配置创建输入控件预览
+        :param row: 行字典
+        :return: 输入控件
+        """
+        placeholder = row["placeholder"]
+        config = row["config"]
+        if config.get("type") == "combobox":
+            # 创建下拉框预览
+            options = list(config.get("options", [f"<{placeholder}>"]))
+            value = self.config_last_inputs.get(placeholder)
+            # 上次输入的值不在选项中时添加到选项中
+            if value and value not in options:
+                options.append(value)
+            combobox = ttk.Combobox(self.config_input_scrollable_frame, values=options, width=25, state="readonly")
+            combobox.set(value if value else (options[0] if options else f"<{placeholder}>"))
+            return combobox
+        
+        # 创建普通文本框预览
+        entry = ttk.Entry(self.config_input_scrollable_frame, width=25)
+        entry.insert(0, f"<{placeholder}>")
+        entry.configure(state='readonly')  # 只读状态
+        return entry
+    
+    def _config_grid_row(self, row, index):
+        """
+        把行控件放置到指定行
+        :param row: 行字典
+        :param index: 行号
+        """
+        row["label"].grid(row=index, column=0, sticky=tk.W, pady=2)
+        row["input"].grid(row=index, column=1, sticky=(tk.W, tk.E), pady=2, padx=(5, 0))
+        row["setting_button"].grid(row=index, column=2, pady=2, padx=(5, 0))
+        
+        # 上移按钮（第一个元素不显示）
+        if index > 0:
+            row["up_button"].configure(command=functools.partial(self.move_up, index))
+            row["up_button"].grid(row=index, column=3, pady=2, padx=(5, 0))
+        else:
+            row["up_button"].grid_remove()
+    
+    def config_refresh_placeholder_row(self, placeholder, config):
+        """
+        占位符类型修改后只重新创建该行的输入控件（配置方案界面）
+        :param placeholder: 占位符名称
+        :param config: 新的配置字典
+        """
+        for index, row in enumerate(self.config_input_rows):
+            if row["placeholder"] == placeholder:
+                row["config"] = config
+                row["input"].destroy()
+                row["input"] = self._config_create_row_input(row)
+                self._config_grid_row(row, index)
+                return
+        # 界面中没有该占位符时重新创建输入界面
+        self.config_create_input_fields()
     
     def configure_placeholder_type(self, placeholder):
         """
@@ -3544,108 +3740,63 @@ class DocumentProcessorUI:
             
             self.save_placeholder_config(placeholder, config)
             config_dialog.destroy()
-            # 重新创建输入字段以反映更改
-            self.config_create_input_fields()
+            # 只重新创建该占位符的输入控件以反映更改
+            self.config_refresh_placeholder_row(placeholder, config)
         
         ttk.Button(button_frame, text="确定", command=save_config).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="取消", command=config_dialog.destroy).pack(side=tk.LEFT, padx=5)
     
     def create_input_fields(self):
         """
-        创建输入字段（主操作界面）
+        创建输入字段（主操作界面），字段较多时只为可见的行创建控件
         """
-        # 清除现有控件
-        for widget in self.input_scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        # 创建输入字段（移除上移按钮）
-        self.input_fields = {}
-        for i, placeholder in enumerate(self.ordered_placeholders):
-            # 标签
-            ttk.Label(self.input_scrollable_frame, text=f"{placeholder}:").grid(row=i, column=0, sticky=tk.W, pady=2)
-            
+        today = datetime.now().strftime('%Y年%m月%d日')
+        fields = []
+        values = {}
+        for placeholder in self.ordered_placeholders:
             # 获取占位符配置
             config = self.get_placeholder_config(placeholder)
             
-            # 根据配置创建不同类型的输入控件
+            # 根据配置使用不同类型的输入控件
             if config.get("type") == "combobox":
-                # 创建下拉框，宽度增加到原来的1.5倍 (25 -> 37)
-                options = config.get("options", [])
-                combobox = ttk.Combobox(self.input_scrollable_frame, values=options, width=37, state="readonly")
-                combobox.grid(row=i, column=1, sticky=(tk.W, tk.E), pady=2, padx=(5, 0))
-                self.input_fields[placeholder] = combobox
+                fields.append({"key": placeholder, "label": f"{placeholder}:", "type": "combobox",
+                               "options": config.get("options", [])})
             elif config.get("type") == "date":
-                # 创建日期选择框
-                date_frame = ttk.Frame(self.input_scrollable_frame)
-                date_frame.grid(row=i, column=1, sticky=(tk.W, tk.E), pady=2, padx=(5, 0))
-                
-                # 日期显示标签
-                today = datetime.now().strftime('%Y年%m月%d日')
-                date_label = ttk.Label(date_frame, text=today)
-                date_label.pack(side=tk.LEFT)
-                
-                # 修改日期按钮
-                def create_modify_command(label_widget):
-                    def modify_command():
-                        self.modify_placeholder_date(label_widget)
-                    return modify_command
-                
-                modify_button = ttk.Button(date_frame, text="选择日期", command=create_modify_command(date_label), width=8)
-                modify_button.pack(side=tk.LEFT, padx=(5, 0))
-                
-                self.input_fields[placeholder] = date_label
+                fields.append({"key": placeholder, "label": f"{placeholder}:", "type": "date"})
+                values[placeholder] = today
             else:
-                # 创建普通文本框，宽度增加到原来的1.5倍 (25 -> 37)
-                entry = ttk.Entry(self.input_scrollable_frame, width=37)
-                entry.grid(row=i, column=1, sticky=(tk.W, tk.E), pady=2, padx=(5, 0))
-                self.input_fields[placeholder] = entry
-            
-            # 注意：已移除上移按钮，简化用户界面
+                fields.append({"key": placeholder, "label": f"{placeholder}:", "type": "text"})
         
         # 添加日期字段（自动生成，可选择修改）
-        date_row = len(self.ordered_placeholders)
-        ttk.Label(self.input_scrollable_frame, text="日期（自动生成）:").grid(row=date_row, column=0, sticky=tk.W, pady=2)
-        
-        # 创建日期显示和修改区域
-        date_frame = ttk.Frame(self.input_scrollable_frame)
-        date_frame.grid(row=date_row, column=1, sticky=tk.W, pady=2, padx=(5, 0))
-        
-        # 日期显示标签
-        today = datetime.now().strftime('%Y年%m月%d日')
-        self.date_label = ttk.Label(date_frame, text=today)
-        self.date_label.pack(side=tk.LEFT)
-        
-        # 修改日期按钮
-        ttk.Button(date_frame, text="选择日期", command=self.modify_date, width=8).pack(side=tk.LEFT, padx=(5, 0))
-        
-        # 将日期存储在input_fields中
-        self.input_fields['日期'] = today
-        
-        # 配置输入区域的列权重
-        self.input_scrollable_frame.columnconfigure(1, weight=1)
+        fields.append({"key": '日期', "label": "日期（自动生成）:", "type": "date"})
+        values['日期'] = today
         
         # 加载该方案的上次用户输入以正确显示下拉框选项
         if self.current_scheme:
             last_inputs = self.load_user_inputs_for_scheme(self.current_scheme)
             if last_inputs:
-                # 更新下拉框中的选项和选中值
+                combobox_fields = {field["key"] for field in fields if field["type"] == "combobox"}
                 for placeholder, value in last_inputs.items():
-                    if placeholder in self.input_fields:
-                        widget = self.input_fields[placeholder]
-                        if isinstance(widget, ttk.Combobox):
-                            # 对于下拉框，检查值是否在选项中，如果不在则添加
-                            current_values = list(widget['values'])
-                            if value not in current_values and value:
-                                # 添加新值到选项中
-                                current_values.append(value)
-                                widget['values'] = current_values
-                            # 设置当前值
-                            widget.set(value)
-        
-    def modify_placeholder_date(self, date_label):
+                    # 对于下拉框，值不在选项中时会添加到选项中
+                    if placeholder in combobox_fields:
+                        values[placeholder] = value
+        
+        self.input_form.set_fields(fields, values)
+    
+    def on_input_date_button(self, placeholder):
+        """
+        点击录入区中日期字段的"选择日期"按钮
+        :param placeholder: 占位符名称
+        """
+        if placeholder == '日期':
+            self.modify_date()
+        else:
+            self.modify_placeholder_date(placeholder)
+        
+    def modify_placeholder_date(self, placeholder):
         """
         修改占位符日期功能
-        :param date_label: 日期标签控件
+        :param placeholder: 日期类型的占位符名称
         """
         # 创建日期修改对话框
         date_dialog = tk.Toplevel(self.root)
@@ -3660,7 +3811,7 @@ class DocumentProcessorUI:
         date_dialog.resizable(False, False)
         
         # 获取当前日期值
-        current_date = date_label.cget("text")
+        current_date = self.input_form.get_value(placeholder)
         
         # 解析当前日期
         try:
@@ -3709,13 +3860,8 @@ class DocumentProcessorUI:
         
         def use_today():
             today = datetime.now().strftime('%Y年%m月%d日')
-            date_label.config(text=today)
-            # 更新存储的值
-            for placeholder, widget in self.input_fields.items():
-                if widget == date_label:
-                    # 保持控件引用不变，只更新值
-                    self.input_fields[placeholder] = today
-                    break
+            # 更新存储的值和显示
+            self.input_form.set_value(placeholder, today)
             date_dialog.destroy()
         
         def confirm_date():
@@ -3730,14 +3876,8 @@ class DocumentProcessorUI:
                 # 格式化为指定格式
                 new_date = f"{year}年{month:02d}月{day:02d}日"
                 
-                # 更新显示
-                date_label.config(text=new_date)
-                # 更新存储的值
-                for placeholder, widget in self.input_fields.items():
-                    if widget == date_label:
-                        # 保持控件引用不变，只更新值
-                        self.input_fields[placeholder] = new_date
-                        break
+                # 更新存储的值和显示
+                self.input_form.set_value(placeholder, new_date)
                 
                 date_dialog.destroy()
             except ValueError:
@@ -3809,7 +3949,7 @@ class DocumentProcessorUI:
         date_dialog.resizable(False, False)
         
         # 获取当前日期值
-        current_date = self.input_fields.get('日期', datetime.now().strftime('%Y年%m月%d日'))
+        current_date = self.input_form.get_value('日期') or datetime.now().strftime('%Y年%m月%d日')
         
         # 解析当前日期
         try:
@@ -3858,8 +3998,7 @@ class DocumentProcessorUI:
         
         def use_today():
             today = datetime.now().strftime('%Y年%m月%d日')
-            self.date_label.config(text=today)
-            self.input_fields['日期'] = today
+            self.input_form.set_value('日期', today)
             date_dialog.destroy()
         
         def confirm_date():
@@ -3875,8 +4014,7 @@ class DocumentProcessorUI:
                 new_date = f"{year}年{month:02d}月{day:02d}日"
                 
                 # 更新显示和存储
-                self.date_label.config(text=new_date)
-                self.input_fields['日期'] = new_date
+                self.input_form.set_value('日期', new_date)
                 
                 date_dialog.destroy()
             except ValueError:
@@ -3939,27 +4077,7 @@ class DocumentProcessorUI:
             return
         
         # 收集用户输入
-        user_inputs = {}
-        for placeholder, widget in self.input_fields.items():
-            if placeholder == '日期':
-                user_inputs[placeholder] = widget  # 日期字段是字符串
-                continue
-                    
-            if isinstance(widget, ttk.Entry):
-                user_inputs[placeholder] = widget.get()
-            elif isinstance(widget, ttk.Combobox):
-                user_inputs[placeholder] = widget.get()
-            elif isinstance(widget, ttk.Label):
-                # 日期标签控件
-                user_inputs[placeholder] = widget.cget("text")
-            else:
-                # 对于已更新为字符串值的日期类型占位符，直接使用值
-                user_inputs[placeholder] = widget
-        
-        # 确保日期字段存在
-        if '日期' not in user_inputs:
-            today = datetime.now().strftime('%Y年%m月%d日')
-            user_inputs['日期'] = today
+        user_inputs = self.collect_user_inputs()
         
         # 保存当前用户输入到历史记录
         self.save_to_history(user_inputs)
@@ -3972,61 +4090,15 @@ class DocumentProcessorUI:
     def save_to_history(self, user_inputs):
         """
         保存用户输入到历史记录
+        相同内容的记录只保留一条，重复保存时更新时间戳和使用次数并移到最前面
         :param user_inputs: 用户输入字典
         """
         try:
-            # 读取现有历史记录
-            history_data = {}
-            
-            if os.path.exists("app_data.json"):
-                with open("app_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    history_data = data.get("history", {})
-            
-            # 确保当前方案在历史记录中存在
-            if self.current_scheme not in history_data:
-                history_data[self.current_scheme] = []
-            
-            # 添加时间戳到记录中
-            record = user_inputs.copy()
-            record["__timestamp__"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # 检查是否与最近的一条记录完全相同（除了时间戳）
-            should_save = True
-            if history_data[self.current_scheme]:
-                latest_record = history_data[self.current_scheme][0].copy()
-                # 移除时间戳字段进行比较
-                latest_record.pop("__timestamp__", None)
-                current_record = record.copy()
-                current_record.pop("__timestamp__", None)
-                
-                # 如果内容完全相同，则不保存
-                if latest_record == current_record:
-                    should_save = False
+            # 只写入当前方案的分片文件
+            self.data_store.add_history_record(self.current_scheme, user_inputs)
             
-            if should_save:
-                # 将新记录添加到开头
-                history_data[self.current_scheme].insert(0, record)
-                
-                # 限制最多保存10条记录
-                if len(history_data[self.current_scheme]) > 20:
-                    history_data[self.current_scheme] = history_data[self.current_scheme][:20]
-                
-                # 读取所有数据并更新历史记录部分
-                if os.path.exists("app_data.json"):
-                    with open("app_data.json", "r", encoding="utf-8") as f:
-                        all_data = json.load(f)
-                else:
-                    all_data = {}
-                    
-                all_data["history"] = history_data
-                
-                # 保存历史记录
-                with open("app_data.json", "w", encoding="utf-8") as f:
-                    json.dump(all_data, f, ensure_ascii=False, indent=2)
-                
-                # 更新下拉框内容
-                self.update_history_combobox()
+            # 更新下拉框内容
+            self.update_history_combobox()
             
         except Exception as e:
             print(f"保存历史记录时出错: {e}")
@@ -4036,33 +4108,27 @@ class DocumentProcessorUI:
         更新历史记录下拉框内容
         """
         try:
-            if not os.path.exists("app_data.json"):
+            if not self.current_scheme:
+                self.history_hashes = []
                 self.history_combobox['values'] = []
                 return
             
-            with open("app_data.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            history_data = data.get("history", {})
+            # 创建显示文本列表，同时记录每项对应的记录哈希
+            history_texts = []
+            history_hashes = []
+            for record in self.data_store.get_history(self.current_scheme):
+                # 使用第一个非空的录入内容作为标识
+                display_info = "未命名记录"
+                # 遍历录入字段，找到第一个非空的内容
+                for value in record["fields"].values():
+                    if value:
+                        display_info = value
+                        break
+                history_texts.append(display_info)
+                history_hashes.append(record["hash"])
             
-            # 获取当前方案的历史记录
-            if self.current_scheme in history_data:
-                # 创建显示文本列表
-                history_texts = []
-                for record in history_data[self.current_scheme]:
-                    # 使用第一个非空的录入内容作为标识
-                    display_info = "未命名记录"
-                    # 遍历录入字段，找到第一个非空的内容
-                    for key in record:
-                        # 跳过时间戳和日期字段
-                        if key not in ["__timestamp__", "日期"] and record[key]:
-                            display_info = record[key]
-                            break
-                    history_texts.append(display_info)
-                
-                self.history_combobox['values'] = history_texts
-            else:
-                self.history_combobox['values'] = []
+            self.history_hashes = history_hashes
+            self.history_combobox['values'] = history_texts
                 
         except Exception as e:
             print(f"更新历史记录下拉框时出错: {e}")
@@ -4078,48 +4144,23 @@ class DocumentProcessorUI:
             if selected_index < 0:
                 return
             
-            # 读取历史记录
-            if not os.path.exists("app_data.json"):
-                return
-            
-            with open("app_data.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            history_data = data.get("history", {})
-            
-            # 获取当前方案的历史记录
-            if self.current_scheme not in history_data:
-                return
-            
-            # 获取选中的记录
-            if selected_index >= len(history_data[self.current_scheme]):
+            # 按下拉框生成时记录的内容哈希查找选中的记录（其他实例可能同时插入了记录，不能按位置查找）
+            record = None
+            if selected_index < len(self.history_hashes):
+                record_hash = self.history_hashes[selected_index]
+                for history_record in self.data_store.get_history(self.current_scheme):
+                    if history_record["hash"] == record_hash:
+                        record = history_record
+                        break
+            if record is None:
+                self.log_and_status("未找到选中的历史记录")
                 return
             
-            record = history_data[self.current_scheme][selected_index]
-            
-            # 填充到输入框
-            for placeholder, value in record.items():
-                # 跳过时间戳字段
-                if placeholder == "__timestamp__":
-                    continue
-                
-                # 查找对应的输入控件
-                if placeholder in self.input_fields:
-                    widget = self.input_fields[placeholder]
-                    if isinstance(widget, ttk.Entry):
-                        widget.delete(0, tk.END)
-                        widget.insert(0, value)
-                    elif isinstance(widget, ttk.Combobox):
-                        # 检查值是否在选项中，如果不在则添加
-                        current_values = list(widget['values'])
-                        if value not in current_values and value:
-                            # 添加新值到选项中
-                            current_values.append(value)
-                            widget['values'] = current_values
-                        # 设置当前值
-                        widget.set(value)
-                    elif isinstance(widget, ttk.Label):  # 日期标签
-                        widget.config(text=value)
+            # 填充到输入框（下拉框中没有的值会添加到选项中，自动生成的日期保持不变）
+            for placeholder, value in record["fields"].items():
+                if placeholder != '日期':
+                    self.input_form.set_value(placeholder, value, refresh=False)
+            self.input_form.refresh()
             
             self.log_and_status("已加载历史记录")
             
@@ -4143,25 +4184,7 @@ class DocumentProcessorUI:
         # 处理模板
         try:
             self.update_status("开始生成文档...")
-            # 收集用户输入
-            user_inputs = {}
-            for placeholder, widget in self.input_fields.items():
-                if placeholder == '日期':
-                    user_inputs[placeholder] = widget  # 日期字段是字符串
-                    continue
-                        
-                if isinstance(widget, ttk.Entry):
-                    user_inputs[placeholder] = widget.get()
-                elif isinstance(widget, ttk.Combobox):
-                    user_inputs[placeholder] = widget.get()
-                elif isinstance(widget, ttk.Label):
-                    # 日期标签控件
-                    user_inputs[placeholder] = widget.cget("text")
-            
-            # 确保日期字段存在
-            if '日期' not in user_inputs:
-                today = datetime.now().strftime('%Y年%m月%d日')
-                user_inputs['日期'] = today
+            user_inputs = self.collect_user_inputs()
             self.generated_files = self.processor.process_templates(self.template_files, user_inputs, self.output_dir)
             self.log_and_status(f"成功: 文档生成完成！文件已保存到 {self.output_dir} 目录中。")
             
@@ -4170,6 +4193,75 @@ class DocumentProcessorUI:
         except Exception as e:
             self.log_and_status(f"错误: 生成文档时出错：{str(e)}")
 
+    def collect_user_inputs(self):
+        """
+        收集输入区域中的用户输入
+        :return: 用户输入字典
+        """
+        user_inputs = self.input_form.get_values()
+        
+        # 确保日期字段存在
+        if '日期' not in user_inputs:
+            today = datetime.now().strftime('%Y年%m月%d日')
+            user_inputs['日期'] = today
+        
+        return user_inputs
+
+    def generate_and_merge_pdf(self):
+        """
+        生成文档并合并为PDF（在新线程中执行）
+        """
+        thread = threading.Thread(target=self._generate_and_merge_pdf_thread)
+        thread.daemon = True  # 设置为守护线程，确保主程序退出时线程也会退出
+        thread.start()
+
+    def _generate_and_merge_pdf_thread(self):
+        """
+        在线程中以流水线方式生成文档、转换并合并PDF：每个文档生成后立即开始转换，转换完成后按顺序追加到合并文档
+        """
+        try:
+            self.update_status("开始生成并合并PDF...")
+            user_inputs = self.collect_user_inputs()
+            
+            # 在主线程中创建进度窗口，只显示需要转换的文件
+            all_files = []
+            for template_file in self.template_files:
+                name, ext = os.path.splitext(os.path.basename(template_file))
+                if ext.lower() in (".docx", ".xlsx", ".pdf"):
+                    all_files.append(f"{name}_已填充{ext}")
+            self._open_pdf_progress_window(len(all_files))
+            
+            # 初始化所有文件状态为等待
+            for filename in all_files:
+                if hasattr(self, 'pdf_progress_window') and self.pdf_progress_window:
+                    self.root.after(0, lambda f=filename: self.update_pdf_progress(f, "waiting"))
+            
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            merged_pdf_path = os.path.join(self.output_dir, f"合并文档_{timestamp}.pdf")
+            
+            # 设置进度回调
+            self.processor.set_progress_callback(self._pdf_progress_callback)
+            # 单个PDF保存在私有临时目录中，合并后自动删除
+            stats = {}
+            self.generated_files = self.processor.generate_and_merge_pdf(
+                self.template_files, user_inputs, self.output_dir, merged_pdf_path,
+                status_callback=self.update_status, merge_result=stats
+            )
+            
+            self.log_and_status(f"成功: 文档已生成并合并为PDF！文件已保存为: {os.path.basename(merged_pdf_path)}"
+                                f"{format_peak_memory(stats.get('peak_memory'))}")
+            
+            # 启用关闭按钮并在任务完成后自动关闭进度窗口
+            if hasattr(self, 'pdf_progress_window') and self.pdf_progress_window:
+                self.root.after(0, lambda: self.close_progress_button.config(state=tk.NORMAL))
+                # 任务完成后2秒自动关闭进度窗口
+                self.root.after(2000, self._auto_close_pdf_progress)
+        except Exception as e:
+            self.log_and_status(f"错误: 生成并合并PDF时出错：{str(e)}")
+            # 出错时也自动关闭进度窗口
+            if hasattr(self, 'pdf_progress_window') and self.pdf_progress_window:
+                self.root.after(2000, self._auto_close_pdf_progress)
+
     def merge_to_pdf(self):
         """
         将生成的文档合并为PDF（在新线程中执行）
@@ -4183,83 +4275,45 @@ class DocumentProcessorUI:
         """
         在线程中执行PDF合并操作
         """
-        # 修改为直接读取输出文件夹中的所有文档
         if not os.path.exists(self.output_dir):
             self.log_and_status("警告: 输出文件夹不存在")
             return
         
-        # 获取输出文件夹中的所有文档文件
-        docx_files = []
-        xlsx_files = []
-        
-        for file in os.listdir(self.output_dir):
-            file_path = os.path.join(self.output_dir, file)
-            if os.path.isfile(file_path):
-                if file.endswith('.docx') and not file.endswith('.pdf'):
-                    docx_files.append(file_path)
-                elif file.endswith('.xlsx'):
-                    xlsx_files.append(file_path)
-        
-        if not docx_files and not xlsx_files:
+        file_paths = [path for path in self.get_job_files() if path.lower().endswith(('.docx', '.xlsx', '.pdf'))]
+        if not file_paths:
             self.log_and_status("警告: 输出文件夹中没有找到可转换为PDF的文档")
             return
         
         try:
             # 初始化文件状态跟踪
-            all_files = [os.path.basename(f) for f in docx_files + xlsx_files]
+            all_files = [os.path.basename(f) for f in file_paths]
             
             # 在主线程中创建进度窗口
-            self.root.after(0, lambda: self._create_pdf_progress_window(len(all_files)))
-            
-            # 等待进度窗口创建完成
-            import time
-            time.sleep(0.1)
+            self._open_pdf_progress_window(len(all_files))
             
             # 初始化所有文件状态为等待
             for filename in all_files:
                 if hasattr(self, 'pdf_progress_window') and self.pdf_progress_window:
                     self.root.after(0, lambda f=filename: self.update_pdf_progress(f, "waiting"))
             
-            pdf_files = []  # 初始化pdf_files列表
-            
-            # 将生成的Word文档转换为PDF（顺序处理）
-            if docx_files:
-                self.update_status("开始转换Word文档为PDF...")
-                # 设置进度回调
-                self.processor.set_progress_callback(self._pdf_progress_callback)
-                pdf_files = self.processor.convert_docx_to_pdf(
-                    docx_files, 
-                    status_callback=self.update_status
-                )
-                self.update_status(f"成功转换 {len(pdf_files)} 个PDF文件")
-            
-            # 将生成的Excel文件转换为PDF（顺序处理）
-            if xlsx_files:
-                self.update_status("开始转换Excel文件为PDF...")
-                # 设置进度回调
-                self.processor.set_progress_callback(self._pdf_progress_callback)
-                xlsx_pdf_files = self.processor.convert_xlsx_to_pdf(
-                    xlsx_files, 
-                    status_callback=self.update_status
-                )
-                pdf_files.extend(xlsx_pdf_files)
-                self.update_status(f"成功转换Excel为PDF {len(xlsx_pdf_files)} 个文件")
-            
-            # 检查是否有成功转换的PDF文件
-            if not pdf_files:
-                self.log_and_status("警告: 没有成功转换为PDF的文件")
-                return
-            
-            # 合并PDF文件
+            # 按方案中模板的顺序转换并合并（多个转换进程并行处理），
+            # 与上次合并相比内容未变化的文档直接复用上次合并文档中的页面
+            pool = self.processor.get_converter_pool()
+            self.update_status(f"开始转换文档为PDF（{pool.size}个文件同时转换）...")
+            # 设置进度回调
+            self.processor.set_progress_callback(self._pdf_progress_callback)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             merged_pdf_path = os.path.join(self.output_dir, f"合并文档_{timestamp}.pdf")
-            self.update_status(f"开始合并PDF文件到: {merged_pdf_path}")
-            self.processor.merge_pdfs(pdf_files, merged_pdf_path, status_callback=self.update_status)
-            
-            # 清理单个PDF文件
-            self.processor.cleanup_single_pdfs(pdf_files, status_callback=self.update_status)
+            stats = self.processor.merge_documents_to_pdf(
+                file_paths,
+                merged_pdf_path,
+                status_callback=self.update_status
+            )
+            if stats["reused"]:
+                self.update_status(f"已复用 {stats['reused']} 个未变化的文档，转换 {len(all_files) - stats['reused']} 个文档")
             
-            self.log_and_status(f"成功: PDF合并完成！文件已保存为: {os.path.basename(merged_pdf_path)}")
+            self.log_and_status(f"成功: PDF合并完成！文件已保存为: {os.path.basename(merged_pdf_path)}"
+                                f"{format_peak_memory(stats.get('peak_memory'))}")
             
             # 启用关闭按钮并在任务完成后自动关闭进度窗口
             if hasattr(self, 'pdf_progress_window') and self.pdf_progress_window:
@@ -4267,14 +4321,68 @@ class DocumentProcessorUI:
                 # 任务完成后2秒自动关闭进度窗口
                 self.root.after(2000, self._auto_close_pdf_progress)
         except Exception as e:
+            # 使用状态栏显示替代弹窗提示，符合用户偏好；错误信息中包含转换失败的文件及原因
             error_msg = f"错误: 合并PDF时出错：{str(e)}"
             self.log_and_status(error_msg)
-            # 使用状态栏显示替代弹窗提示，符合用户偏好
-            self.update_status("请重启软件并关闭所有office相关软件。")
             # 出错时也自动关闭进度窗口
             if hasattr(self, 'pdf_progress_window') and self.pdf_progress_window:
                 self.root.after(2000, self._auto_close_pdf_progress)
 
+    def merge_to_docx(self):
+        """
+        将生成的Word文档合并为一个Word文档（在新线程中执行）
+        """
+        thread = threading.Thread(target=self._merge_to_docx_thread)
+        thread.daemon = True  # 设置为守护线程，确保主程序退出时线程也会退出
+        thread.start()
+
+    def _merge_to_docx_thread(self):
+        """
+        在线程中按方案中模板的顺序直接拼接Word文档
+        """
+        if not os.path.exists(self.output_dir):
+            self.log_and_status("警告: 输出文件夹不存在")
+            return
+        
+        job_files = self.get_job_files()
+        docx_files = [path for path in job_files if path.lower().endswith('.docx')]
+        if not docx_files:
+            self.log_and_status("警告: 输出文件夹中没有找到可合并的Word文档")
+            return
+        
+        # Excel表格和PDF表单不能拼接到Word文档中
+        skipped = [os.path.basename(path) for path in job_files if path.lower().endswith(('.xlsx', '.pdf'))]
+        if skipped:
+            self.log_and_status(f"提示: Excel表格和PDF表单不能合并到Word文档中，已跳过: {', '.join(skipped)}")
+        
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            merged_docx_path = os.path.join(self.output_dir, f"合并文档_{timestamp}.docx")
+            self.update_status(f"开始合并Word文档到: {merged_docx_path}")
+            self.processor.merge_docx(docx_files, merged_docx_path, status_callback=self.update_status)
+            self.log_and_status(f"成功: Word文档合并完成！文件已保存为: {os.path.basename(merged_docx_path)}")
+        except Exception as e:
+            self.log_and_status(f"错误: 合并Word文档时出错：{str(e)}")
+
+    def get_job_files(self):
+        """
+        获取需要合并的文档：优先使用本次运行中生成的文档，其次使用输出文件夹中的生成记录，
+        都没有时才使用输出文件夹中的全部文档（按文件名排序）
+        :return: 按合并顺序排列的文档路径列表
+        """
+        output_dir = os.path.abspath(self.output_dir)
+        if self.generated_files and all(os.path.dirname(os.path.abspath(path)) == output_dir
+                                        for path in self.generated_files):
+            return [path for path in self.generated_files if os.path.isfile(path)]
+        
+        job_files = self.processor.load_job_manifest(self.output_dir)
+        if job_files is not None:
+            return job_files
+        
+        self.update_status("未找到生成记录，将合并输出文件夹中的全部文档")
+        return [os.path.join(self.output_dir, name) for name in sorted(os.listdir(self.output_dir))
+                if os.path.isfile(os.path.join(self.output_dir, name)) and not name.startswith("合并文档_")]
+
     def _auto_close_pdf_progress(self):
         """
         自动关闭PDF进度窗口
@@ -4295,6 +4403,22 @@ class DocumentProcessorUI:
         if hasattr(self, 'pdf_progress_window') and self.pdf_progress_window:
             self.root.after(0, lambda: self.update_pdf_progress(filename, status))
     
+    def _open_pdf_progress_window(self, total_files):
+        """
+        在主线程中创建PDF转换进度窗口，并等待窗口创建完成（在工作线程中调用）
+        :param total_files: 总文件数
+        """
+        created = threading.Event()
+        
+        def create():
+            try:
+                self._create_pdf_progress_window(total_files)
+            finally:
+                created.set()
+        
+        self.root.after(0, create)
+        created.wait()
+
     def _create_pdf_progress_window(self, total_files):
         """
         创建PDF转换进度窗口
@@ -0,0 +1,372 @@
+import os
+import copy
+import hashlib
+
+from docx import Document
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.oxml import serialize_part_xml
+from docx.opc.packuri import PackURI
+from docx.opc.part import XmlPart
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.parts.numbering import NumberingPart
+
+from pdf_cache import compute_document_hash
+
+# 正文中通过关系编号引用其他部件的属性（图片、超链接、页眉页脚、嵌入对象、SmartArt等）
+RELATIONSHIP_ATTRIBUTES = tuple(qn(f"r:{name}") for name in ("id", "embed", "link", "pict", "dm", "lo", "qs", "cs"))
+# 正文中引用样式的元素
+STYLE_REFERENCE_TAGS = (qn("w:pStyle"), qn("w:rStyle"), qn("w:tblStyle"))
+# 样式定义中引用其他样式的元素
+STYLE_LINK_TAGS = (qn("w:basedOn"), qn("w:link"), qn("w:next"))
+# 图片等媒体文件所在目录
+MEDIA_PREFIX = "/word/media/"
+# 脚注和尾注：元素名称 -> (关系类型, 内容类型, 部件名称)
+NOTE_TYPES = {
+    "footnote": (RT.FOOTNOTES, CT.WML_FOOTNOTES, "/word/footnotes.xml"),
+    "endnote": (RT.ENDNOTES, CT.WML_ENDNOTES, "/word/endnotes.xml"),
+}
+# 脚注/尾注部件中的分隔符（不是正文引用的注释），新建部件时从源文档复制
+NOTE_SEPARATOR_TYPES = ("separator", "continuationSeparator", "continuationNotice")
+
+
+class DocxConcatenator:
+    """
+    Word文档拼接器：不经过转换程序，直接把多个Word文档首尾相接合并为一个文档
+    每个文档作为单独的一节，保留各自的页面设置和页眉页脚；复制正文时把其中引用的关系、
+    样式、编号定义和脚注尾注一并合并到目标文档，内容相同的图片只保存一份
+    合并结果只取决于输入文档的内容，相同的输入得到相同的合并文档
+    """
+
+    def __init__(self, first_path):
+        """
+        :param first_path: 第一个Word文档的路径，合并文档使用它的样式和文档设置
+        """
+        self.document = Document(first_path)
+        self.part = self.document.part
+        self.body = self.document.element.body
+        self.styles = self.document.styles.element
+        self.style_ids = {style.get(qn("w:styleId")) for style in self.styles.findall(qn("w:style"))}
+        self.numbering = None  # 编号定义，需要时才获取
+        self.notes = {}  # 脚注/尾注元素名称 -> (合并文档中的部件, 部件的根元素)，需要时才获取
+        self.adopted = {}  # 其他文档中的部件 -> 合并文档中使用的部件
+        self.appended = 0  # 已追加的文档数量
+
+        self.partnames = set()  # 已使用的部件名称
+        self.media = {}  # 媒体文件内容哈希 -> 部件
+        for part in self.part.package.iter_parts():
+            self.partnames.add(str(part.partname))
+            if str(part.partname).startswith(MEDIA_PREFIX):
+                self.media[hashlib.sha1(part.blob).hexdigest()] = part
+
+    def append(self, docx_path):
+        """
+        把一个Word文档追加到合并文档末尾，从新的一节开始
+        :param docx_path: Word文档路径
+        """
+        # 同一文档追加多次时，各次复制的列表也要使用不同的nsid
+        self.appended += 1
+        seed = f"{compute_document_hash(docx_path)}|{self.appended}"
+        source = Document(docx_path)
+        source_body = source.element.body
+        source_sect_pr = source_body.find(qn("w:sectPr"))
+        elements = [copy.deepcopy(child) for child in source_body if child.tag != qn("w:sectPr")]
+        sect_pr = copy.deepcopy(source_sect_pr if source_sect_pr is not None else self.body.find(qn("w:sectPr")))
+
+        # 引用源文档主体部件的关系指向合并文档
+        self.adopted[source.part] = self.part
+        notes = self._import_notes(elements, source)
+        copied_styles = self._import_styles(elements + notes, source)
+        self._import_numbering(elements + copied_styles + notes, source, seed)
+        self._import_relationships(elements + [sect_pr], source.part)
+
+        # 上一个文档的最后一节在此结束，追加的文档使用自己的节属性
+        body_sect_pr = self._end_section()
+        for element in elements:
+            body_sect_pr.addprevious(element)
+        body_sect_pr.getparent().replace(body_sect_pr, sect_pr)
+
+    def _end_section(self):
+        """
+        把正文末尾的节属性移到最后一个段落中，使当前内容成为单独的一节
+        :return: 正文末尾的节属性元素
+        """
+        body_sect_pr = self.body.find(qn("w:sectPr"))
+        last = body_sect_pr.getprevious()
+        if last is None or last.tag != qn("w:p"):
+            # 表格中不能放置节属性，添加一个空段落
+            last = OxmlElement("w:p")
+            body_sect_pr.addprevious(last)
+        p_pr = last.get_or_add_pPr()
+        if p_pr.find(qn("w:sectPr")) is None:
+            p_pr._insert_sectPr(copy.deepcopy(body_sect_pr))
+        return body_sect_pr
+
+    def _import_styles(self, elements, source):
+        """
+        复制正文用到、合并文档中没有的样式（同名样式以合并文档中的定义为准）
+        :return: 复制的样式元素列表
+        """
+        source_styles = {style.get(qn("w:styleId")): style for style in source.styles.element.findall(qn("w:style"))}
+        needed = set()
+        for element in elements:
+            for node in element.iter(*STYLE_REFERENCE_TAGS):
+                needed.add(node.get(qn("w:val")))
+
+        copied = []
+        while needed:
+            style_id = needed.pop()
+            if style_id in self.style_ids or style_id not in source_styles:
+                continue
+            style = copy.deepcopy(source_styles[style_id])
+            self.styles.append(style)
+            self.style_ids.add(style_id)
+            copied.append(style)
+            # 基于的样式、链接的样式和后续段落样式也需要存在
+            for node in style.iter(*STYLE_LINK_TAGS):
+                needed.add(node.get(qn("w:val")))
+        return copied
+
+    def _get_numbering(self):
+        """
+        获取合并文档的编号定义，没有时新建
+        """
+        if self.numbering is None:
+            try:
+                numbering_part = self.part.part_related_by(RT.NUMBERING)
+            except KeyError:
+                numbering_part = NumberingPart(self._unique_partname("/word/numbering.xml"), CT.WML_NUMBERING,
+                                               parse_xml(f"<w:numbering {nsdecls('w')}/>"), self.part.package)
+                self.part.relate_to(numbering_part, RT.NUMBERING)
+            self.numbering = numbering_part.element
+        return self.numbering
+
+    def _import_numbering(self, elements, source, seed):
+        """
+        复制正文用到的编号定义并重新编号，每个文档的列表各自从头开始编号
+        :param seed: 源文档的内容哈希和追加序号，用于生成列表的nsid
+        """
+        num_ids = set()
+        for element in elements:
+            for node in element.iter(qn("w:numId")):
+                if node.get(qn("w:val")) not in (None, "0"):
+                    num_ids.add(node.get(qn("w:val")))
+        if not num_ids:
+            return
+        try:
+            source_numbering = source.part.part_related_by(RT.NUMBERING).element
+        except KeyError:
+            return
+
+        numbering = self._get_numbering()
+        source_nums = {num.get(qn("w:numId")): num for num in source_numbering.findall(qn("w:num"))}
+        source_abstracts = {abstract.get(qn("w:abstractNumId")): abstract
+                            for abstract in source_numbering.findall(qn("w:abstractNum"))}
+        next_num_id = max([int(num.get(qn("w:numId"))) for num in numbering.findall(qn("w:num"))] or [0]) + 1
+        next_abstract_id = max([int(abstract.get(qn("w:abstractNumId")))
+                                for abstract in numbering.findall(qn("w:abstractNum"))] or [-1]) + 1
+
+        abstract_map = {}
+        num_map = {}
+        for num_id in sorted(num_ids, key=int):
+            num = source_nums.get(num_id)
+            if num is None:
+                continue
+            abstract_id = num.find(qn("w:abstractNumId")).get(qn("w:val"))
+            if abstract_id not in abstract_map and abstract_id in source_abstracts:
+                abstract = copy.deepcopy(source_abstracts[abstract_id])
+                abstract.set(qn("w:abstractNumId"), str(next_abstract_id))
+                # Word按nsid识别列表，使用新的nsid避免和其他文档的列表连续编号；
+                # nsid由源文档内容计算，合并相同的文档得到相同的结果
+                nsid = abstract.find(qn("w:nsid"))
+                if nsid is not None:
+                    digest = hashlib.sha1(f"{seed}|{abstract_id}".encode("utf-8")).hexdigest()
+                    nsid.set(qn("w:val"), digest[:8].upper())
+                # 所有abstractNum必须位于num之前
+                first_num = numbering.find(qn("w:num"))
+                if first_num is not None:
+                    first_num.addprevious(abstract)
+                else:
+                    numbering.append(abstract)
+                abstract_map[abstract_id] = str(next_abstract_id)
+                next_abstract_id += 1
+
+            new_num = copy.deepcopy(num)
+            new_num.set(qn("w:numId"), str(next_num_id))
+            new_num.find(qn("w:abstractNumId")).set(qn("w:val"), abstract_map.get(abstract_id, abstract_id))
+            numbering.append(new_num)
+            num_map[num_id] = str(next_num_id)
+            next_num_id += 1
+
+        for element in elements:
+            for node in element.iter(qn("w:numId")):
+                if node.get(qn("w:val")) in num_map:
+                    node.set(qn("w:val"), num_map[node.get(qn("w:val"))])
+
+    def _get_notes(self, kind, source_notes):
+        """
+        获取合并文档的脚注/尾注部件，没有时新建（复制源文档中的分隔符）
+        python-docx把脚注尾注作为二进制部件读取，解析后修改，保存时再写回
+        :param kind: footnote或endnote
+        :param source_notes: 源文档中脚注/尾注部件的根元素
+        :return: 部件的根元素
+        """
+        if kind not in self.notes:
+            reltype, content_type, partname = NOTE_TYPES[kind]
+            try:
+                part = self.part.part_related_by(reltype)
+                element = part.element if isinstance(part, XmlPart) else parse_xml(part.blob)
+            except KeyError:
+                element = parse_xml(f"<w:{kind}s {nsdecls('w')}/>")
+                for note in source_notes.findall(qn(f"w:{kind}")):
+                    if note.get(qn("w:type")) in NOTE_SEPARATOR_TYPES:
+                        element.append(copy.deepcopy(note))
+                part = XmlPart(self._unique_partname(partname), content_type, element, self.part.package)
+                self.part.relate_to(part, reltype)
+            self.notes[kind] = (part, element)
+        return self.notes[kind][1]
+
+    def _import_notes(self, elements, source):
+        """
+        复制正文引用的脚注和尾注并重新编号，正文中的引用改为新的编号
+        :return: 复制的脚注/尾注元素列表
+        """
+        copied = []
+        for kind, (reltype, _, _) in NOTE_TYPES.items():
+            references = [node for element in elements for node in element.iter(qn(f"w:{kind}Reference"))]
+            if not references:
+                continue
+            try:
+                source_part = source.part.part_related_by(reltype)
+            except KeyError:
+                continue
+            source_notes = parse_xml(source_part.blob)
+            source_by_id = {note.get(qn("w:id")): note for note in source_notes.findall(qn(f"w:{kind}"))}
+
+            notes = self._get_notes(kind, source_notes)
+            next_id = max([int(note.get(qn("w:id"))) for note in notes.findall(qn(f"w:{kind}"))] or [0]) + 1
+            id_map = {}
+            new_notes = []
+            for reference in references:
+                note_id = reference.get(qn("w:id"))
+                if note_id not in id_map:
+                    if note_id not in source_by_id:
+                        continue
+                    note = copy.deepcopy(source_by_id[note_id])
+                    note.set(qn("w:id"), str(next_id))
+                    new_notes.append(note)
+                    id_map[note_id] = str(next_id)
+                    next_id += 1
+                reference.set(qn("w:id"), id_map[note_id])
+
+            # 脚注中的图片、超链接等关系属于脚注部件
+            self._import_relationships(new_notes, source_part, self.notes[kind][0])
+            for note in new_notes:
+                notes.append(note)
+            copied.extend(new_notes)
+        return copied
+
+    def _import_relationships(self, elements, source_part, target_part=None):
+        """
+        把元素中引用的关系复制到合并文档，并改为合并文档中的关系编号
+        :param source_part: 元素所在的源文档部件
+        :param target_part: 元素复制到的合并文档部件，默认为主体部件
+        """
+        target_part = target_part or self.part
+        rel_map = {}  # 源文档中的关系编号 -> 合并文档中的关系编号
+        for element in elements:
+            for node in element.iter():
+                if not isinstance(node.tag, str):
+                    continue  # 注释等非元素节点
+                for attribute in RELATIONSHIP_ATTRIBUTES:
+                    r_id = node.get(attribute)
+                    if r_id is None or r_id not in source_part.rels:
+                        continue
+                    if r_id not in rel_map:
+                        rel = source_part.rels[r_id]
+                        if rel.is_external:
+                            rel_map[r_id] = target_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+                        else:
+                            rel_map[r_id] = target_part.relate_to(self._adopt_part(rel.target_part), rel.reltype)
+                    node.set(attribute, rel_map[r_id])
+
+    def _adopt_part(self, part):
+        """
+        把其他文档中的部件（图片、页眉页脚等）加入合并文档：重新命名避免与已有部件重名，
+        图片等媒体文件按内容去重，部件自身引用的部件一并加入
+        :return: 合并文档中使用的部件
+        """
+        if part in self.adopted:
+            return self.adopted[part]
+
+        partname = str(part.partname)
+        if partname.startswith(MEDIA_PREFIX):
+            digest = hashlib.sha1(part.blob).hexdigest()
+            if digest in self.media:
+                self.adopted[part] = self.media[digest]
+                return self.media[digest]
+            self.media[digest] = part
+
+        part.partname = self._unique_partname(partname)
+        self.adopted[part] = part
+        for rel in list(part.rels.values()):
+            if not rel.is_external:
+                target = self._adopt_part(rel.target_part)
+                if target is not rel.target_part:
+                    rel._target = target
+        return part
+
+    def _unique_partname(self, partname):
+        """
+        生成合并文档中未使用的部件名称，如/word/media/image1.png已存在时使用image2.png
+        """
+        if partname not in self.partnames:
+            self.partnames.add(partname)
+            return PackURI(partname)
+        base, ext = os.path.splitext(partname)
+        base = base.rstrip("0123456789")
+        index = 1
+        while f"{base}{index}{ext}" in self.partnames:
+            index += 1
+        partname = f"{base}{index}{ext}"
+        self.partnames.add(partname)
+        return PackURI(partname)
+
+    def save(self, output_path):
+        """
+        保存合并文档
+        :param output_path: 输出文件路径
+        """
+        # 各文档中的图形编号可能重复，Word打开时会提示内容有问题，统一重新编号
+        for index, node in enumerate(self.body.iter(qn("wp:docPr")), 1):
+            node.set("id", str(index))
+        # 修改过的二进制脚注尾注部件写回
+        for part, element in self.notes.values():
+            if not isinstance(part, XmlPart):
+                part._blob = serialize_part_xml(element)
+        self.document.save(output_path)
+
+
+def merge_docx_files(docx_paths, output_path, status_callback=None):
+    """
+    将多个Word文档按顺序拼接为一个Word文档，每个文档从新的一页（新的一节）开始
+    :param docx_paths: Word文档路径列表
+    :param output_path: 输出文件路径
+    :param status_callback: 状态更新回调函数
+    :return: 合并的文档数量
+    """
+    if not docx_paths:
+        raise ValueError("没有需要合并的Word文档")
+
+    concatenator = DocxConcatenator(docx_paths[0])
+    if status_callback:
+        status_callback(f"已合并: {os.path.basename(docx_paths[0])}")
+    for docx_path in docx_paths[1:]:
+        try:
+            concatenator.append(docx_path)
+        except Exception as e:
+            raise Exception(f"添加Word文档 {os.path.basename(docx_path)} 时出错: {str(e)}")
+        if status_callback:
+            status_callback(f"已合并: {os.path.basename(docx_path)}")
+    concatenator.save(output_path)
+    return len(docx_paths)
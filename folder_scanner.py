@@ -0,0 +1,74 @@
+import os
+
+from conversion_manifest import CONVERSION_JOURNAL_FILE, CONVERSION_MANIFEST_FILE
+from office_converter import TEMP_DIR_PREFIX
+from pdf_merge import JOB_MANIFEST_FILE, MERGE_MANIFEST_FILE
+
+# 扫描时跳过的子文件夹：转换时移入的不支持文件和已转换的源文件
+EXCLUDED_FOLDERS = ("[未转换]", "源文件")
+# 扫描时跳过的文件（程序生成的记录文件及其写入时的临时文件）
+IGNORED_FILES = (
+    CONVERSION_MANIFEST_FILE, CONVERSION_MANIFEST_FILE + ".tmp", CONVERSION_JOURNAL_FILE,
+    JOB_MANIFEST_FILE, JOB_MANIFEST_FILE + ".tmp",
+    MERGE_MANIFEST_FILE, MERGE_MANIFEST_FILE + ".tmp",
+)
+
+# 文件扩展名 -> 文件分类，其他扩展名为other
+FILE_KINDS = {
+    ".doc": "doc", ".wps": "doc", ".wpt": "doc",  # 需转换的文档
+    ".xls": "xls", ".et": "xls",  # 需转换的表格
+    ".docx": "docx",
+    ".xlsx": "xlsx",
+    ".pdf": "pdf",  # PDF表单模板
+}
+# 需要转换为新格式的文件分类
+LEGACY_KINDS = ("doc", "xls")
+
+
+def scan_template_folder(folder_path, recursive=True):
+    """
+    扫描模板文件夹，逐个返回其中的文件（生成器，调用方可以边扫描边显示）
+    使用os.scandir读取目录，文件类型和大小、修改时间直接取自目录项，不再逐个调用os.stat；
+    同一文件夹中的文件按名称排序，先返回文件再进入子文件夹
+    :param folder_path: 文件夹路径
+    :param recursive: 是否扫描子文件夹（跳过EXCLUDED_FOLDERS中的文件夹）
+    :return: 文件信息字典 {"path", "relpath", "name", "ext", "kind", "size", "mtime"}
+    """
+    pending = [(folder_path, "")]
+    while pending:
+        dir_path, rel_dir = pending.pop()
+        try:
+            with os.scandir(dir_path) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name.lower())
+        except OSError as e:
+            print(f"读取文件夹 {dir_path} 时出错: {e}")
+            continue
+
+        sub_dirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # 跳过转换中途退出时残留的临时文件夹
+                    if recursive and entry.name not in EXCLUDED_FOLDERS and not entry.name.startswith(TEMP_DIR_PREFIX):
+                        sub_dirs.append((entry.path, os.path.join(rel_dir, entry.name)))
+                    continue
+                if not entry.is_file() or entry.name in IGNORED_FILES:
+                    continue
+                # Windows下目录项已包含大小和修改时间，不需要再访问文件
+                stat = entry.stat()
+            except OSError:
+                continue
+
+            ext = os.path.splitext(entry.name)[1].lower()
+            yield {
+                "path": entry.path,
+                "relpath": os.path.join(rel_dir, entry.name),
+                "name": entry.name,
+                "ext": ext,
+                "kind": FILE_KINDS.get(ext, "other"),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+            }
+
+        # 按名称顺序进入子文件夹
+        pending.extend(reversed(sub_dirs))
@@ -0,0 +1,1166 @@
+import os
+import sys
+import time
+import queue
+import atexit
+import shutil
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import Future
+
+# 直接导入，确保PyInstaller能够正确打包
+from docx2pdf import convert as docx2pdf_convert
+
+# 自动选择时依次尝试的转换引擎
+AUTO_BACKEND_ORDER = ("office", "libreoffice", "docx2pdf")
+
+# 单个文件转换的最长等待时间（秒），超时后强制结束转换程序
+CONVERSION_TIMEOUT = 120
+
+# 单个文件转换超时后最多尝试的次数（含第一次）
+MAX_CONVERSION_ATTEMPTS = 2
+
+# 看门狗检查转换是否超时的间隔（秒）
+WATCHDOG_INTERVAL = 1
+
+# 强制结束转换程序后等待工作线程返回的时间（秒），仍未返回时放弃该线程并启动新的工作线程
+KILL_GRACE_PERIOD = 15
+
+# 支持批量转换的引擎一次最多转换的文件数量
+MAX_BATCH_SIZE = 8
+
+# 转换池中每个会话最多完成的转换次数，达到后重启转换程序以释放内存
+RECYCLE_AFTER_CONVERSIONS = 50
+
+# 工作线程空闲超过该时间（秒）后关闭转换程序，下次使用时重新启动
+WORKER_IDLE_TIMEOUT = 600
+
+# 自动设置并行转换数时的上限
+MAX_AUTO_WORKERS = 8
+
+# 批量转换时在输出文件夹中创建的临时文件夹的名称前缀（程序中途退出时可能残留）
+TEMP_DIR_PREFIX = ".tiandan_convert_"
+
+# 旧格式文件 -> 另存为的新格式（转换为新格式后才能识别和替换其中的占位符）
+LEGACY_FORMATS = {".wps": ".docx", ".wpt": ".docx", ".doc": ".docx", ".et": ".xlsx", ".xls": ".xlsx"}
+
+
+class ConverterBackend:
+    """
+    PDF转换引擎基类
+    """
+    name = ""  # 配置中使用的名称
+    display_name = ""  # 界面和日志中显示的名称
+    supported_extensions = (".docx", ".xlsx")  # 支持转换为PDF的文件类型
+    legacy_extensions = ()  # 支持另存为新格式的旧格式文件类型
+
+    def is_available(self):
+        """
+        检查当前系统是否可以使用该转换引擎
+        :return: 是否可用
+        """
+        return True
+
+    def supports(self, file_path, target_path=None):
+        """
+        检查是否支持转换该文件
+        :param file_path: 文件路径
+        :param target_path: 输出文件路径，为空或为PDF文件时检查能否转换为PDF
+        :return: 是否支持
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        if target_path is None or target_path.lower().endswith(".pdf"):
+            return ext in self.supported_extensions
+        return ext in self.legacy_extensions and os.path.splitext(target_path)[1].lower() == LEGACY_FORMATS[ext]
+
+    def version(self):
+        """
+        获取转换引擎的版本，用于区分不同版本的转换结果
+        :return: 版本字符串，无法获取时返回空字符串
+        """
+        return ""
+
+    def supports_batch(self):
+        """
+        检查是否支持在一次调用中转换多个文件（可以节省每次启动转换程序的时间）
+        :return: 是否支持
+        """
+        return False
+
+    def convert_to_pdf(self, source_path, pdf_path):
+        """
+        将文档转换为PDF，失败时抛出异常
+        :param source_path: 源文件路径
+        :param pdf_path: 输出PDF文件路径
+        """
+        raise NotImplementedError
+
+    def convert_legacy(self, source_path, target_path):
+        """
+        将旧格式文件（.wps、.doc、.et、.xls等）另存为.docx或.xlsx，失败时抛出异常
+        :param source_path: 源文件路径
+        :param target_path: 输出文件路径
+        """
+        raise NotImplementedError
+
+    def open_session(self, worker_id=0):
+        """
+        打开可重复使用的转换会话，转换池的每个工作线程持有自己的会话
+        :param worker_id: 工作线程编号，用于区分各会话独立使用的资源
+        :return: 转换会话对象
+        """
+        return ConverterSession(self)
+
+
+class ConverterSession:
+    """
+    转换会话，在多次转换之间保持转换程序运行，只能在创建它的线程中使用和关闭
+    默认实现每次直接调用转换引擎
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.conversion_count = 0  # 已处理的转换次数，用于定期重启转换程序
+
+    def convert_to_pdf(self, source_path, pdf_path):
+        """
+        将文档转换为PDF，失败时抛出异常
+        :param source_path: 源文件路径
+        :param pdf_path: 输出PDF文件路径
+        """
+        self.backend.convert_to_pdf(source_path, pdf_path)
+
+    def convert_legacy(self, source_path, target_path):
+        """
+        将旧格式文件另存为.docx或.xlsx，失败时抛出异常
+        :param source_path: 源文件路径
+        :param target_path: 输出文件路径
+        """
+        self.backend.convert_legacy(source_path, target_path)
+
+    def convert(self, source_path, target_path):
+        """
+        按输出文件类型转换：输出PDF文件时转换为PDF，否则将旧格式文件另存为新格式
+        :param source_path: 源文件路径
+        :param target_path: 输出文件路径
+        """
+        if target_path.lower().endswith(".pdf"):
+            self.convert_to_pdf(source_path, target_path)
+        else:
+            self.convert_legacy(source_path, target_path)
+
+    def convert_batch(self, file_pairs):
+        """
+        转换多个文件，引擎支持批量转换时只调用一次转换程序
+        :param file_pairs: (源文件路径, 输出文件路径) 列表，输出文件类型相同
+        :return: 与file_pairs对应的错误信息列表，转换成功的文件为None
+        """
+        errors = []
+        for source_path, target_path in file_pairs:
+            try:
+                self.convert(source_path, target_path)
+                errors.append(None)
+            except Exception as e:
+                errors.append(str(e))
+        return errors
+
+    def is_alive(self):
+        """
+        健康检查
+        :return: 会话是否仍可使用
+        """
+        return True
+
+    def kill(self):
+        """
+        强制结束会话的转换程序（由看门狗线程调用，转换卡住时使正在进行的转换出错返回）
+        """
+        pass
+
+    def close(self):
+        """
+        关闭会话并退出转换程序
+        """
+        pass
+
+
+class OfficeComBackend(ConverterBackend):
+    """
+    通过win32com调用WPS或Microsoft Office转换（仅Windows），优先使用WPS
+    """
+    name = "office"
+    display_name = "WPS/Office"
+    legacy_extensions = tuple(LEGACY_FORMATS)
+
+    # 文字处理和表格处理的COM程序标识，按优先级排列
+    WORD_PROG_IDS = (("KWPS.Application", "WPS"), ("Word.Application", "Microsoft Word"))
+    EXCEL_PROG_IDS = (("KET.Application", "WPS表格"), ("Excel.Application", "Microsoft Excel"))
+
+    def is_available(self):
+        if sys.platform != "win32":
+            return False
+        try:
+            import win32com.client
+            import pythoncom
+        except ImportError:
+            return False
+        return True
+
+    def version(self):
+        # 从注册表读取已安装程序的当前版本标识（如Word.Application.16）
+        try:
+            import winreg
+        except ImportError:
+            return ""
+        versions = []
+        for prog_id, _ in self.WORD_PROG_IDS + self.EXCEL_PROG_IDS:
+            try:
+                versions.append(winreg.QueryValue(winreg.HKEY_CLASSES_ROOT, f"{prog_id}\\CurVer"))
+            except OSError:
+                continue
+        return ",".join(versions)
+
+    def open_session(self, worker_id=0):
+        return OfficeComSession(self)
+
+    def convert_to_pdf(self, source_path, pdf_path):
+        # 单次转换：临时启动程序，转换完成后立即退出
+        session = self.open_session()
+        try:
+            session.convert_to_pdf(source_path, pdf_path)
+        finally:
+            session.close()
+
+    def convert_legacy(self, source_path, target_path):
+        session = self.open_session()
+        try:
+            session.convert_legacy(source_path, target_path)
+        finally:
+            session.close()
+
+
+class OfficeComSession(ConverterSession):
+    """
+    保持WPS/Office程序运行的COM会话，文字和表格程序在首次使用时启动
+    """
+
+    # 文字处理和表格处理程序的进程名称，用于找到会话启动的进程
+    PROCESS_NAMES = ("wps.exe", "et.exe", "winword.exe", "excel.exe")
+    # 多个会话同时启动程序时无法区分新进程属于哪个会话，因此依次启动
+    _start_lock = threading.Lock()
+
+    def __init__(self, backend):
+        super().__init__(backend)
+        import pythoncom
+
+        # 初始化COM线程，会话必须在同一线程中使用和关闭
+        pythoncom.CoInitialize()
+        self.word = None
+        self.excel = None
+        self.pids = set()  # 会话启动的程序进程号，转换卡住时用于强制结束
+
+    @classmethod
+    def _list_office_pids(cls):
+        """
+        列出正在运行的WPS/Office进程号
+        :return: 进程号集合
+        """
+        import win32api
+        import win32con
+        import win32process
+
+        pids = set()
+        for pid in win32process.EnumProcesses():
+            try:
+                handle = win32api.OpenProcess(
+                    win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ, False, pid)
+            except Exception:
+                continue
+            try:
+                name = os.path.basename(win32process.GetModuleFileNameEx(handle, 0)).lower()
+                if name in cls.PROCESS_NAMES:
+                    pids.add(pid)
+            except Exception:
+                pass
+            finally:
+                win32api.CloseHandle(handle)
+        return pids
+
+    def _start(self, prog_ids):
+        """
+        按优先级启动COM应用程序
+        :param prog_ids: (程序标识, 显示名称) 列表
+        :return: 应用程序对象
+        """
+        import win32com.client
+
+        for prog_id, app_name in prog_ids:
+            try:
+                with self._start_lock:
+                    existing_pids = self._list_office_pids()
+                    # DispatchEx总是启动独立的实例，不会接管或关闭用户自己打开的程序
+                    app = win32com.client.DispatchEx(prog_id)
+                    self.pids |= self._list_office_pids() - existing_pids
+                app.Visible = False  # 正确的属性名（大写V）
+                app.DisplayAlerts = False  # 禁用警告对话框
+                print(f"已启动{app_name}用于转换")
+                return app
+            except Exception:
+                continue
+        names = "或".join(app_name for _, app_name in prog_ids)
+        raise Exception(f"未找到可用的处理程序（{names}）")
+
+    def convert_to_pdf(self, source_path, pdf_path):
+        if source_path.lower().endswith(".xlsx"):
+            self._convert_workbook(source_path, pdf_path)
+        else:
+            self._convert_document(source_path, pdf_path)
+
+        if not os.path.exists(pdf_path):
+            raise Exception("win32com.client未能生成PDF文件")
+
+    def convert_legacy(self, source_path, target_path):
+        if target_path.lower().endswith(".xlsx"):
+            self._convert_workbook(source_path, target_path, file_format=51)  # 51表示XLSX格式
+        else:
+            self._convert_document(source_path, target_path, file_format=12)  # 12表示DOCX格式
+
+        if not os.path.exists(target_path):
+            raise Exception(f"win32com.client未能生成{os.path.splitext(target_path)[1].upper()[1:]}文件")
+
+    def _convert_document(self, source_path, target_path, file_format=17):
+        """
+        使用WPS文字或Word转换Word文档
+        :param file_format: 另存为的格式代码，默认17表示PDF格式
+        """
+        if self.word is None:
+            self.word = self._start(self.backend.WORD_PROG_IDS)
+
+        doc = None
+        try:
+            # 打开文档（以只读模式）
+            doc = self.word.Documents.Open(os.path.abspath(source_path), ReadOnly=True)
+
+            # 另存为目标格式
+            doc.SaveAs(os.path.abspath(target_path), FileFormat=file_format)
+        finally:
+            # 只关闭文档，程序保持运行供下一个文件使用
+            try:
+                if doc:
+                    doc.Close(SaveChanges=0)  # 0表示不保存更改直接关闭
+            except Exception:
+                pass
+
+    def _convert_workbook(self, source_path, target_path, file_format=None):
+        """
+        使用WPS表格或Excel转换Excel文件
+        :param file_format: 另存为的格式代码，为空时导出为PDF
+        """
+        if self.excel is None:
+            self.excel = self._start(self.backend.EXCEL_PROG_IDS)
+
+        workbook = None
+        try:
+            # 打开工作簿（以只读模式）
+            workbook = self.excel.Workbooks.Open(os.path.abspath(source_path), ReadOnly=True)
+
+            if file_format is None:
+                # 导出为PDF
+                workbook.ExportAsFixedFormat(0, os.path.abspath(target_path))  # 0表示PDF格式
+            else:
+                workbook.SaveAs(os.path.abspath(target_path), FileFormat=file_format)
+        finally:
+            try:
+                if workbook:
+                    workbook.Close(SaveChanges=0)  # 0表示不保存更改直接关闭
+            except Exception:
+                pass
+
+    def is_alive(self):
+        # 程序崩溃或被关闭后，访问COM对象会抛出异常
+        try:
+            if self.word is not None:
+                self.word.Documents.Count
+            if self.excel is not None:
+                self.excel.Workbooks.Count
+            return True
+        except Exception:
+            return False
+
+    def kill(self):
+        import win32api
+        import win32con
+
+        for pid in self.pids:
+            try:
+                handle = win32api.OpenProcess(win32con.PROCESS_TERMINATE, False, pid)
+                try:
+                    win32api.TerminateProcess(handle, 1)
+                finally:
+                    win32api.CloseHandle(handle)
+            except Exception as e:
+                print(f"结束转换程序（进程{pid}）时出错: {e}")
+        self.pids.clear()
+
+    def close(self):
+        import pythoncom
+
+        for app in (self.word, self.excel):
+            try:
+                if app:
+                    app.Quit()
+            except Exception:
+                pass
+        self.word = None
+        self.excel = None
+        # 清理COM资源
+        pythoncom.CoUninitialize()
+
+
+class Docx2PdfBackend(ConverterBackend):
+    """
+    使用docx2pdf库转换（依赖本机安装的Microsoft Word，仅支持Word文档）
+    """
+    name = "docx2pdf"
+    display_name = "docx2pdf"
+    supported_extensions = (".docx",)
+
+    def is_available(self):
+        return sys.platform in ("win32", "darwin")
+
+    def version(self):
+        import docx2pdf
+        return getattr(docx2pdf, "__version__", "")
+
+    def convert_to_pdf(self, source_path, pdf_path):
+        docx2pdf_convert(source_path, pdf_path)
+        if not os.path.exists(pdf_path):
+            raise Exception("docx2pdf未能生成PDF文件")
+
+
+def uno_available():
+    """
+    检查能否导入LibreOffice的Python UNO模块
+    """
+    try:
+        import uno
+    except ImportError:
+        return False
+    return True
+
+
+class LibreOfficeBackend(ConverterBackend):
+    """
+    使用LibreOffice无界面模式（soffice --headless --convert-to pdf）转换，可在Linux服务器上运行
+    """
+    name = "libreoffice"
+    display_name = "LibreOffice"
+    legacy_extensions = tuple(LEGACY_FORMATS)
+
+    # Windows下LibreOffice的默认安装位置
+    WINDOWS_SOFFICE_PATHS = (
+        r"C:\Program Files\LibreOffice\program\soffice.exe",
+        r"C:\Program Files (x86)\LibreOffice\program\soffice.exe",
+    )
+
+    def __init__(self, soffice_path=None):
+        """
+        :param soffice_path: soffice可执行文件路径，为空时自动查找
+        """
+        self.soffice_path = soffice_path or self.find_soffice()
+        self._version = None
+        # 使用独立的用户配置目录，避免和用户自己打开的LibreOffice冲突
+        self.profile_dir = os.path.join(tempfile.gettempdir(), "tiandan_soffice_profile")
+
+    @classmethod
+    def find_soffice(cls):
+        """
+        查找soffice可执行文件
+        :return: 文件路径，未找到时返回None
+        """
+        for command in ("soffice", "libreoffice"):
+            path = shutil.which(command)
+            if path:
+                return path
+        for path in cls.WINDOWS_SOFFICE_PATHS:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def is_available(self):
+        return bool(self.soffice_path)
+
+    def version(self):
+        if self._version is None:
+            try:
+                result = subprocess.run([self.soffice_path, "--version"], stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE, timeout=60)
+                self._version = result.stdout.decode(errors="ignore").strip()
+            except Exception:
+                self._version = ""
+        return self._version
+
+    def profile_url(self, profile_dir):
+        """
+        将配置目录转换为LibreOffice使用的file://地址
+        :param profile_dir: 配置目录
+        :return: 地址字符串
+        """
+        path = os.path.abspath(profile_dir).replace("\\", "/")
+        if not path.startswith("/"):
+            path = "/" + path
+        return "file://" + path
+
+    def supports_batch(self):
+        # 使用常驻进程（UNO）时没有启动开销，只有命令行转换需要批量处理
+        return not uno_available()
+
+    def open_session(self, worker_id=0):
+        return LibreOfficeSession(self, worker_id)
+
+    def convert_to_pdf(self, source_path, pdf_path, profile_dir=None, process_callback=None):
+        """
+        启动一次soffice将文档转换为PDF
+        :param source_path: 源文件路径
+        :param pdf_path: 输出PDF文件路径
+        :param profile_dir: 使用的用户配置目录，为空时使用默认目录
+        :param process_callback: soffice进程启动后调用的函数，参数为进程对象
+        """
+        error = self.convert_batch([(source_path, pdf_path)], profile_dir, process_callback)[0]
+        if error:
+            raise Exception(error)
+
+    def convert_legacy(self, source_path, target_path, profile_dir=None, process_callback=None):
+        """
+        启动一次soffice将旧格式文件另存为.docx或.xlsx
+        :param source_path: 源文件路径
+        :param target_path: 输出文件路径
+        :param profile_dir: 使用的用户配置目录，为空时使用默认目录
+        :param process_callback: soffice进程启动后调用的函数，参数为进程对象
+        """
+        error = self.convert_batch([(source_path, target_path)], profile_dir, process_callback)[0]
+        if error:
+            raise Exception(error)
+
+    def convert_batch(self, file_pairs, profile_dir=None, process_callback=None):
+        """
+        启动一次soffice转换多个文件，输出格式由第一个输出文件的扩展名决定
+        :param file_pairs: (源文件路径, 输出文件路径) 列表
+        :param profile_dir: 使用的用户配置目录，为空时使用默认目录
+        :param process_callback: soffice进程启动后调用的函数，参数为进程对象
+        :return: 与file_pairs对应的错误信息列表，转换成功的文件为None
+        """
+        errors = [None] * len(file_pairs)
+        target_format = os.path.splitext(file_pairs[0][1])[1].lower()[1:]
+        # 临时输出目录建在输出文件夹中，转换结果才能直接移动到目标位置（不同磁盘或共享文件夹之间不能直接移动）
+        target_dir = os.path.dirname(os.path.abspath(file_pairs[0][1]))
+
+        # LibreOffice输出的文件名与源文件同名，同一批中的同名文件（如a.docx和a.xlsx）无法区分，需单独转换
+        batch = {}  # 文件名（不含扩展名） -> 序号
+        for index, (source_path, target_path) in enumerate(file_pairs):
+            name = os.path.splitext(os.path.basename(source_path))[0].lower()
+            if os.path.splitext(target_path)[1].lower()[1:] != target_format:
+                errors[index] = "同一批次中有不同的输出格式，需单独转换"
+            elif os.path.dirname(os.path.abspath(target_path)) != target_dir:
+                errors[index] = "同一批次中有不同的输出文件夹，需单独转换"
+            elif name in batch:
+                errors[index] = "同一批次中有同名文件，需单独转换"
+            else:
+                batch[name] = index
+        indexes = sorted(batch.values())
+
+        # 输出到单独的临时目录，避免并行转换同名文件时互相覆盖
+        with tempfile.TemporaryDirectory(dir=target_dir, prefix=TEMP_DIR_PREFIX) as output_dir:
+            command = [
+                self.soffice_path,
+                f"-env:UserInstallation={self.profile_url(profile_dir or self.profile_dir)}",
+                "--headless", "--norestore", "--nologo",
+                "--convert-to", target_format,
+                "--outdir", output_dir,
+            ] + [os.path.abspath(file_pairs[index][0]) for index in indexes]
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if process_callback:
+                process_callback(process)
+            try:
+                _, stderr = process.communicate(timeout=CONVERSION_TIMEOUT * len(indexes))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise Exception(f"LibreOffice转换超时（超过{CONVERSION_TIMEOUT * len(indexes)}秒）")
+            error_output = stderr.decode(errors="ignore").strip()
+
+            # 按文件名找到各个输出文件，移动到目标文件名
+            for index in indexes:
+                source_path, target_path = file_pairs[index]
+                name, _ = os.path.splitext(os.path.basename(source_path))
+                output_path = os.path.join(output_dir, f"{name}.{target_format}")
+                if os.path.exists(output_path):
+                    os.replace(output_path, target_path)
+                else:
+                    errors[index] = f"LibreOffice未能生成{target_format.upper()}文件 {error_output}"
+        return errors
+
+
+class LibreOfficeSession(ConverterSession):
+    """
+    LibreOffice转换会话，每个会话使用独立的用户配置目录，可以和其他会话同时运行
+    可以导入LibreOffice的Python UNO模块时保持一个常驻的soffice进程，
+    否则每次转换启动soffice，但复用已经初始化好的配置目录
+    """
+    CONNECT_TIMEOUT = 30  # 等待soffice进程启动的最长时间（秒）
+    # 另存为新格式时使用的导出过滤器
+    LEGACY_FILTERS = {".docx": "MS Word 2007 XML", ".xlsx": "Calc MS Excel 2007 XML"}
+
+    def __init__(self, backend, worker_id=0):
+        super().__init__(backend)
+        self.profile_dir = f"{backend.profile_dir}_{worker_id}"
+        self.pipe_name = f"tiandan_soffice_{os.getpid()}_{worker_id}"
+        self.process = None  # 常驻的soffice进程
+        self.current_process = None  # 命令行转换时正在运行的soffice进程
+        self.desktop = None
+        if uno_available():
+            self._start_listener()  # 没有UNO模块时使用命令行转换
+
+    def _start_listener(self):
+        """
+        启动常驻的soffice进程并通过UNO连接
+        """
+        import uno
+        from com.sun.star.connection import NoConnectException
+
+        connection = f"pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+        command = [
+            self.backend.soffice_path,
+            f"-env:UserInstallation={self.backend.profile_url(self.profile_dir)}",
+            "--headless", "--invisible", "--norestore", "--nologo", "--nodefault",
+            f"--accept={connection}",
+        ]
+        self.process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        deadline = time.time() + self.CONNECT_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(f"uno:{connection}")
+                break
+            except NoConnectException:
+                if self.process.poll() is not None or time.time() > deadline:
+                    self.close()
+                    raise Exception("无法连接到LibreOffice进程")
+                time.sleep(0.5)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+        print("已启动常驻LibreOffice进程用于转换")
+
+    @staticmethod
+    def _properties(**values):
+        """
+        生成UNO调用使用的PropertyValue元组
+        """
+        from com.sun.star.beans import PropertyValue
+
+        properties = []
+        for name, value in values.items():
+            prop = PropertyValue()
+            prop.Name = name
+            prop.Value = value
+            properties.append(prop)
+        return tuple(properties)
+
+    def convert_to_pdf(self, source_path, pdf_path):
+        export_filter = "calc_pdf_Export" if source_path.lower().endswith(".xlsx") else "writer_pdf_Export"
+        self._convert(source_path, pdf_path, export_filter)
+
+    def convert_legacy(self, source_path, target_path):
+        self._convert(source_path, target_path, self.LEGACY_FILTERS[os.path.splitext(target_path)[1].lower()])
+
+    def _convert(self, source_path, target_path, export_filter):
+        """
+        转换一个文件：有常驻进程时通过UNO打开并导出，否则启动一次soffice转换
+        :param export_filter: UNO导出时使用的过滤器名称
+        """
+        if self.desktop is None:
+            try:
+                error = self.backend.convert_batch([(source_path, target_path)], profile_dir=self.profile_dir,
+                                                   process_callback=self._set_current_process)[0]
+            finally:
+                self.current_process = None
+            if error:
+                raise Exception(error)
+            return
+
+        import uno
+
+        document = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(source_path)), "_blank", 0,
+            self._properties(Hidden=True, ReadOnly=True))
+        if document is None:
+            raise Exception("LibreOffice无法打开文件")
+        try:
+            document.storeToURL(uno.systemPathToFileUrl(os.path.abspath(target_path)),
+                                self._properties(FilterName=export_filter))
+        finally:
+            document.close(True)
+
+        if not os.path.exists(target_path):
+            raise Exception(f"LibreOffice未能生成{os.path.splitext(target_path)[1].upper()[1:]}文件")
+
+    def convert_batch(self, file_pairs):
+        if self.desktop is not None:
+            # 常驻进程中逐个转换即可，没有启动开销
+            return super().convert_batch(file_pairs)
+        try:
+            return self.backend.convert_batch(file_pairs, profile_dir=self.profile_dir,
+                                              process_callback=self._set_current_process)
+        finally:
+            self.current_process = None
+
+    def _set_current_process(self, process):
+        self.current_process = process
+
+    def is_alive(self):
+        if self.desktop is None:
+            return True
+        if self.process.poll() is not None:
+            return False
+        try:
+            self.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def kill(self):
+        for process in (self.current_process, self.process):
+            if process is not None and process.poll() is None:
+                process.kill()
+
+    def close(self):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+
+# 可选的转换引擎，配置项pdf_converter取其中的名称或auto
+CONVERTER_BACKENDS = {
+    backend.name: backend for backend in (OfficeComBackend, LibreOfficeBackend, Docx2PdfBackend)
+}
+
+
+def get_converter_backends(name="auto"):
+    """
+    根据配置获取转换引擎列表，转换时按顺序尝试，前一个失败时使用下一个
+    :param name: 引擎名称，auto表示按AUTO_BACKEND_ORDER使用所有可用的引擎
+    :return: 转换引擎对象列表
+    """
+    if name and name != "auto":
+        if name not in CONVERTER_BACKENDS:
+            raise Exception(f"未知的PDF转换引擎: {name}")
+        backend = CONVERTER_BACKENDS[name]()
+        if not backend.is_available():
+            raise Exception(f"PDF转换引擎 {backend.display_name} 在当前系统上不可用")
+        return [backend]
+
+    backends = [CONVERTER_BACKENDS[backend_name]() for backend_name in AUTO_BACKEND_ORDER]
+    return [backend for backend in backends if backend.is_available()]
+
+
+def get_default_worker_count(backends):
+    """
+    获取默认的并行转换数：WPS/Office同时运行多个实例容易出错，只使用一个；
+    LibreOffice等引擎每个进程相互独立，按CPU核数并行
+    :param backends: 转换引擎列表
+    :return: 工作线程数量
+    """
+    if not backends or backends[0].name == OfficeComBackend.name:
+        return 1
+    return max(1, min(os.cpu_count() or 1, MAX_AUTO_WORKERS))
+
+
+class ConverterPool:
+    """
+    常驻的PDF转换池：每个工作线程持有自己的转换会话，文档之间和任务之间复用已启动的转换程序，
+    会话定期做健康检查，并在完成一定次数的转换后重启
+    看门狗线程监视每个正在进行的转换，超时时强制结束转换程序，重启会话后重试一次
+    """
+
+    def __init__(self, backend_name="auto", size=None, max_conversions=RECYCLE_AFTER_CONVERSIONS, queue_size=None,
+                 timeout=CONVERSION_TIMEOUT):
+        """
+        :param backend_name: 转换引擎名称，auto表示自动选择
+        :param size: 工作线程数量，每个工作线程使用独立的转换进程，为空时根据转换引擎自动设置
+        :param max_conversions: 每个会话最多处理的转换次数
+        :param queue_size: 等待队列的长度，为空时取工作线程数量的两倍
+        :param timeout: 单个文件转换的最长时间（秒）
+        """
+        self.backends = get_converter_backends(backend_name)
+        if not self.backends:
+            raise Exception("未找到可用的PDF转换引擎（WPS/Office或LibreOffice）")
+
+        self.size = max(1, size or get_default_worker_count(self.backends))
+        self.max_conversions = max_conversions
+        self.timeout = timeout
+        # 首选引擎支持批量转换时，工作线程一次取出多个任务在一次调用中转换
+        self.batch_size = MAX_BATCH_SIZE if self.backends[0].supports_batch() else 1
+        self.jobs = queue.Queue(maxsize=queue_size or self.size * 2)
+        self.closed = False
+        self._version_tag = None
+        self.workers = {}  # 工作线程编号 -> 线程
+        self._states = {}  # 工作线程编号 -> 正在进行的转换状态，供看门狗检查
+        self._state_lock = threading.Lock()
+        for worker_id in range(self.size):
+            self._start_worker(worker_id)
+
+        self._watchdog_thread = threading.Thread(target=self._watchdog, daemon=True)
+        self._watchdog_thread.start()
+
+        # 程序退出时关闭所有转换程序
+        atexit.register(self.shutdown)
+
+    def version_tag(self):
+        """
+        获取转换池使用的各个转换引擎及其版本，作为转换结果缓存键的一部分
+        :return: 版本标识字符串
+        """
+        if self._version_tag is None:
+            self._version_tag = "|".join(f"{backend.name}:{backend.version()}" for backend in self.backends)
+        return self._version_tag
+
+    def submit(self, source_path, target_path, start_callback=None):
+        """
+        提交转换任务，等待队列已满时阻塞
+        :param source_path: 源文件路径
+        :param target_path: 输出文件路径，PDF文件时转换为PDF，.docx/.xlsx文件时将旧格式文件另存为新格式
+        :param start_callback: 工作线程开始转换该文件时调用的函数
+        :return: Future对象，结果为实际使用的转换引擎名称，转换失败时为异常
+        """
+        if self.closed:
+            raise Exception("PDF转换池已关闭")
+        future = Future()
+        self.jobs.put({
+            "future": future,
+            "source_path": source_path,
+            "target_path": target_path,
+            "start_callback": start_callback,
+            "timeouts": 0,  # 已超时的次数
+        })
+        return future
+
+    def shutdown(self, wait=True):
+        """
+        关闭转换池，各工作线程处理完已提交的任务后退出
+        :param wait: 是否等待工作线程退出
+        """
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.shutdown)
+        for _ in range(self.size):
+            self.jobs.put(None)
+        if wait:
+            for worker in list(self.workers.values()):
+                worker.join(timeout=CONVERSION_TIMEOUT)
+
+    def _start_worker(self, worker_id, jobs=None):
+        """
+        启动工作线程
+        :param worker_id: 工作线程编号
+        :param jobs: 启动后首先重试的任务列表（替换卡住的工作线程时使用）
+        """
+        worker = threading.Thread(target=self._worker, args=(worker_id, jobs), daemon=True)
+        self.workers[worker_id] = worker
+        worker.start()
+
+    def _take_jobs(self):
+        """
+        从队列中取出任务，支持批量转换时一并取出已在等待的其他任务，
+        但不超过平均每个工作线程分到的数量，以免其他工作线程空闲
+        :return: 任务列表，收到关闭信号时返回None
+        """
+        job = self.jobs.get(timeout=WORKER_IDLE_TIMEOUT)
+        if job is None:
+            return None
+        jobs = [job]
+        limit = min(self.batch_size, self.jobs.qsize() // self.size + 1)
+        while len(jobs) < limit:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                # 放回关闭信号，处理完已取出的任务后再退出
+                self.jobs.put(None)
+                break
+            jobs.append(job)
+        return jobs
+
+    def _worker(self, worker_id, jobs=None):
+        """
+        工作线程：依次取出任务进行转换，会话只在本线程中创建和关闭
+        """
+        # jobs: 正在转换的任务；pending: 本线程已取出但尚未设置结果的全部任务
+        state = {"session": None, "jobs": None, "pending": [], "deadline": None, "killed": False, "abandoned": False}
+        with self._state_lock:
+            self._states[worker_id] = state
+
+        sessions = {}  # 引擎名称 -> 转换会话
+        try:
+            while True:
+                if jobs is None:
+                    try:
+                        jobs = self._take_jobs()
+                    except queue.Empty:
+                        # 长时间空闲时关闭转换程序释放内存
+                        self._close_sessions(sessions)
+                        continue
+                    if jobs is None:
+                        break
+                    jobs = [job for job in jobs if job["future"].set_running_or_notify_cancel()]
+                    for job in jobs:
+                        if job["start_callback"]:
+                            try:
+                                job["start_callback"]()
+                            except Exception as e:
+                                print(f"更新转换进度时出错: {e}")
+
+                if not self._convert_jobs(sessions, worker_id, state, jobs):
+                    break  # 看门狗已放弃本线程并由新的工作线程接手剩余任务
+                jobs = None
+        finally:
+            self._close_sessions(sessions)
+
+    def _finish_job(self, state, job, result=None, error=None):
+        """
+        设置任务结果
+        :return: 本线程是否仍然有效（未被看门狗放弃）
+        """
+        with self._state_lock:
+            if state["abandoned"]:
+                return False
+            if error is None:
+                job["future"].set_result(result)
+            else:
+                job["future"].set_exception(error)
+            state["pending"].remove(job)
+            return True
+
+    def _convert_jobs(self, sessions, worker_id, state, jobs):
+        """
+        转换一组任务：先尝试一次批量转换，失败的文件再逐个转换
+        :return: 本线程是否仍然有效（未被看门狗放弃）
+        """
+        with self._state_lock:
+            state["pending"] = list(jobs)
+        done = self._convert_batch(sessions, worker_id, state, jobs) if len(jobs) > 1 else {}
+        if state["abandoned"]:
+            return False
+        for index, job in enumerate(jobs):
+            if index in done:
+                result, error = done[index], None
+            else:
+                try:
+                    result, error = self._convert(sessions, worker_id, state, job), None
+                except Exception as e:
+                    result, error = None, e
+            if not self._finish_job(state, job, result, error):
+                return False
+        return True
+
+    def _get_session(self, sessions, backend, worker_id):
+        """
+        获取可用的转换会话，会话失效或达到转换次数上限时重新启动
+        """
+        session = sessions.get(backend.name)
+        if session is not None and (session.conversion_count >= self.max_conversions or not session.is_alive()):
+            print(f"重新启动{backend.display_name}转换程序（工作线程{worker_id}）")
+            sessions.pop(backend.name)
+            self._close_session(session)
+            session = None
+        if session is None:
+            session = backend.open_session(worker_id)
+            sessions[backend.name] = session
+        return session
+
+    def _convert_batch(self, sessions, worker_id, state, jobs):
+        """
+        使用首选引擎批量转换多个文件，输出格式和输出文件夹相同的文件在一次调用中转换
+        :return: 转换成功的任务序号 -> 使用的转换引擎名称
+        """
+        backend = self.backends[0]
+        # 一次调用只能输出一种格式到一个文件夹，按输出格式和输出文件夹分组
+        groups = {}
+        for index, job in enumerate(jobs):
+            if backend.supports(job["source_path"], job["target_path"]):
+                target_path = os.path.abspath(job["target_path"])
+                key = (os.path.splitext(target_path)[1].lower(), os.path.dirname(target_path))
+                groups.setdefault(key, []).append(index)
+
+        done = {}
+        for indexes in groups.values():
+            if len(indexes) < 2:
+                continue
+            done.update(self._convert_group(sessions, worker_id, state, backend, jobs, indexes))
+            if state["abandoned"]:
+                break
+        return done
+
+    def _convert_group(self, sessions, worker_id, state, backend, jobs, indexes):
+        """
+        在一次调用中转换一组任务
+        :return: 转换成功的任务序号 -> 使用的转换引擎名称
+        """
+        batch = [jobs[index] for index in indexes]
+
+        killed = False
+        try:
+            session = self._get_session(sessions, backend, worker_id)
+            session.conversion_count += len(batch)
+            print(f"正在使用{backend.display_name}批量转换{len(batch)}个文件")
+            self._watch(state, session, batch, self.timeout * len(batch))
+            try:
+                errors = session.convert_batch([(job["source_path"], job["target_path"]) for job in batch])
+            finally:
+                killed = self._unwatch(state)
+        except Exception as e:
+            print(f"使用{backend.display_name}批量转换时出错: {e}")
+            errors = None
+
+        if killed:
+            # 转换程序已被强制结束，丢弃该会话，各文件再逐个转换
+            print(f"使用{backend.display_name}批量转换超时")
+            sessions.pop(backend.name, None)
+            self._close_session(session)
+            return {}
+        if errors is None:
+            return {}
+
+        done = {}
+        for index, job, error in zip(indexes, batch, errors):
+            if error is None:
+                done[index] = backend.display_name
+            else:
+                print(f"批量转换未成功，将单独转换: {job['source_path']} {error}")
+        return done
+
+    def _convert(self, sessions, worker_id, state, job):
+        """
+        依次尝试各个转换引擎，前一个失败时使用下一个；转换超时时重启转换程序重试
+        :return: 实际使用的转换引擎名称
+        """
+        source_path = job["source_path"]
+        for backend in self.backends:
+            if not backend.supports(source_path, job["target_path"]):
+                continue
+            while True:
+                killed = False
+                try:
+                    session = self._get_session(sessions, backend, worker_id)
+                    session.conversion_count += 1
+                    print(f"正在尝试使用{backend.display_name}转换: {source_path}")
+                    self._watch(state, session, [job], self.timeout)
+                    try:
+                        session.convert(source_path, job["target_path"])
+                    finally:
+                        killed = self._unwatch(state)
+                    if not killed:
+                        return backend.display_name
+                    error = f"转换超时（超过{self.timeout}秒）"
+                except Exception as e:
+                    error = f"转换超时（超过{self.timeout}秒）" if killed else str(e)
+                print(f"使用{backend.display_name}转换时出错: {error}")
+                if not killed:
+                    break  # 尝试下一个转换引擎
+
+                # 转换程序已被强制结束，丢弃该会话，重试时重新启动
+                sessions.pop(backend.name, None)
+                self._close_session(session)
+                job["timeouts"] += 1
+                if job["timeouts"] >= MAX_CONVERSION_ATTEMPTS:
+                    raise Exception(f"转换超时（超过{self.timeout}秒），重试后仍未完成: {os.path.basename(source_path)}")
+                print(f"已重启转换程序，重试转换: {source_path}")
+        raise Exception("所有转换方法都失败了，请检查系统配置")
+
+    def _watch(self, state, session, jobs, timeout):
+        """
+        开始监视一次转换
+        """
+        with self._state_lock:
+            state.update(session=session, jobs=jobs, deadline=time.time() + timeout, killed=False)
+
+    def _unwatch(self, state):
+        """
+        结束监视一次转换
+        :return: 转换期间是否因超时被强制结束
+        """
+        with self._state_lock:
+            killed = state["killed"]
+            state.update(session=None, jobs=None, deadline=None, killed=False)
+            return killed
+
+    def _watchdog(self):
+        """
+        看门狗线程：转换超时时强制结束转换程序；结束后工作线程仍未返回时，放弃该线程并启动新的工作线程
+        """
+        while not self.closed:
+            time.sleep(WATCHDOG_INTERVAL)
+            now = time.time()
+            to_kill = []
+            to_replace = []
+            with self._state_lock:
+                for worker_id, state in list(self._states.items()):
+                    if state["deadline"] is None or now < state["deadline"]:
+                        continue
+                    if not state["killed"]:
+                        state["killed"] = True
+                        state["deadline"] = now + KILL_GRACE_PERIOD
+                        to_kill.append((state["session"], state["jobs"]))
+                    else:
+                        state["abandoned"] = True
+                        state["deadline"] = None
+                        to_replace.append((worker_id, state["jobs"], state["pending"]))
+                        state["pending"] = []
+
+            for session, jobs in to_kill:
+                names = "、".join(os.path.basename(job["source_path"]) for job in jobs)
+                print(f"转换超时，强制结束{session.backend.display_name}转换程序: {names}")
+                try:
+                    session.kill()
+                except Exception as e:
+                    print(f"结束转换程序时出错: {e}")
+
+            for worker_id, jobs, pending in to_replace:
+                print(f"工作线程{worker_id}无响应，启动新的工作线程")
+                # 新的工作线程接手原线程尚未完成的全部任务，卡住的任务计入超时次数
+                retry_jobs = []
+                for job in pending:
+                    if any(job is stuck for stuck in jobs):
+                        job["timeouts"] += 1
+                        if job["timeouts"] >= MAX_CONVERSION_ATTEMPTS:
+                            job["future"].set_exception(Exception(
+                                f"转换超时（超过{self.timeout}秒），重试后仍未完成: {os.path.basename(job['source_path'])}"))
+                            continue
+                    retry_jobs.append(job)
+                self._start_worker(worker_id, retry_jobs or None)
+
+    def _close_session(self, session):
+        try:
+            session.close()
+        except Exception as e:
+            print(f"关闭{session.backend.display_name}转换程序时出错: {e}")
+
+    def _close_sessions(self, sessions):
+        for session in sessions.values():
+            self._close_session(session)
+        sessions.clear()
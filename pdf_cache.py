@@ -0,0 +1,150 @@
+import os
+import re
+import shutil
+import zipfile
+import hashlib
+import tempfile
+import threading
+
+from data_store import APP_DATA_DIR
+
+# PDF转换缓存目录（在数据文件所在目录中），以文档内容哈希为文件名保存转换结果
+PDF_CACHE_DIR = os.path.join(APP_DATA_DIR, "pdf_cache")
+# 缓存目录的最大总大小（字节），超过时删除最久未使用的PDF
+PDF_CACHE_MAX_SIZE = 512 * 1024 * 1024
+
+# docx/xlsx中每次保存都会变化的修改时间字段，计算哈希时忽略
+VOLATILE_CORE_PROPERTIES = re.compile(rb"<dcterms:(created|modified)\b[^>]*>[^<]*</dcterms:\1>")
+
+
+def compute_document_hash(file_path):
+    """
+    计算文档内容的SHA-256哈希
+    docx/xlsx是zip压缩包，python-docx和openpyxl每次保存时写入的压缩时间戳和修改时间都不同，
+    因此按包内各文件的内容计算哈希，内容相同的文档得到相同的哈希
+    :param file_path: 文档路径
+    :return: 哈希字符串
+    """
+    sha = hashlib.sha256()
+    if zipfile.is_zipfile(file_path):
+        with zipfile.ZipFile(file_path) as package:
+            for name in sorted(package.namelist()):
+                data = package.read(name)
+                if name == "docProps/core.xml":
+                    data = VOLATILE_CORE_PROPERTIES.sub(b"", data)
+                sha.update(name.encode("utf-8") + b"\0")
+                sha.update(hashlib.sha256(data).digest())
+    else:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+
+class PdfCache:
+    """
+    按内容寻址的PDF转换缓存：相同内容的文档使用相同转换引擎转换过一次后，直接复制缓存的PDF
+    缓存文件的修改时间记录最近使用时间，总大小超过上限时按最久未使用的顺序删除
+    """
+
+    def __init__(self, cache_dir=PDF_CACHE_DIR, max_size=PDF_CACHE_MAX_SIZE):
+        """
+        :param cache_dir: 缓存目录
+        :param max_size: 缓存目录的最大总大小（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+    def make_key(self, file_path, converter_tag=""):
+        """
+        生成缓存键
+        :param file_path: 源文档路径
+        :param converter_tag: 转换引擎及其版本，引擎变化后不使用旧的转换结果
+        :return: 缓存键
+        """
+        content_hash = compute_document_hash(file_path)
+        return hashlib.sha256(f"{content_hash}|{converter_tag}".encode("utf-8")).hexdigest()
+
+    def get_path(self, key):
+        """
+        获取缓存键对应的PDF文件路径
+        """
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def fetch(self, key, pdf_path):
+        """
+        从缓存复制PDF到目标路径
+        :param key: 缓存键
+        :param pdf_path: 目标PDF文件路径
+        :return: 是否命中缓存
+        """
+        cache_path = self.get_path(key)
+        try:
+            shutil.copyfile(cache_path, pdf_path)
+            # 更新最近使用时间
+            os.utime(cache_path)
+            return True
+        except OSError:
+            return False
+
+    def store(self, key, pdf_path):
+        """
+        将转换好的PDF保存到缓存
+        :param key: 缓存键
+        :param pdf_path: PDF文件路径
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写入临时文件再替换，其他线程或实例不会读到不完整的PDF
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(pdf_path, temp_path)
+                os.replace(temp_path, self.get_path(key))
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self.evict()
+        except Exception as e:
+            print(f"保存PDF缓存时出错: {e}")
+
+    def evict(self):
+        """
+        缓存总大小超过上限时，删除最久未使用的PDF
+        """
+        with self._lock:
+            entries = []
+            total_size = 0
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".pdf"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+
+            if total_size <= self.max_size:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total_size <= self.max_size:
+                    break
+                try:
+                    os.remove(path)
+                    total_size -= size
+                except OSError:
+                    pass  # 可能已被其他实例删除
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            if os.path.isdir(self.cache_dir):
+                shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -0,0 +1,199 @@
+import re
+
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    NameObject,
+    NumberObject,
+    create_string_object,
+)
+
+# 生成字段外观使用的字体：PDF阅读器内置的宋体（Adobe-GB1字符集，UCS-2编码），无需嵌入字体即可显示中文
+FORM_FONT_RESOURCE = "/TDSong"
+FORM_FONT_NAME = "/STSong-Light"
+# 字号为0（自动）时使用的最大字号
+FORM_AUTO_FONT_SIZE = 12
+# 字段边框内的留白（磅）
+FORM_FIELD_PADDING = 2
+# 多行文本框的行距（字号的倍数）
+FORM_LINE_SPACING = 1.15
+
+# 多行文本框的字段标志位（PDF参考手册 表8.77）
+FIELD_FLAG_MULTILINE = 1 << 12
+
+
+def _form_font():
+    """
+    生成外观使用的字体字典（不嵌入字体文件，ASCII字符按半角、其他字符按全角排版）
+    """
+    descriptor = DictionaryObject({
+        NameObject("/Type"): NameObject("/FontDescriptor"),
+        NameObject("/FontName"): NameObject(FORM_FONT_NAME),
+        NameObject("/Flags"): NumberObject(6),
+        NameObject("/FontBBox"): ArrayObject([NumberObject(-25), NumberObject(-254),
+                                              NumberObject(1000), NumberObject(880)]),
+        NameObject("/ItalicAngle"): NumberObject(0),
+        NameObject("/Ascent"): NumberObject(880),
+        NameObject("/Descent"): NumberObject(-120),
+        NameObject("/CapHeight"): NumberObject(880),
+        NameObject("/StemV"): NumberObject(93),
+    })
+    cid_font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/CIDFontType0"),
+        NameObject("/BaseFont"): NameObject(FORM_FONT_NAME),
+        NameObject("/CIDSystemInfo"): DictionaryObject({
+            NameObject("/Registry"): create_string_object("Adobe"),
+            NameObject("/Ordering"): create_string_object("GB1"),
+            NameObject("/Supplement"): NumberObject(2),
+        }),
+        NameObject("/FontDescriptor"): descriptor,
+        NameObject("/DW"): NumberObject(1000),
+        # CID 1-95为ASCII可见字符
+        NameObject("/W"): ArrayObject([NumberObject(1), NumberObject(95), NumberObject(500)]),
+    })
+    return DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type0"),
+        NameObject("/BaseFont"): NameObject(FORM_FONT_NAME),
+        NameObject("/Encoding"): NameObject("/UniGB-UCS2-H"),
+        NameObject("/DescendantFonts"): ArrayObject([cid_font]),
+    })
+
+
+def _text_width(text, font_size):
+    """
+    估算文字宽度：ASCII字符半角，其他字符全角
+    """
+    return sum(0.5 if ord(char) < 128 else 1.0 for char in text) * font_size
+
+
+def _wrap_text(text, width, font_size):
+    """
+    按宽度把文字拆分为多行（逐字拆分，中文没有单词边界）
+    """
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for char in paragraph:
+            if line and _text_width(line + char, font_size) > width:
+                lines.append(line)
+                line = char
+            else:
+                line += char
+        lines.append(line)
+    return lines
+
+
+def _encode_text(text):
+    """
+    把文字编码为UCS-2的十六进制字符串，基本多文种平面以外的字符无法显示，替换为问号
+    """
+    text = "".join(char if ord(char) <= 0xFFFF else "?" for char in text)
+    return "<" + text.encode("utf-16-be").hex().upper() + ">"
+
+
+def _inherited(field, key, acroform=None):
+    """
+    读取字段的属性，字段本身没有时依次从上级字段和表单中读取
+    """
+    node = field
+    while node is not None:
+        if key in node:
+            return node[key]
+        node = node["/Parent"].get_object() if "/Parent" in node else None
+    if acroform is not None and key in acroform:
+        return acroform[key]
+    return None
+
+
+def build_text_appearance(widget, field, value, acroform=None):
+    """
+    按字段值生成文本框/下拉框控件的外观流，阅读器和打印程序不需要重新生成外观即可显示填写的内容，
+    合并PDF或复制页面时即使丢失表单信息，控件也按该外观显示
+    :param widget: 控件注释字典
+    :param field: 控件所属的字段字典（控件与字段合并时与widget相同）
+    :param value: 字段值
+    :param acroform: 文档的表单字典，用于读取默认外观和对齐方式
+    :return: 外观流对象
+    """
+    rect = [float(number) for number in widget["/Rect"]]
+    width = abs(rect[2] - rect[0])
+    height = abs(rect[3] - rect[1])
+    inner_width = max(width - 2 * FORM_FIELD_PADDING, 1)
+
+    # 默认外观中的字号和颜色，字体换为可显示中文的字体
+    default_appearance = str(_inherited(widget, "/DA") or _inherited(field, "/DA", acroform) or "")
+    match = re.search(r"/\S+\s+([\d.]+)\s+Tf", default_appearance)
+    font_size = float(match.group(1)) if match else 0
+    color = re.sub(r"/\S+\s+[\d.]+\s+Tf", "", default_appearance).strip() or "0 g"
+    quadding = int(_inherited(field, "/Q", acroform) or 0)
+    multiline = bool(int(_inherited(field, "/Ff") or 0) & FIELD_FLAG_MULTILINE)
+
+    text = str(value)
+    if multiline:
+        font_size = font_size or FORM_AUTO_FONT_SIZE
+        lines = _wrap_text(text, inner_width, font_size)
+        leading = font_size * FORM_LINE_SPACING
+        baseline = height - FORM_FIELD_PADDING - font_size * 0.88
+    else:
+        # 单行文本超出宽度时缩小字号，字号为0时按控件高度自动设置
+        if not font_size:
+            font_size = min(FORM_AUTO_FONT_SIZE, max(height - 2 * FORM_FIELD_PADDING, 1) * 0.8)
+        text_width = _text_width(text, font_size)
+        if text_width > inner_width:
+            font_size = font_size * inner_width / text_width
+        lines = [text.replace("\r", " ").replace("\n", " ")]
+        leading = font_size
+        baseline = (height - font_size) / 2 + font_size * 0.12
+
+    commands = [
+        "/Tx BMC", "q",
+        f"1 1 {width - 2:.2f} {height - 2:.2f} re W n",
+        "BT", f"{FORM_FONT_RESOURCE} {font_size:.2f} Tf", color,
+    ]
+    x_previous, y_previous = 0.0, 0.0
+    for index, line in enumerate(lines):
+        line_width = _text_width(line, font_size)
+        if quadding == 1:
+            x = (width - line_width) / 2
+        elif quadding == 2:
+            x = width - FORM_FIELD_PADDING - line_width
+        else:
+            x = FORM_FIELD_PADDING
+        y = baseline - index * leading
+        # Td为相对上一行起点的位移
+        commands.append(f"{x - x_previous:.2f} {y - y_previous:.2f} Td {_encode_text(line)} Tj")
+        x_previous, y_previous = x, y
+    commands.extend(["ET", "Q", "EMC"])
+
+    stream = DecodedStreamObject()
+    stream.set_data("\n".join(commands).encode("ascii"))
+    stream.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): ArrayObject([FloatObject(0), FloatObject(0), FloatObject(width), FloatObject(height)]),
+        NameObject("/Resources"): DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject(FORM_FONT_RESOURCE): _form_font()}),
+        }),
+    })
+    return stream
+
+
+def set_text_field_value(field, value, acroform=None):
+    """
+    设置文本框/下拉框字段的值，并为字段的每个控件生成新的外观
+    :param field: 字段字典
+    :param value: 字段值
+    :param acroform: 文档的表单字典
+    """
+    field[NameObject("/V")] = create_string_object(str(value))
+    for widget in field.get("/Kids", [field]):
+        widget = widget.get_object()
+        if "/Rect" not in widget:
+            continue
+        widget[NameObject("/AP")] = DictionaryObject({
+            NameObject("/N"): build_text_appearance(widget, field, value, acroform),
+        })
@@ -0,0 +1,658 @@
+import io
+import os
+import sys
+import json
+import zlib
+import shutil
+import hashlib
+import tempfile
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    BooleanObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+    create_string_object,
+)
+
+# 输入文件超过该数量时分组合并：先把每组合并为临时文件，再合并各组的结果
+MERGE_FAN_IN = 256
+
+# 合并文件中固定的对象编号：1为文档目录，2为页面树根节点
+CATALOG_ID = 1
+PAGES_ID = 2
+
+# 每个对象流中最多存放的对象数量
+OBJECT_STREAM_SIZE = 100
+# 除流对象外，按内容去重的共享资源类型
+SHARED_RESOURCE_TYPES = ("/Font", "/FontDescriptor", "/ExtGState")
+
+# 合并记录文件，保存在合并文档所在目录中，记录上次合并文档中每个源文档对应的页面范围
+MERGE_MANIFEST_FILE = ".merge_manifest.json"
+# 生成记录文件，保存在输出目录中，按模板顺序记录最近一次生成的文档，合并PDF时使用
+JOB_MANIFEST_FILE = ".job_manifest.json"
+
+
+class StreamingPdfWriter:
+    """
+    流式PDF合并写入器：逐个读取输入文件，把页面及其引用的对象重新编号后立即写入输出文件，
+    处理完一个输入文件即释放它，内存占用只与单个输入文件的大小有关，与合并后的总页数无关
+    写入时按内容对字体、图片等共享资源去重，未压缩的流使用Flate压缩，
+    非流对象打包写入压缩的对象流，交叉引用使用交叉引用流
+    """
+
+    def __init__(self, output_path):
+        """
+        :param output_path: 输出PDF文件路径
+        """
+        self.output_path = output_path
+        self.stream = open(output_path, "wb")
+        self.stream.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        self.offsets = {}  # 直接写入的对象编号 -> 在输出文件中的偏移量
+        self.compressed = {}  # 写入对象流的对象编号 -> (对象流编号, 在对象流中的序号)
+        self.object_buffer = []  # 等待写入对象流的(对象编号, 序列化内容)
+        self.shared_ids = {}  # 共享资源序列化内容的哈希 -> 对象编号
+        self.next_id = PAGES_ID + 1
+        self.page_ids = []  # 按顺序排列的页面对象编号
+        self.outline = []  # 书签：(标题, 页面序号)
+        self._cloning = set()  # 正在复制的共享资源
+        self._cyclic = set()  # 存在循环引用、不能去重的共享资源
+        self.form_fields = []  # 表单根字段的对象编号，合并文档中保留可填写的表单
+        self.form_resources = None  # 表单的默认资源（/DR）和默认外观（/DA），取第一个带表单的输入文件
+        self.need_appearances = False  # 是否需要阅读器按字段值重新生成外观
+
+    @property
+    def page_count(self):
+        return len(self.page_ids)
+
+    def _allocate_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _serialize(self, obj):
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def _write_object(self, object_id, obj):
+        """
+        写入一个间接对象，流对象直接写入文件，其他对象放入对象流
+        """
+        data = self._serialize(obj)
+        if isinstance(obj, StreamObject):
+            self._write_raw(object_id, data)
+        else:
+            self._buffer_object(object_id, data)
+
+    def _write_raw(self, object_id, data):
+        self.offsets[object_id] = self.stream.tell()
+        self.stream.write(f"{object_id} 0 obj\n".encode("ascii"))
+        self.stream.write(data)
+        self.stream.write(b"\nendobj\n")
+
+    def _buffer_object(self, object_id, data):
+        self.object_buffer.append((object_id, data))
+        if len(self.object_buffer) >= OBJECT_STREAM_SIZE:
+            self._flush_object_stream()
+
+    def _flush_object_stream(self):
+        """
+        把缓冲的非流对象压缩写入一个对象流
+        """
+        if not self.object_buffer:
+            return
+        stream_id = self._allocate_id()
+        header = []
+        body = io.BytesIO()
+        for index, (object_id, data) in enumerate(self.object_buffer):
+            header.append(f"{object_id} {body.tell()}")
+            body.write(data)
+            body.write(b"\n")
+            self.compressed[object_id] = (stream_id, index)
+        header = " ".join(header).encode("ascii") + b"\n"
+
+        object_stream = DecodedStreamObject()
+        object_stream._data = zlib.compress(header + body.getvalue())
+        object_stream.update({
+            NameObject("/Type"): NameObject("/ObjStm"),
+            NameObject("/N"): NumberObject(len(self.object_buffer)),
+            NameObject("/First"): NumberObject(len(header)),
+            NameObject("/Filter"): NameObject("/FlateDecode"),
+        })
+        self._write_raw(stream_id, self._serialize(object_stream))
+        self.object_buffer = []
+
+    def append(self, source, page_range=None, title=None):
+        """
+        追加一个PDF文件的页面
+        :param source: PDF文件路径或已打开的PdfReader
+        :param page_range: 要追加的页面序号范围，为空时追加所有页面
+        :param title: 书签标题，不为空时添加指向追加的第一页的书签
+        :return: 追加的页数
+        """
+        reader = source if isinstance(source, PdfReader) else PdfReader(source)
+        if reader.is_encrypted:
+            reader.decrypt("")
+
+        id_map = {}  # 输入文件中的(对象编号, 版本号) -> 输出文件中的对象编号
+        pending = []  # 已分配编号、等待写入的输入对象引用
+        self._cloning = set()
+        self._cyclic = set()
+
+        # 先为所有页面分配编号，其他对象（如链接批注）引用页面时直接指向新页面，不会再次复制页面
+        if page_range is None:
+            pages = list(reader.pages)
+        else:
+            pages = [reader.pages[index] for index in page_range]
+        page_refs = [page.indirect_ref for page in pages]
+        for page_ref in page_refs:
+            id_map[(page_ref.idnum, page_ref.generation)] = self._allocate_id()
+        pending.extend(page_refs)
+        # 读取时已把页面树上可继承的属性（如/Resources、/MediaBox）复制到页面对象中，复制页面时使用这些对象
+        page_objects = {(ref.idnum, ref.generation): page for ref, page in zip(page_refs, pages)}
+
+        acroform = reader.trailer["/Root"].get("/AcroForm")
+        acroform = acroform.get_object() if acroform is not None else None
+        if acroform is not None:
+            self.need_appearances = self.need_appearances or bool(acroform.get("/NeedAppearances"))
+            if self.form_resources is None:
+                self.form_resources = {key: self._clone(acroform.raw_get(key), id_map, pending)
+                                       for key in ("/DR", "/DA") if key in acroform}
+
+        while pending:
+            source_ref = pending.pop()
+            obj = page_objects.get((source_ref.idnum, source_ref.generation)) or source_ref.get_object()
+            clone = self._clone(obj, id_map, pending)
+            self._write_object(id_map[(source_ref.idnum, source_ref.generation)], clone)
+
+        if acroform is not None:
+            self._collect_form_fields(pages, id_map)
+        if title and page_refs:
+            self.add_outline_item(title, len(self.page_ids))
+        self.page_ids.extend(id_map[(ref.idnum, ref.generation)] for ref in page_refs)
+        return len(page_refs)
+
+    def _collect_form_fields(self, pages, id_map):
+        """
+        记录追加的页面上表单控件所属的根字段
+        """
+        for page in pages:
+            annots = page.get("/Annots")
+            if annots is None:
+                continue
+            for annot_ref in annots.get_object():
+                if not isinstance(annot_ref, IndirectObject):
+                    continue
+                if annot_ref.get_object().get("/Subtype") != "/Widget":
+                    continue
+                # 控件可能是层级字段的子节点，表单的字段列表中记录根字段
+                root_ref = annot_ref
+                while isinstance(root_ref, IndirectObject) and "/Parent" in root_ref.get_object():
+                    root_ref = root_ref.get_object().raw_get("/Parent")
+                if not isinstance(root_ref, IndirectObject):
+                    continue
+                object_id = id_map.get((root_ref.idnum, root_ref.generation))
+                if object_id is not None and object_id not in self.form_fields:
+                    self.form_fields.append(object_id)
+
+    def add_outline_item(self, title, page_index):
+        """
+        添加书签
+        :param title: 书签标题
+        :param page_index: 书签指向的页面在输出文件中的序号
+        """
+        self.outline.append((title, page_index))
+
+    def _clone(self, obj, id_map, pending):
+        """
+        复制对象并把其中的间接引用改为输出文件中的编号，引用的对象加入待写入列表
+        """
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key in id_map:
+                if key in self._cloning:
+                    self._cyclic.add(key)
+                return IndirectObject(id_map[key], 0, self)
+            target = obj.get_object()
+            # 页面树节点只能通过页面引用，其他位置的引用置空，避免把整个输入文件的页面树复制过来
+            if isinstance(target, DictionaryObject) and target.get("/Type") == "/Pages":
+                return NullObject()
+            if not isinstance(target, (DictionaryObject, ArrayObject)):
+                # 数字、名称等简单对象直接写在引用处
+                return self._clone(target, id_map, pending)
+            id_map[key] = self._allocate_id()
+            if isinstance(target, StreamObject) or \
+                    (isinstance(target, DictionaryObject) and target.get("/Type") in SHARED_RESOURCE_TYPES):
+                id_map[key] = self._write_shared(key, target, id_map, pending)
+            else:
+                pending.append(obj)
+            return IndirectObject(id_map[key], 0, self)
+
+        if isinstance(obj, StreamObject):
+            clone = obj.__class__()
+            clone._data = obj._data
+            for key, value in obj.items():
+                # 长度在写入时重新计算
+                if key != "/Length":
+                    clone[NameObject(key)] = self._clone(value, id_map, pending)
+            if "/Filter" not in clone and clone.get("/Type") != "/Metadata" and clone._data:
+                # 未压缩的流（多为页面内容流）使用Flate压缩
+                clone._data = zlib.compress(clone._data)
+                clone[NameObject("/Filter")] = NameObject("/FlateDecode")
+            return clone
+
+        if isinstance(obj, DictionaryObject):
+            clone = DictionaryObject()
+            for key, value in obj.items():
+                if key == "/Parent" and obj.get("/Type") == "/Page":
+                    # 页面统一挂到输出文件的页面树根节点下
+                    clone[NameObject(key)] = IndirectObject(PAGES_ID, 0, self)
+                else:
+                    clone[NameObject(key)] = self._clone_member(value, id_map, pending)
+            return clone
+
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._clone_member(item, id_map, pending) for item in obj)
+
+        return obj
+
+    def _clone_member(self, obj, id_map, pending):
+        """
+        复制字典或数组中的成员；程序生成的流（如表单字段的外观）直接放在字典中，
+        流只能作为间接对象写入，为其分配编号后写入引用
+        """
+        if not isinstance(obj, StreamObject):
+            return self._clone(obj, id_map, pending)
+        object_id = self._allocate_id()
+        self._write_object(object_id, self._clone(obj, id_map, pending))
+        return IndirectObject(object_id, 0, self)
+
+    def _write_shared(self, key, target, id_map, pending):
+        """
+        立即复制并写入可共享的资源（流、字体等），与已写入的对象内容相同时改为引用已有对象
+        其引用的共享资源先于它写入，因此不同输入文件中相同的字体、图片最终得到相同的序列化内容
+        :return: 输出文件中的对象编号
+        """
+        object_id = id_map[key]
+        self._cloning.add(key)
+        try:
+            clone = self._clone(target, id_map, pending)
+        finally:
+            self._cloning.discard(key)
+        data = self._serialize(clone)
+
+        # 复制过程中被自身引用的对象已使用预先分配的编号，不能去重
+        if key not in self._cyclic:
+            digest = hashlib.sha256(data).digest()
+            existing_id = self.shared_ids.get(digest)
+            if existing_id is not None:
+                return existing_id  # 预先分配的编号不再使用，在交叉引用中记为空闲
+            self.shared_ids[digest] = object_id
+
+        if isinstance(clone, StreamObject):
+            self._write_raw(object_id, data)
+        else:
+            self._buffer_object(object_id, data)
+        return object_id
+
+    def _write_outline(self):
+        """
+        写入书签
+        :return: 书签根节点的对象编号
+        """
+        outlines_id = self._allocate_id()
+        item_ids = [self._allocate_id() for _ in self.outline]
+        for index, (title, page_index) in enumerate(self.outline):
+            item = DictionaryObject({
+                NameObject("/Title"): create_string_object(title),
+                NameObject("/Parent"): IndirectObject(outlines_id, 0, self),
+                NameObject("/Dest"): ArrayObject([IndirectObject(self.page_ids[page_index], 0, self), NameObject("/Fit")]),
+            })
+            if index > 0:
+                item[NameObject("/Prev")] = IndirectObject(item_ids[index - 1], 0, self)
+            if index < len(item_ids) - 1:
+                item[NameObject("/Next")] = IndirectObject(item_ids[index + 1], 0, self)
+            self._write_object(item_ids[index], item)
+
+        outlines = DictionaryObject({
+            NameObject("/Type"): NameObject("/Outlines"),
+            NameObject("/First"): IndirectObject(item_ids[0], 0, self),
+            NameObject("/Last"): IndirectObject(item_ids[-1], 0, self),
+            NameObject("/Count"): NumberObject(len(item_ids)),
+        })
+        self._write_object(outlines_id, outlines)
+        return outlines_id
+
+    def close(self):
+        """
+        写入页面树、书签、文档目录和交叉引用流，完成输出文件
+        """
+        pages = DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(page_id, 0, self) for page_id in self.page_ids),
+            NameObject("/Count"): NumberObject(len(self.page_ids)),
+        })
+        self._write_object(PAGES_ID, pages)
+
+        catalog = DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(PAGES_ID, 0, self),
+        })
+        if self.form_fields:
+            acroform = DictionaryObject({
+                NameObject("/Fields"): ArrayObject(IndirectObject(field_id, 0, self) for field_id in self.form_fields),
+            })
+            acroform.update({NameObject(key): value for key, value in (self.form_resources or {}).items()})
+            if self.need_appearances:
+                acroform[NameObject("/NeedAppearances")] = BooleanObject(True)
+            catalog[NameObject("/AcroForm")] = acroform
+        if self.outline:
+            catalog[NameObject("/Outlines")] = IndirectObject(self._write_outline(), 0, self)
+            catalog[NameObject("/PageMode")] = NameObject("/UseOutlines")
+        self._write_object(CATALOG_ID, catalog)
+        self._flush_object_stream()
+
+        # 交叉引用流：每行为类型(1字节)、偏移量或对象流编号、版本号或在对象流中的序号(2字节)
+        xref_id = self._allocate_id()
+        xref_offset = self.stream.tell()
+        self.offsets[xref_id] = xref_offset
+        size = self.next_id
+        width = max(1, (max(xref_offset, size).bit_length() + 7) // 8)
+        rows = bytearray()
+        for object_id in range(size):
+            if object_id in self.offsets:
+                rows += b"\x01" + self.offsets[object_id].to_bytes(width, "big") + b"\x00\x00"
+            elif object_id in self.compressed:
+                stream_id, index = self.compressed[object_id]
+                rows += b"\x02" + stream_id.to_bytes(width, "big") + index.to_bytes(2, "big")
+            else:
+                rows += b"\x00" + bytes(width) + b"\xff\xff"
+
+        xref = DecodedStreamObject()
+        xref._data = zlib.compress(bytes(rows))
+        xref.update({
+            NameObject("/Type"): NameObject("/XRef"),
+            NameObject("/Size"): NumberObject(size),
+            NameObject("/W"): ArrayObject([NumberObject(1), NumberObject(width), NumberObject(2)]),
+            NameObject("/Root"): IndirectObject(CATALOG_ID, 0, self),
+            NameObject("/Filter"): NameObject("/FlateDecode"),
+        })
+        self._write_raw(xref_id, self._serialize(xref))
+        self.stream.write(f"startxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
+        self.stream.close()
+
+    def abort(self):
+        """
+        放弃写入并删除未完成的输出文件
+        """
+        try:
+            self.stream.close()
+        finally:
+            if os.path.exists(self.output_path):
+                os.remove(self.output_path)
+
+
+class MergeManifest:
+    """
+    合并记录：保存上次合并文档的路径以及每个源文档（按内容缓存键）在其中的页面范围，
+    再次合并时内容未变化的文档直接从上次的合并文档中复制页面，无需重新转换
+    """
+
+    def __init__(self, output_dir):
+        """
+        :param output_dir: 合并文档所在目录
+        """
+        self.path = os.path.join(output_dir, MERGE_MANIFEST_FILE)
+        self.merged_pdf_path = None
+        self.ranges = {}  # 缓存键 -> (起始页序号, 页数)
+
+    def load(self):
+        """
+        读取合并记录，上次的合并文档已被删除或修改时不使用
+        :return: 缓存键 -> (起始页序号, 页数)
+        """
+        self.merged_pdf_path = None
+        self.ranges = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            merged_pdf_path = data["merged_pdf"]
+            stat = os.stat(merged_pdf_path)
+            if stat.st_size != data["size"] or stat.st_mtime != data["mtime"]:
+                return self.ranges
+            for entry in data["entries"]:
+                self.ranges.setdefault(entry["key"], (entry["start"], entry["pages"]))
+            self.merged_pdf_path = merged_pdf_path
+        except (OSError, ValueError, KeyError, TypeError):
+            self.ranges = {}
+        return self.ranges
+
+    def save(self, merged_pdf_path, entries):
+        """
+        保存合并记录
+        :param merged_pdf_path: 新的合并文档路径
+        :param entries: 按合并顺序排列的(缓存键, 页数)列表，缓存键为空的文档下次不复用
+        """
+        records = []
+        start = 0
+        for key, pages in entries:
+            if key:
+                records.append({"key": key, "start": start, "pages": pages})
+            start += pages
+        stat = os.stat(merged_pdf_path)
+        data = {
+            "merged_pdf": os.path.abspath(merged_pdf_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "entries": records,
+        }
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"保存合并记录时出错: {e}")
+
+
+class GroupedPdfWriter:
+    """
+    分组合并写入器：按顺序追加的文档每MERGE_FAN_IN个写入一个分组文件，关闭时再逐级合并各分组，
+    每个写入器只记录一组文档的对象编号和共享资源，文档很多时内存占用仍然有上限；
+    文档不超过一组时直接写入输出文件，不产生临时文件。接口与StreamingPdfWriter相同
+    """
+
+    def __init__(self, output_path, fan_in=MERGE_FAN_IN, status_callback=None):
+        """
+        :param output_path: 输出PDF文件路径
+        :param fan_in: 每组最多合并的文档数量
+        :param status_callback: 状态更新回调函数
+        """
+        self.output_path = output_path
+        self.fan_in = fan_in
+        self.status_callback = status_callback
+        self.temp_dir = None
+        self.groups = []  # 已完成的分组：(分组文件路径, 书签列表)
+        self.writer = StreamingPdfWriter(output_path)
+        self.documents = 0  # 当前分组中的文档数量
+        self.previous_pages = 0  # 已完成的分组中的总页数
+
+    @property
+    def page_count(self):
+        return self.previous_pages + (self.writer.page_count if self.writer is not None else 0)
+
+    def append(self, source, page_range=None, title=None):
+        """
+        追加一个文档的页面，当前分组已满时先完成该分组
+        :return: 追加的页数
+        """
+        if self.documents >= self.fan_in:
+            self._finish_group()
+            self.writer = StreamingPdfWriter(os.path.join(self.temp_dir, f"group{len(self.groups)}.pdf"))
+            self.documents = 0
+        self.documents += 1
+        return self.writer.append(source, page_range, title=title)
+
+    def _finish_group(self):
+        """
+        完成当前分组
+        """
+        self.writer.close()
+        if self.temp_dir is None:
+            self.temp_dir = tempfile.mkdtemp(prefix="tiandan_merge_")
+        group_path = os.path.join(self.temp_dir, f"group{len(self.groups)}.pdf")
+        # 第一组直接写入了输出文件，需要分组时移到临时文件夹
+        if self.writer.output_path == self.output_path:
+            shutil.move(self.writer.output_path, group_path)
+        self.groups.append((group_path, self.writer.outline))
+        self.previous_pages += self.writer.page_count
+
+    def close(self):
+        """
+        完成写入，有多个分组时逐级合并到输出文件
+        """
+        try:
+            if not self.groups:
+                self.writer.close()
+                return
+            self._finish_group()
+            self.writer = None
+            print(f"合并PDF: 共{len(self.groups)}组，逐级合并")
+            _merge_tree(self.groups, self.output_path, self.fan_in, self.temp_dir, self.status_callback)
+        finally:
+            self._remove_temp_dir()
+
+    def abort(self):
+        """
+        放弃写入并删除未完成的输出文件和分组文件
+        """
+        try:
+            if self.writer is not None:
+                self.writer.abort()
+        finally:
+            self._remove_temp_dir()
+
+    def _remove_temp_dir(self):
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
+
+
+def _merge_tree(inputs, output_path, fan_in, temp_dir, status_callback=None):
+    """
+    逐级合并：输入超过fan_in个时分组合并到临时文件，下一级再合并各组的结果
+    :param inputs: (文件路径, 书签列表)列表，书签为(标题, 在该文件中的页面序号)
+    :param output_path: 输出文件路径
+    :param fan_in: 每组最多合并的文件数量
+    :param temp_dir: 存放各级临时文件的文件夹
+    :param status_callback: 状态更新回调函数
+    :return: 完成写入的StreamingPdfWriter
+    """
+    level = 0
+    while len(inputs) > fan_in:
+        level += 1
+        groups = [inputs[i:i + fan_in] for i in range(0, len(inputs), fan_in)]
+        if status_callback:
+            status_callback(f"正在分组合并PDF: 第{level}级，共{len(groups)}组")
+        outputs = []
+        for index, group in enumerate(groups):
+            group_path = os.path.join(temp_dir, f"level{level}_{index}.pdf")
+            writer = _merge_group(group, group_path)
+            outputs.append((group_path, writer.outline))
+        # 删除上一级的临时文件
+        for path, _ in inputs:
+            if os.path.dirname(path) == temp_dir:
+                os.remove(path)
+        inputs = outputs
+    return _merge_group(inputs, output_path, status_callback)
+
+
+def _merge_group(inputs, output_path, status_callback=None):
+    """
+    将一组PDF文件流式合并为一个文件
+    :param inputs: (文件路径, 书签列表)列表
+    :return: 完成写入的StreamingPdfWriter
+    """
+    writer = StreamingPdfWriter(output_path)
+    try:
+        for pdf_path, outline in inputs:
+            # 检查文件是否存在
+            if not os.path.exists(pdf_path):
+                raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
+            first_page = writer.page_count
+            try:
+                pages = writer.append(pdf_path)
+            except Exception as e:
+                raise Exception(f"添加PDF文件 {os.path.basename(pdf_path)} 时出错: {str(e)}")
+            for title, page_index in outline:
+                if page_index < pages:
+                    writer.add_outline_item(title, first_page + page_index)
+            if status_callback:
+                status_callback(f"已合并: {os.path.basename(pdf_path)}")
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    return writer
+
+
+def peak_memory_usage():
+    """
+    读取当前进程的内存峰值（物理内存），系统调用的开销很小，不影响合并速度
+    :return: 内存峰值（字节），无法读取时返回None
+    """
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            get_process_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS),
+                                                wintypes.DWORD]
+            get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+            get_current_process.restype = wintypes.HANDLE
+            process = get_current_process()
+            if not get_process_memory_info(process, ctypes.byref(counters), counters.cb):
+                return None
+            return counters.PeakWorkingSetSize
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS返回字节，Linux返回KB
+        return peak if sys.platform == "darwin" else peak * 1024
+    except Exception as e:
+        print(f"读取内存峰值时出错: {e}")
+        return None
+
+
+def format_peak_memory(peak_memory):
+    """
+    生成显示在状态信息中的内存峰值文字
+    :param peak_memory: 内存峰值（字节），为None时不显示
+    :return: 内存峰值文字
+    """
+    if peak_memory is None:
+        return ""
+    return f"（内存峰值{peak_memory / 1024 / 1024:.1f}MB）"
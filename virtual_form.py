@@ -0,0 +1,250 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+
+# 每行的高度（像素），所有行等高，按滚动位置即可算出可见的行
+FORM_ROW_HEIGHT = 30
+# 可见区域上下额外保留的行数，快速滚动时不出现空白
+FORM_OVERSCAN_ROWS = 2
+# 输入框和下拉框的宽度（字符数）
+FORM_INPUT_WIDTH = 37
+
+
+class VirtualForm:
+    """
+    虚拟化的录入表单：各字段的值保存在普通字典中，只为可见区域内的行创建控件，
+    滚动时把移出可见区域的行控件重新绑定到新进入的字段，控件数量只与窗口高度有关，与字段数量无关
+    字段类型：text（文本框）、combobox（下拉框）、date（日期标签和"选择日期"按钮）
+    """
+
+    def __init__(self, canvas, scrollbar, date_command=None):
+        """
+        :param canvas: 显示表单的画布
+        :param scrollbar: 画布的竖直滚动条
+        :param date_command: 点击日期字段的"选择日期"按钮时调用的函数，参数为字段名称
+        """
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.date_command = date_command
+        self.fields = []  # 字段列表 {"key", "label", "type", "options"}
+        self.index = {}  # 字段名称 -> 序号
+        self.values = {}  # 字段名称 -> 当前值（表单的数据模型）
+        self.rows = []  # 可复用的行控件
+        self.label_width = 0  # 标签列的宽度（像素）
+
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.configure(command=self.canvas.yview)
+        self.canvas.bind("<Configure>", lambda e: self._layout())
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+
+    def set_fields(self, fields, values=None):
+        """
+        设置表单的字段，已创建的行控件保留下来重新使用
+        :param fields: 字段字典列表 {"key": 字段名称, "label": 显示的标签, "type": 字段类型, "options": 下拉选项}
+        :param values: 字段的初始值，未提供的字段为空
+        """
+        values = values or {}
+        self.fields = []
+        self.index = {}
+        self.values = {}
+        for field in fields:
+            field = dict(field, options=list(field.get("options", [])))
+            self.index[field["key"]] = len(self.fields)
+            self.fields.append(field)
+            self.values[field["key"]] = ""
+        for key, value in values.items():
+            if key in self.index:
+                self.set_value(key, value, refresh=False)
+
+        # 标签列按最长的标签设置宽度，各行的输入控件保持对齐
+        font = tkfont.nametofont("TkDefaultFont")
+        self.label_width = max([font.measure(field["label"]) for field in self.fields] or [0]) + 10
+        for row in self.rows:
+            row["frame"].columnconfigure(0, minsize=self.label_width)
+
+        # 已创建的行控件仍绑定着旧的字段，全部解除绑定，由_layout按新的字段重新绑定
+        for row in self.rows:
+            row["index"] = None
+            self.canvas.itemconfigure(row["window"], state="hidden")
+
+        self.canvas.configure(scrollregion=(0, 0, 0, len(self.fields) * FORM_ROW_HEIGHT))
+        self.canvas.yview_moveto(0)
+        self._layout()
+
+    def get_values(self):
+        """
+        获取所有字段的当前值
+        :return: 字段名称 -> 值
+        """
+        return dict(self.values)
+
+    def get_value(self, key, default=""):
+        return self.values.get(key, default)
+
+    def set_value(self, key, value, refresh=True):
+        """
+        设置字段的值，下拉框中没有该值时添加到选项中
+        :param key: 字段名称
+        :param value: 新的值
+        :param refresh: 是否立即更新显示
+        """
+        if key not in self.index:
+            return
+        field = self.fields[self.index[key]]
+        if field["type"] == "combobox" and value and value not in field["options"]:
+            field["options"].append(value)
+        self.values[key] = value
+        if refresh:
+            self.refresh()
+
+    def refresh(self):
+        """
+        按数据模型重新显示可见的行
+        """
+        for row in self.rows:
+            if row["index"] is not None:
+                self._bind_row(row, row["index"], force=True)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._layout()
+
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+
+    def _layout(self):
+        """
+        计算可见的字段范围，把行控件移动到对应位置并绑定到对应字段
+        """
+        height = max(self.canvas.winfo_height(), FORM_ROW_HEIGHT)
+        top = int(self.canvas.canvasy(0))
+        first = max(0, top // FORM_ROW_HEIGHT - FORM_OVERSCAN_ROWS)
+        last = min(len(self.fields), (top + height) // FORM_ROW_HEIGHT + 1 + FORM_OVERSCAN_ROWS)
+        visible = range(first, last)
+
+        # 已绑定到可见字段的行保持不变，其余的行重新使用
+        free_rows = []
+        bound = set()
+        for row in self.rows:
+            if row["index"] in visible:
+                bound.add(row["index"])
+            else:
+                free_rows.append(row)
+        for index in visible:
+            if index in bound:
+                continue
+            row = free_rows.pop() if free_rows else self._create_row()
+            self._bind_row(row, index)
+
+        # 多余的行暂时隐藏，窗口变大时再使用
+        for row in free_rows:
+            row["index"] = None
+            self.canvas.itemconfigure(row["window"], state="hidden")
+
+        width = self.canvas.winfo_width()
+        for row in self.rows:
+            if row["index"] is not None:
+                self.canvas.itemconfigure(row["window"], width=width)
+
+    def _create_row(self):
+        """
+        创建一行的控件：标签和三种输入控件，绑定字段时只显示字段类型对应的控件
+        """
+        frame = ttk.Frame(self.canvas, height=FORM_ROW_HEIGHT)
+        frame.grid_propagate(False)
+        frame.columnconfigure(0, minsize=self.label_width)
+        frame.columnconfigure(1, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        var = tk.StringVar()
+        row = {"frame": frame, "var": var, "index": None}
+
+        row["label"] = ttk.Label(frame)
+        row["label"].grid(row=0, column=0, sticky=tk.W)
+        row["entry"] = ttk.Entry(frame, textvariable=var, width=FORM_INPUT_WIDTH)
+        row["combobox"] = ttk.Combobox(frame, textvariable=var, width=FORM_INPUT_WIDTH, state="readonly")
+        row["date"] = ttk.Frame(frame)
+        ttk.Label(row["date"], textvariable=var).pack(side=tk.LEFT)
+        ttk.Button(row["date"], text="选择日期", width=8,
+                   command=lambda: self._on_date_button(row)).pack(side=tk.LEFT, padx=(5, 0))
+
+        for widget in (frame, row["label"], row["entry"], row["date"]):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+        # 焦点移到下一个字段时滚动到该字段，即使它的行控件还未创建
+        row["entry"].bind("<Tab>", lambda e: self._focus_next(row, 1))
+        row["entry"].bind("<Shift-Tab>", lambda e: self._focus_next(row, -1))
+
+        # 输入的内容直接写入数据模型
+        var.trace_add("write", lambda *args: self._on_var_changed(row))
+
+        row["window"] = self.canvas.create_window(0, 0, window=frame, anchor="nw", height=FORM_ROW_HEIGHT)
+        self.rows.append(row)
+        return row
+
+    def _bind_row(self, row, index, force=False):
+        """
+        把行控件绑定到指定字段并显示该字段的值
+        """
+        field = self.fields[index]
+        previous_type = None
+        if row["index"] is not None and row["index"] < len(self.fields) and not force:
+            previous_type = self.fields[row["index"]]["type"]
+        row["index"] = None  # 设置显示的值时不写回数据模型
+        row["label"].config(text=field["label"])
+        editor = {"combobox": "combobox", "date": "date"}.get(field["type"], "entry")
+        if force or previous_type != field["type"]:
+            for name in ("entry", "combobox", "date"):
+                if name == editor:
+                    row[name].grid(row=0, column=1, sticky=(tk.W, tk.E) if name != "date" else tk.W, padx=(5, 0))
+                else:
+                    row[name].grid_remove()
+        if editor == "combobox":
+            row["combobox"]["values"] = field["options"]
+        row["var"].set(self.values.get(field["key"], ""))
+        row["index"] = index
+
+        self.canvas.coords(row["window"], 0, index * FORM_ROW_HEIGHT)
+        self.canvas.itemconfigure(row["window"], state="normal")
+
+    def _on_var_changed(self, row):
+        if row["index"] is not None:
+            self.values[self.fields[row["index"]]["key"]] = row["var"].get()
+
+    def _on_date_button(self, row):
+        if row["index"] is not None and self.date_command:
+            self.date_command(self.fields[row["index"]]["key"])
+
+    def _focus_next(self, row, step):
+        """
+        按Tab键时把焦点移到相邻的文本字段
+        """
+        if row["index"] is None:
+            return None
+        index = row["index"] + step
+        while 0 <= index < len(self.fields) and self.fields[index]["type"] not in ("text", "combobox"):
+            index += step
+        if not 0 <= index < len(self.fields):
+            return None
+        self.see(index)
+        for other in self.rows:
+            if other["index"] == index:
+                editor = "combobox" if self.fields[index]["type"] == "combobox" else "entry"
+                other[editor].focus_set()
+                break
+        return "break"
+
+    def see(self, index):
+        """
+        滚动到指定序号的字段，使其完整显示
+        """
+        total = len(self.fields) * FORM_ROW_HEIGHT
+        if not total:
+            return
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        y = index * FORM_ROW_HEIGHT
+        if y < top:
+            self.canvas.yview_moveto(y / total)
+        elif y + FORM_ROW_HEIGHT > top + height:
+            self.canvas.yview_moveto((y + FORM_ROW_HEIGHT - height) / total)
+        self._layout()